@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Assessment, Question, Option
+from .models import Assessment, Question, Option, AssessmentAttempt
 
 @admin.register(Assessment)
 class AssessmentAdmin(admin.ModelAdmin):
@@ -32,3 +32,10 @@ class OptionAdmin(admin.ModelAdmin):
     list_display = ('text', 'question', 'is_correct')
     list_filter = ('is_correct', 'question__assessment')
     search_fields = ('text', 'question__text')
+
+@admin.register(AssessmentAttempt)
+class AssessmentAttemptAdmin(admin.ModelAdmin):
+    list_display = ('user', 'assessment', 'status', 'started_at', 'expires_at', 'finished_at')
+    list_filter = ('status', 'assessment')
+    search_fields = ('user__username', 'assessment__title')
+    readonly_fields = ('answers', 'result', 'started_at', 'finished_at')
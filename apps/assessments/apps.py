@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AssessmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.assessments'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Registra el chequeo de despliegue de la caché compartida
+        from config import cache  # noqa: F401
@@ -0,0 +1,180 @@
+"""
+Intentos de evaluación con respuestas en búfer.
+
+Mientras el intento está en curso cada respuesta se valida contra la clave
+compilada y se guarda en la caché compartida (una clave por pregunta, que
+vence con el tiempo restante del intento) sin escribir en la base de datos.
+Los intentos solo se inician si la caché es compartida entre procesos
+(REQUIRE_SHARED_CACHE). Al finalizar, las respuestas se califican en el
+servidor y se registran de una sola vez en attempt.answers, junto con el
+Result y la actualización del UserScore.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from config.cache import shared_cache_missing
+from .grading import get_answer_key, grade_answers, record_result
+from .models import Assessment, AssessmentAttempt
+
+# Margen tras la fecha límite durante el cual se conservan las respuestas en búfer (segundos).
+# El comando close_expired_attempts debe ejecutarse con una frecuencia menor.
+ANSWER_BUFFER_GRACE = 60 * 15
+
+
+class AttemptError(Exception):
+    """Operación no permitida sobre un intento"""
+
+
+def _state_key(attempt_id):
+    return f'assessments:attempt:{attempt_id}'
+
+
+def _answer_key(attempt_id, question_id):
+    return f'assessments:attempt:{attempt_id}:answer:{question_id}'
+
+
+def _buffer_timeout(expires_at):
+    remaining = (expires_at - timezone.now()).total_seconds()
+    return max(int(remaining), 0) + ANSWER_BUFFER_GRACE
+
+
+def _cache_state(attempt):
+    state = {
+        'id': attempt.id,
+        'user_id': attempt.user_id,
+        'assessment_id': attempt.assessment_id,
+        'status': attempt.status,
+        'expires_at': attempt.expires_at,
+    }
+    cache.set(_state_key(attempt.id), state, _buffer_timeout(attempt.expires_at))
+    return state
+
+
+def get_attempt_state(attempt_id):
+    """Estado del intento desde la caché; solo consulta la base de datos si no está"""
+    state = cache.get(_state_key(attempt_id))
+    if state is None:
+        attempt = AssessmentAttempt.objects.filter(pk=attempt_id).first()
+        if attempt is None:
+            return None
+        state = _cache_state(attempt)
+    return state
+
+
+def start_attempt(user, assessment_id):
+    """
+    Inicia un intento, o retoma el que el usuario tenga en curso.
+    Retorna (intento, creado), o (None, False) si la evaluación no existe.
+    Lanza AttemptError si la configuración exige una caché compartida y no la hay.
+    """
+    if shared_cache_missing():
+        raise AttemptError("Los intentos requieren una caché compartida entre procesos (REDIS_URL)")
+
+    time_limit = (
+        Assessment.objects.filter(pk=assessment_id)
+        .values_list('time_limit', flat=True)
+        .first()
+    )
+    if time_limit is None:
+        return None, False
+
+    now = timezone.now()
+    attempt = AssessmentAttempt.objects.filter(
+        user=user, assessment_id=assessment_id, status='in_progress', expires_at__gt=now
+    ).first()
+    created = attempt is None
+    if created:
+        attempt = AssessmentAttempt.objects.create(
+            user=user,
+            assessment_id=assessment_id,
+            expires_at=now + timedelta(seconds=time_limit),
+        )
+    _cache_state(attempt)
+    # Calentar la clave de respuestas antes de la primera respuesta
+    get_answer_key(assessment_id)
+    return attempt, created
+
+
+def record_answer(state, question_id, option_id):
+    """Valida la respuesta contra la clave y la guarda en el búfer del intento (reemplaza la anterior)"""
+    if state['status'] != 'in_progress':
+        raise AttemptError("El intento ya fue finalizado")
+    if timezone.now() > state['expires_at']:
+        raise AttemptError("El tiempo de la evaluación terminó")
+
+    answer_key = get_answer_key(state['assessment_id'])
+    _, errors = grade_answers(answer_key, [{'question_id': question_id, 'option_id': option_id}])
+    if errors:
+        raise AttemptError(errors[0]['error'])
+
+    cache.set(_answer_key(state['id'], question_id), option_id, _buffer_timeout(state['expires_at']))
+
+
+def _close_attempt(attempt, now):
+    """Califica las respuestas en búfer y registra el resultado del intento"""
+    answer_key = get_answer_key(attempt.assessment_id)
+    keys = {_answer_key(attempt.id, question_id): question_id for question_id in answer_key.questions}
+    buffered = cache.get_many(list(keys))
+
+    # Respuestas de preguntas eliminadas durante el intento se descartan
+    graded, _ = grade_answers(
+        answer_key,
+        [{'question_id': keys[key], 'option_id': option_id} for key, option_id in buffered.items()]
+    )
+    graded.sort(key=lambda answer: answer['question_id'])
+
+    time_limit = (attempt.expires_at - attempt.started_at).total_seconds()
+    time_taken = round(min((now - attempt.started_at).total_seconds(), time_limit))
+
+    attempt.result = record_result(attempt.user_id, answer_key, graded, time_taken)
+    attempt.answers = graded
+    attempt.status = 'expired' if now > attempt.expires_at else 'finished'
+    attempt.finished_at = now
+    attempt.save(update_fields=['result', 'answers', 'status', 'finished_at'])
+
+    stale_keys = list(keys) + [_state_key(attempt.id)]
+    transaction.on_commit(lambda: cache.delete_many(stale_keys))
+    return attempt
+
+
+def finish_attempt(attempt_id, user):
+    """
+    Finaliza el intento del usuario.
+    Retorna None si el intento no existe o pertenece a otro usuario.
+    """
+    with transaction.atomic():
+        # El bloqueo es solo del intento: no afecta a otros candidatos
+        attempt = (
+            AssessmentAttempt.objects.select_for_update()
+            .filter(pk=attempt_id, user=user)
+            .first()
+        )
+        if attempt is None:
+            return None
+        if attempt.status != 'in_progress':
+            raise AttemptError("El intento ya fue finalizado")
+        return _close_attempt(attempt, timezone.now())
+
+
+def close_expired_attempts(now=None):
+    """Cierra los intentos abandonados cuyo tiempo terminó. Retorna cuántos se cerraron."""
+    now = now or timezone.now()
+    closed = 0
+    expired_ids = AssessmentAttempt.objects.filter(
+        status='in_progress', expires_at__lt=now
+    ).values_list('id', flat=True)
+
+    for attempt_id in list(expired_ids):
+        with transaction.atomic():
+            attempt = (
+                AssessmentAttempt.objects.select_for_update()
+                .filter(pk=attempt_id, status='in_progress')
+                .first()
+            )
+            if attempt is not None:
+                _close_attempt(attempt, now)
+                closed += 1
+    return closed
@@ -0,0 +1,152 @@
+"""
+Caché de contenido de evaluaciones.
+
+La versión de contenido de una evaluación es un contador en la caché
+compartida, que se inicializa con su `updated_at` (en microsegundos) para no
+consultar la base de datos en cada petición. Cuando cambian la evaluación,
+sus preguntas u opciones, el contador se incrementa de forma atómica al
+confirmar la transacción: un lector que leyó la versión anterior no puede
+volver a publicarla. La versión tiene un tiempo de vida acotado, por lo que
+una invalidación perdida solo deja contenido viejo hasta que expira.
+"""
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import Assessment, Option
+
+# Tiempo de vida del documento de inicio en la caché compartida (segundos)
+START_PAYLOAD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Tiempo de vida de una versión de contenido (segundos): cota de la demora con
+# que un proceso ve un cambio cuya invalidación no le llegó
+CONTENT_VERSION_CACHE_TIMEOUT = 60 * 5
+
+
+class LRUCache:
+    """Caché LRU en memoria del proceso, segura entre hilos"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _version_key(assessment_id):
+    return f'assessments:version:{assessment_id}'
+
+
+def _load_version(assessment_id):
+    updated_at = (
+        Assessment.objects.filter(pk=assessment_id)
+        .values_list('updated_at', flat=True)
+        .first()
+    )
+    if updated_at is None:
+        return None
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+def content_version(assessment_id):
+    """
+    Retorna la versión de contenido de la evaluación.
+    Retorna None si la evaluación no existe.
+    """
+    key = _version_key(assessment_id)
+    version = cache.get(key)
+    if version is None:
+        version = _load_version(assessment_id)
+        if version is None:
+            return None
+        # add no pisa una versión publicada mientras se leía la base de datos
+        if not cache.add(key, version, CONTENT_VERSION_CACHE_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_content_version(assessment_id):
+    """Publica una nueva versión (incremento atómico) una vez confirmada la transacción"""
+    def bump():
+        key = _version_key(assessment_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Sin versión en la caché: se publica la de la base de datos ya confirmada
+            version = _load_version(assessment_id)
+            if version is not None:
+                cache.add(key, version, CONTENT_VERSION_CACHE_TIMEOUT)
+    transaction.on_commit(bump)
+
+
+def bump_content_version(assessment_id):
+    """Marca la evaluación como modificada cuando cambian sus preguntas u opciones"""
+    Assessment.objects.filter(pk=assessment_id).update(updated_at=timezone.now())
+    invalidate_content_version(assessment_id)
+
+
+# Documentos de inicio renderizados, indexados por (evaluación, versión)
+_local_start_payloads = LRUCache(maxsize=128)
+
+
+def render_start_payload(assessment_id):
+    """Renderiza a bytes el documento que recibe el candidato al iniciar la evaluación"""
+    from .serializers import CandidateAssessmentSerializer
+
+    assessment = (
+        Assessment.objects.filter(pk=assessment_id)
+        .prefetch_related(
+            'questions',
+            Prefetch('questions__options', queryset=Option.objects.order_by('id')),
+        )
+        .first()
+    )
+    if assessment is None:
+        return None
+    return JSONRenderer().render(CandidateAssessmentSerializer(assessment).data)
+
+
+def get_start_payload(assessment_id):
+    """
+    Retorna (etag, documento en bytes) para la versión actual de la evaluación.
+    El documento solo se renderiza de nuevo cuando cambia su contenido.
+    Retorna None si la evaluación no existe.
+    """
+    version = content_version(assessment_id)
+    if version is None:
+        return None
+
+    payload = _local_start_payloads.get((assessment_id, version))
+    if payload is None:
+        cache_key = f'assessments:start_payload:{assessment_id}:{version}'
+        payload = cache.get(cache_key)
+        if payload is None:
+            payload = render_start_payload(assessment_id)
+            if payload is None:
+                return None
+            cache.set(cache_key, payload, START_PAYLOAD_CACHE_TIMEOUT)
+        _local_start_payloads.set((assessment_id, version), payload)
+    return f'"{assessment_id}-{version}"', payload
@@ -0,0 +1,140 @@
+"""
+Calificación de evaluaciones contra su clave de respuestas.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import LRUCache, content_version
+from .models import Assessment, Question
+from apps.results.models import Result
+
+# Tiempo de vida de una clave compilada en la caché compartida (segundos)
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Claves compiladas en memoria del proceso, indexadas por (evaluación, versión)
+_local_answer_keys = LRUCache(maxsize=256)
+
+
+class AnswerKey:
+    """Clave de respuestas compilada de una evaluación"""
+
+    def __init__(self, assessment_id, questions):
+        self.assessment_id = assessment_id
+        # question_id -> (ids de opciones de la pregunta, ids de opciones correctas)
+        self.questions = questions
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
+
+    def has_question(self, question_id):
+        return question_id in self.questions
+
+    def has_option(self, question_id, option_id):
+        return option_id in self.questions[question_id][0]
+
+    def is_correct(self, question_id, option_id):
+        return option_id in self.questions[question_id][1]
+
+
+def load_answer_key(assessment_id):
+    """
+    Carga la clave de respuestas de una evaluación con una sola consulta.
+    Retorna None si la evaluación no existe.
+    """
+    rows = (
+        Question.objects.filter(assessment_id=assessment_id)
+        .order_by()
+        .values_list('id', 'options__id', 'options__is_correct')
+    )
+    questions = {}
+    for question_id, option_id, is_correct in rows:
+        options, correct = questions.setdefault(question_id, (set(), set()))
+        if option_id is not None:
+            options.add(option_id)
+            if is_correct:
+                correct.add(option_id)
+
+    # Solo se consulta la evaluación cuando no tiene preguntas
+    if not questions and not Assessment.objects.filter(pk=assessment_id).exists():
+        return None
+
+    return AnswerKey(
+        assessment_id,
+        {qid: (frozenset(options), frozenset(correct)) for qid, (options, correct) in questions.items()}
+    )
+
+
+def get_answer_key(assessment_id):
+    """
+    Retorna la clave compilada de la evaluación para su versión de contenido.
+    Busca primero en memoria del proceso, luego en la caché compartida y solo
+    la carga desde la base de datos cuando la versión cambió.
+    Retorna None si la evaluación no existe.
+    """
+    version = content_version(assessment_id)
+    if version is None:
+        return None
+
+    answer_key = _local_answer_keys.get((assessment_id, version))
+    if answer_key is None:
+        cache_key = f'assessments:answer_key:{assessment_id}:{version}'
+        answer_key = cache.get(cache_key)
+        if answer_key is None:
+            answer_key = load_answer_key(assessment_id)
+            if answer_key is None:
+                return None
+            cache.set(cache_key, answer_key, ANSWER_KEY_CACHE_TIMEOUT)
+        _local_answer_keys.set((assessment_id, version), answer_key)
+    return answer_key
+
+
+def grade_answers(answer_key, answers):
+    """
+    Califica una hoja de respuestas completa.
+    Retorna (respuestas calificadas, errores de validación).
+    """
+    graded = []
+    errors = []
+    seen = set()
+
+    for index, answer in enumerate(answers):
+        question_id = answer['question_id']
+        option_id = answer['option_id']
+
+        if question_id in seen:
+            errors.append({'index': index, 'question_id': question_id,
+                           'error': "La pregunta fue respondida más de una vez"})
+        elif not answer_key.has_question(question_id):
+            errors.append({'index': index, 'question_id': question_id,
+                           'error': f"Pregunta con id {question_id} no encontrada en esta evaluación"})
+        elif not answer_key.has_option(question_id, option_id):
+            errors.append({'index': index, 'question_id': question_id,
+                           'error': f"Opción con id {option_id} no encontrada para esta pregunta"})
+        else:
+            graded.append({
+                'question_id': question_id,
+                'option_id': option_id,
+                'is_correct': answer_key.is_correct(question_id, option_id),
+            })
+        seen.add(question_id)
+
+    return graded, errors
+
+
+def record_result(user_id, answer_key, graded, time_taken):
+    """
+    Registra el resultado de una hoja calificada.
+    El puntaje global del usuario se actualiza de forma incremental con la señal post_save de Result.
+    """
+    result = Result(
+        user_id=user_id,
+        assessment_id=answer_key.assessment_id,
+        correct_answers=sum(1 for answer in graded if answer['is_correct']),
+        total_questions=answer_key.total_questions,
+        time_taken=time_taken,
+    )
+    result.calculate_score()
+    with transaction.atomic():
+        result.save()
+    return result
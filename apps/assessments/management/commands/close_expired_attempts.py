@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.assessments.attempts import close_expired_attempts
+
+
+class Command(BaseCommand):
+    help = "Califica y cierra los intentos de evaluación cuyo tiempo límite terminó"
+
+    def handle(self, *args, **options):
+        closed = close_expired_attempts()
+        self.stdout.write(self.style.SUCCESS(f"Intentos cerrados: {closed}"))
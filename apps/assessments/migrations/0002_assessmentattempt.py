@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0001_initial'),
+        ('results', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('in_progress', 'En curso'), ('finished', 'Finalizado'), ('expired', 'Expirado')], default='in_progress', max_length=20)),
+                ('answers', models.JSONField(blank=True, default=list, help_text='Respuestas calificadas al finalizar el intento')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(help_text='Fecha límite según el tiempo de la evaluación')),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='assessments.assessment')),
+                ('result', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt', to='results.result')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assessment_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Intento de evaluación',
+                'verbose_name_plural': 'Intentos de evaluación',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['user', 'assessment', 'status'], name='assessments_user_id_1e230d_idx'), models.Index(fields=['status', 'expires_at'], name='assessments_status_c59de7_idx')],
+            },
+        ),
+    ]
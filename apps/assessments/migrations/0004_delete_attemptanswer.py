@@ -0,0 +1,16 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0003_attemptanswer'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='AttemptAnswer',
+        ),
+    ]
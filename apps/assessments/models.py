@@ -64,3 +64,40 @@ class Option(models.Model):
 
     def __str__(self):
         return f"{self.text} ({'correcta' if self.is_correct else 'incorrecta'})"
+
+
+class AssessmentAttempt(models.Model):
+    """Intento de un usuario al presentar una evaluación"""
+    STATUS_CHOICES = [
+        ('in_progress', 'En curso'),
+        ('finished', 'Finalizado'),
+        ('expired', 'Expirado'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assessment_attempts")
+    assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name="attempts")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    answers = models.JSONField(default=list, blank=True, help_text="Respuestas calificadas al finalizar el intento")
+    result = models.OneToOneField(
+        'results.Result',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="attempt"
+    )
+    started_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(help_text="Fecha límite según el tiempo de la evaluación")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Intento de evaluación'
+        verbose_name_plural = 'Intentos de evaluación'
+        indexes = [
+            models.Index(fields=['user', 'assessment', 'status']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.assessment.title} ({self.get_status_display()})"
+
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Assessment, Question, Option
+from .models import Assessment, Question, Option, AssessmentAttempt
 
 class OptionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -47,6 +47,30 @@ class AssessmentSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
+class CandidateOptionSerializer(serializers.ModelSerializer):
+    """Opción visible para el candidato (sin indicar si es correcta)"""
+    class Meta:
+        model = Option
+        fields = ["id", "text"]
+
+
+class CandidateQuestionSerializer(serializers.ModelSerializer):
+    options = CandidateOptionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Question
+        fields = ["id", "text", "order", "options"]
+
+
+class CandidateAssessmentSerializer(serializers.ModelSerializer):
+    """Evaluación que recibe el candidato al iniciarla"""
+    questions = CandidateQuestionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Assessment
+        fields = ["id", "title", "description", "difficulty", "time_limit", "updated_at", "questions"]
+
+
 class AssessmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Assessment
@@ -58,3 +82,20 @@ class SubmitAnswersSerializer(serializers.Serializer):
     question_id = serializers.IntegerField(required=True, help_text="ID de la pregunta")
     option_id = serializers.IntegerField(required=True, help_text="ID de la opción seleccionada")
 
+
+class SubmitAnswerSheetSerializer(serializers.Serializer):
+    """Serializer para enviar la hoja de respuestas completa de una evaluación"""
+    answers = SubmitAnswersSerializer(many=True, allow_empty=False, help_text="Respuestas de la evaluación")
+    time_taken = serializers.IntegerField(required=False, default=0, min_value=0, help_text="Tiempo tomado en segundos")
+
+
+class AssessmentAttemptSerializer(serializers.ModelSerializer):
+    assessment_title = serializers.CharField(source='assessment.title', read_only=True)
+
+    class Meta:
+        model = AssessmentAttempt
+        fields = [
+            "id", "assessment", "assessment_title", "status", "answers", "result",
+            "started_at", "expires_at", "finished_at"
+        ]
+        read_only_fields = fields
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_content_version, invalidate_content_version
+from .models import Assessment, Question, Option
+
+
+@receiver([post_save, post_delete], sender=Assessment)
+def assessment_changed(sender, instance, **kwargs):
+    invalidate_content_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    bump_content_version(instance.assessment_id)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    assessment_id = (
+        Question.objects.filter(pk=instance.question_id)
+        .values_list('assessment_id', flat=True)
+        .first()
+    )
+    # Si la pregunta ya fue eliminada, su propia señal invalidó la evaluación
+    if assessment_id is not None:
+        bump_content_version(assessment_id)
@@ -1,3 +1,454 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.db.models.query import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from .models import Assessment, Question, Option, AssessmentAttempt
+from .attempts import close_expired_attempts
+from . import grading
+from . import cache as assessment_cache
+from .grading import load_answer_key, get_answer_key, grade_answers
+from apps.results.models import Result, UserScore
+
+User = get_user_model()
+
+
+def clear_answer_key_caches():
+    cache.clear()
+    grading._local_answer_keys.clear()
+    assessment_cache._local_start_payloads.clear()
+
+
+def create_assessment(title='Python Básico', questions=3, options=3):
+    """Crea una evaluación donde la primera opción de cada pregunta es la correcta"""
+    assessment = Assessment.objects.create(title=title, time_limit=600)
+    for order in range(1, questions + 1):
+        question = Question.objects.create(assessment=assessment, text=f'Pregunta {order}', order=order)
+        for index in range(options):
+            Option.objects.create(question=question, text=f'Opción {index}', is_correct=index == 0)
+    return assessment
+
+
+class AnswerKeyTest(TestCase):
+    """Tests para la clave de respuestas compilada"""
+
+    def setUp(self):
+        self.assessment = create_assessment()
+        self.questions = list(self.assessment.questions.prefetch_related('options'))
+
+    def test_load_answer_key_single_query(self):
+        """Test la clave se carga con una sola consulta"""
+        with CaptureQueriesContext(connection) as context:
+            answer_key = load_answer_key(self.assessment.id)
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(answer_key.total_questions, 3)
+
+    def test_load_answer_key_missing_assessment(self):
+        """Test evaluación inexistente retorna None"""
+        self.assertIsNone(load_answer_key(999999))
+
+    def test_grade_answers(self):
+        """Test calificación de respuestas correctas e incorrectas"""
+        answer_key = load_answer_key(self.assessment.id)
+        first, second = self.questions[0], self.questions[1]
+        graded, errors = grade_answers(answer_key, [
+            {'question_id': first.id, 'option_id': first.options.all()[0].id},
+            {'question_id': second.id, 'option_id': second.options.all()[1].id},
+        ])
+        self.assertEqual(errors, [])
+        self.assertEqual([answer['is_correct'] for answer in graded], [True, False])
+
+    def test_grade_answers_rejects_foreign_option(self):
+        """Test opción de otra pregunta es rechazada"""
+        answer_key = load_answer_key(self.assessment.id)
+        first, second = self.questions[0], self.questions[1]
+        graded, errors = grade_answers(answer_key, [
+            {'question_id': first.id, 'option_id': second.options.all()[0].id},
+            {'question_id': first.id, 'option_id': first.options.all()[0].id},
+        ])
+        self.assertEqual(len(errors), 2)
+
+
+class AnswerKeyCacheTest(TestCase):
+    """Tests para la caché de claves de respuestas"""
+
+    def setUp(self):
+        clear_answer_key_caches()
+        self.assessment = create_assessment()
+        self.question = self.assessment.questions.first()
+
+    def test_warm_answer_key_touches_no_tables(self):
+        """Test con la clave en caché la calificación no consulta la base de datos"""
+        get_answer_key(self.assessment.id)
+        with CaptureQueriesContext(connection) as context:
+            answer_key = get_answer_key(self.assessment.id)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(answer_key.total_questions, 3)
+
+    def test_shared_cache_survives_process_cache_eviction(self):
+        """Test otro proceso reutiliza la clave compilada de la caché compartida"""
+        get_answer_key(self.assessment.id)
+        grading._local_answer_keys.clear()
+        with CaptureQueriesContext(connection) as context:
+            get_answer_key(self.assessment.id)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_option_change_invalidates_answer_key(self):
+        """Test cambiar la opción correcta genera una nueva versión de la clave"""
+        first, second = list(self.question.options.order_by('id')[:2])
+        self.assertTrue(get_answer_key(self.assessment.id).is_correct(self.question.id, first.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.is_correct = False
+            first.save()
+            second.is_correct = True
+            second.save()
+
+        answer_key = get_answer_key(self.assessment.id)
+        self.assertFalse(answer_key.is_correct(self.question.id, first.id))
+        self.assertTrue(answer_key.is_correct(self.question.id, second.id))
+
+    def test_new_question_invalidates_answer_key(self):
+        """Test agregar una pregunta actualiza el total de la clave"""
+        get_answer_key(self.assessment.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(assessment=self.assessment, text='Pregunta nueva', order=4)
+        self.assertEqual(get_answer_key(self.assessment.id).total_questions, 4)
+
+    def test_invalidation_bumps_version_atomically(self):
+        """Test la invalidación incrementa la versión y un lector atrasado no la revierte"""
+        version = assessment_cache.content_version(self.assessment.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(assessment=self.assessment, text='Pregunta nueva', order=4)
+        self.assertEqual(assessment_cache.content_version(self.assessment.id), version + 1)
+
+        # Un lector leyó la versión de la base de datos antes de confirmarse el cambio
+        cache.delete(assessment_cache._version_key(self.assessment.id))
+        stale = assessment_cache._load_version(self.assessment.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(assessment=self.assessment, text='Otra pregunta', order=5)
+        cache.add(assessment_cache._version_key(self.assessment.id), stale)
+        self.assertNotEqual(assessment_cache.content_version(self.assessment.id), stale)
+        self.assertEqual(get_answer_key(self.assessment.id).total_questions, 5)
+
+    def test_content_version_expires(self):
+        """Test la versión se guarda con un tiempo de vida finito"""
+        with mock.patch.object(assessment_cache.cache, 'add', wraps=cache.add) as add:
+            assessment_cache.content_version(self.assessment.id)
+        self.assertEqual(add.call_args.args[2], assessment_cache.CONTENT_VERSION_CACHE_TIMEOUT)
+
+    def test_shared_cache_is_a_deploy_check(self):
+        """Test sin caché compartida falla `check --deploy`, no la carga de la configuración"""
+        with override_settings(REQUIRE_SHARED_CACHE=True):
+            errors = checks.run_checks(include_deployment_checks=True, tags=[checks.Tags.caches])
+            self.assertIn('config.E001', [error.id for error in errors])
+            self.assertEqual(checks.run_checks(tags=[checks.Tags.caches]), [])
+        errors = checks.run_checks(include_deployment_checks=True, tags=[checks.Tags.caches])
+        self.assertNotIn('config.E001', [error.id for error in errors])
+
+    def test_deleted_assessment_has_no_answer_key(self):
+        """Test evaluación eliminada no retorna clave"""
+        get_answer_key(self.assessment.id)
+        assessment_id = self.assessment.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assessment.delete()
+        self.assertIsNone(get_answer_key(assessment_id))
+
+
+class StartAssessmentAPITest(APITestCase):
+    """Tests para el documento de inicio de la evaluación"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='candidato',
+            email='candidato@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        clear_answer_key_caches()
+        self.assessment = create_assessment()
+        self.url = f'/assessments/{self.assessment.id}/start/'
+
+    def test_start_payload_hides_correct_options(self):
+        """Test el documento no revela las opciones correctas"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data['questions']), 3)
+        for question in data['questions']:
+            self.assertEqual(len(question['options']), 3)
+            for option in question['options']:
+                self.assertNotIn('is_correct', option)
+
+    def test_start_payload_is_served_from_cache(self):
+        """Test el documento renderizado se sirve sin consultar la base de datos"""
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(self.url)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(first.content, second.content)
+
+    def test_start_payload_not_modified(self):
+        """Test If-None-Match con el ETag vigente responde 304"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_start_payload_rebuilt_after_change(self):
+        """Test cambiar una pregunta genera un nuevo documento y ETag"""
+        etag = self.client.get(self.url)['ETag']
+        question = self.assessment.questions.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            question.text = 'Pregunta actualizada'
+            question.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Pregunta actualizada', [q['text'] for q in response.json()['questions']])
+
+    def test_start_missing_assessment(self):
+        """Test evaluación inexistente"""
+        response = self.client.get('/assessments/999999/start/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SubmitAnswerSheetAPITest(APITestCase):
+    """Tests para el envío de la hoja de respuestas completa"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='candidato',
+            email='candidato@example.com',
+            password='testpass123',
+            role='aprendiz'
+        )
+        self.client.force_authenticate(user=self.user)
+        clear_answer_key_caches()
+        self.assessment = create_assessment()
+        self.questions = list(self.assessment.questions.prefetch_related('options'))
+        self.url = f'/assessments/{self.assessment.id}/submit/'
+
+    def test_submit_answer_sheet(self):
+        """Test calificación completa registra el resultado y el puntaje global"""
+        answers = [
+            {'question_id': self.questions[0].id, 'option_id': self.questions[0].options.all()[0].id},
+            {'question_id': self.questions[1].id, 'option_id': self.questions[1].options.all()[0].id},
+            {'question_id': self.questions[2].id, 'option_id': self.questions[2].options.all()[2].id},
+        ]
+        response = self.client.post(self.url, {'answers': answers, 'time_taken': 120}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['correct_answers'], 2)
+        self.assertEqual(response.data['total_questions'], 3)
+        self.assertEqual([answer['is_correct'] for answer in response.data['answers']], [True, True, False])
+
+        result = Result.objects.get(pk=response.data['result_id'])
+        self.assertEqual(result.user, self.user)
+        self.assertEqual(result.time_taken, 120)
+        self.assertAlmostEqual(result.score, 200 / 3)
+        self.assertAlmostEqual(UserScore.objects.get(user=self.user).global_score, 200 / 3)
+
+    def test_unanswered_questions_count_as_incorrect(self):
+        """Test preguntas sin responder cuentan en el total"""
+        answers = [{'question_id': self.questions[0].id, 'option_id': self.questions[0].options.all()[0].id}]
+        response = self.client.post(self.url, {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['answered_questions'], 1)
+        self.assertAlmostEqual(response.data['score'], 100 / 3)
+
+    def test_invalid_answer_sheet_is_rejected(self):
+        """Test hoja con opción inválida no registra resultado"""
+        answers = [{'question_id': self.questions[0].id, 'option_id': 999999}]
+        response = self.client.post(self.url, {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Result.objects.exists())
+
+    def test_submit_answer_sheet_missing_assessment(self):
+        """Test evaluación inexistente"""
+        answers = [{'question_id': 1, 'option_id': 1}]
+        response = self.client.post('/assessments/999999/submit/', {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_submit_single_answer(self):
+        """Test modo individual sigue funcionando"""
+        option = self.questions[0].options.all()[0]
+        response = self.client.post(
+            self.url, {'question_id': self.questions[0].id, 'option_id': option.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_correct'])
+
+
+class AssessmentAttemptAPITest(APITestCase):
+    """Tests para los intentos de evaluación con respuestas en búfer"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='candidato',
+            email='candidato@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        clear_answer_key_caches()
+        self.assessment = create_assessment()
+        self.questions = list(self.assessment.questions.prefetch_related('options'))
+
+    def start(self, expected_status=status.HTTP_201_CREATED):
+        response = self.client.post(f'/assessments/{self.assessment.id}/attempts/')
+        self.assertEqual(response.status_code, expected_status)
+        return response.data['id']
+
+    def answer(self, attempt_id, question, option_index):
+        return self.client.post(
+            f'/assessments/attempts/{attempt_id}/answer/',
+            {'question_id': question.id, 'option_id': question.options.all()[option_index].id},
+            format='json'
+        )
+
+    def test_attempt_flow(self):
+        """Test las respuestas se califican en el servidor al finalizar"""
+        attempt_id = self.start()
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.answer(attempt_id, self.questions[0], 0).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.answer(attempt_id, self.questions[1], 2).status_code, status.HTTP_200_OK)
+            # Cambiar la respuesta de la segunda pregunta
+            self.assertEqual(self.answer(attempt_id, self.questions[1], 0).status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 0)
+
+        response = self.client.post(f'/assessments/attempts/{attempt_id}/finish/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'finished')
+        self.assertEqual(response.data['correct_answers'], 2)
+        self.assertEqual(response.data['total_questions'], 3)
+        self.assertEqual(len(response.data['answers']), 2)
+
+        attempt = AssessmentAttempt.objects.get(pk=attempt_id)
+        self.assertEqual(attempt.result.user, self.user)
+        self.assertAlmostEqual(attempt.result.score, 200 / 3)
+
+    def test_start_resumes_attempt_in_progress(self):
+        """Test iniciar de nuevo retoma el intento en curso (200) en lugar de crear otro (201)"""
+        attempt_id = self.start(status.HTTP_201_CREATED)
+        self.assertEqual(self.start(status.HTTP_200_OK), attempt_id)
+        self.assertEqual(AssessmentAttempt.objects.count(), 1)
+
+    @override_settings(REQUIRE_SHARED_CACHE=True)
+    def test_start_refused_without_shared_cache(self):
+        """Test no se inician intentos si se exige una caché compartida y la caché es local"""
+        response = self.client.post(f'/assessments/{self.assessment.id}/attempts/')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('error', response.data)
+        self.assertFalse(AssessmentAttempt.objects.exists())
+
+    def test_answer_rejected_after_time_limit(self):
+        """Test no se aceptan respuestas después del tiempo límite"""
+        attempt_id = self.start()
+        with mock.patch('apps.assessments.attempts.timezone.now', return_value=timezone.now() + timedelta(hours=1)):
+            response = self.answer(attempt_id, self.questions[0], 0)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_option_rejected(self):
+        """Test opción que no pertenece a la pregunta"""
+        attempt_id = self.start()
+        response = self.client.post(
+            f'/assessments/attempts/{attempt_id}/answer/',
+            {'question_id': self.questions[0].id, 'option_id': self.questions[1].options.all()[0].id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finish_twice(self):
+        """Test un intento solo se finaliza una vez"""
+        attempt_id = self.start()
+        self.client.post(f'/assessments/attempts/{attempt_id}/finish/')
+        response = self.client.post(f'/assessments/attempts/{attempt_id}/finish/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_user_attempt_not_found(self):
+        """Test un usuario no puede responder el intento de otro"""
+        attempt_id = self.start()
+        other = User.objects.create_user(username='otro', email='otro@example.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.answer(attempt_id, self.questions[0], 0).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(f'/assessments/attempts/{attempt_id}/finish/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_close_expired_attempts(self):
+        """Test los intentos abandonados se cierran con las respuestas registradas"""
+        attempt_id = self.start()
+        self.answer(attempt_id, self.questions[0], 0)
+
+        closed = close_expired_attempts(now=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(closed, 1)
+        attempt = AssessmentAttempt.objects.get(pk=attempt_id)
+        self.assertEqual(attempt.status, 'expired')
+        self.assertEqual(attempt.result.correct_answers, 1)
+        self.assertEqual(attempt.result.time_taken, self.assessment.time_limit)
+
+
+class ConcurrentSubmitTest(TransactionTestCase):
+    """Tests de concurrencia para el envío de respuestas"""
+    submitters = 6
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                username=f'candidato{index}',
+                email=f'candidato{index}@example.com',
+                password='testpass123'
+            )
+            for index in range(self.submitters)
+        ]
+        clear_answer_key_caches()
+        self.assessment = create_assessment()
+        self.question = self.assessment.questions.first()
+        self.option = self.question.options.first()
+
+    def test_parallel_submitters_do_not_queue(self):
+        """Test N candidatos califican a la vez sin esperar un bloqueo de la evaluación"""
+        # Cada petición espera en la barrera mientras califica: si las peticiones
+        # se serializaran detrás de un bloqueo, la barrera nunca se completaría.
+        barrier = threading.Barrier(self.submitters, timeout=10)
+        original_get = grading.get_answer_key
+        responses = []
+
+        def load_and_wait(assessment_id):
+            answer_key = original_get(assessment_id)
+            barrier.wait()
+            return answer_key
+
+        def submit(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                responses.append(client.post(
+                    f'/assessments/{self.assessment.id}/submit/',
+                    {'question_id': self.question.id, 'option_id': self.option.id},
+                    format='json'
+                ))
+            finally:
+                connection.close()
+
+        with mock.patch('apps.assessments.views.get_answer_key', side_effect=load_and_wait), \
+                mock.patch.object(QuerySet, 'select_for_update', side_effect=AssertionError('bloqueo de fila')):
+            threads = [threading.Thread(target=submit, args=(user,)) for user in self.users]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertFalse(barrier.broken)
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_200_OK] * self.submitters)
@@ -6,7 +6,11 @@ from .views import (
     SubmitAssessmentView, 
     QuestionCreateView,
     QuestionListView,
-    QuestionDetailView
+    QuestionDetailView,
+    StartAttemptView,
+    AttemptDetailView,
+    AttemptAnswerView,
+    FinishAttemptView
 )
 
 urlpatterns = [
@@ -18,6 +22,12 @@ urlpatterns = [
     path('<int:pk>/start/', StartAssessmentView.as_view(), name='assessment-start'),
     path('<int:pk>/submit/', SubmitAssessmentView.as_view(), name='assessment-submit'),
     
+    # Intentos de evaluación
+    path('<int:pk>/attempts/', StartAttemptView.as_view(), name='attempt-start'),
+    path('attempts/<int:attempt_id>/', AttemptDetailView.as_view(), name='attempt-detail'),
+    path('attempts/<int:attempt_id>/answer/', AttemptAnswerView.as_view(), name='attempt-answer'),
+    path('attempts/<int:attempt_id>/finish/', FinishAttemptView.as_view(), name='attempt-finish'),
+    
     # CRUD de Questions
     path('<int:pk>/questions/', QuestionListView.as_view(), name='question-list'),
     path('<int:pk>/questions/create/', QuestionCreateView.as_view(), name='question-create'),
@@ -2,21 +2,28 @@ from rest_framework.response import Response
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import swagger_auto_schema, no_body
 from drf_yasg import openapi
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 
-from .models import Assessment, Question, Option
+from .models import Assessment, Question, AssessmentAttempt
 from .serializers import (
     AssessmentSerializer, 
     AssessmentCreateSerializer,
     SubmitAnswersSerializer,
+    SubmitAnswerSheetSerializer,
+    CandidateAssessmentSerializer,
+    AssessmentAttemptSerializer,
     QuestionCreateSerializer,
     QuestionSerializer
 )
 from .filters import AssessmentFilter, QuestionFilter
+from .grading import get_answer_key, grade_answers, record_result
+from .cache import get_start_payload
+from .attempts import AttemptError, start_attempt, get_attempt_state, record_answer, finish_attempt
 from apps.users.permissions import IsAdminOrEmpresaOrReadOnly, CanManageAssessments
 
 # ==================== CRUD DE ASSESSMENTS ====================
@@ -351,37 +358,69 @@ class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ==================== ENDPOINTS ESPECIALES ====================
 
-class StartAssessmentView(generics.RetrieveAPIView):
+class StartAssessmentView(APIView):
     """
     Start an assessment - get all questions and options.
+    The candidate payload is rendered once per content version and served
+    from cache; it never includes which option is correct.
     All authenticated users can start assessments.
     """
-    queryset = Assessment.objects.all()
-    serializer_class = AssessmentSerializer
     permission_classes = [IsAuthenticated]
-    lookup_field = 'pk'
     
     @swagger_auto_schema(
-        operation_description="Iniciar una evaluación - obtiene todas sus preguntas y opciones",
-        responses={200: AssessmentSerializer}
+        operation_description="""Iniciar una evaluación - obtiene todas sus preguntas y opciones.
+        
+        La respuesta incluye el encabezado `ETag`; si se envía `If-None-Match` con
+        ese valor y la evaluación no ha cambiado, se responde 304 sin contenido.
+        """,
+        responses={
+            200: CandidateAssessmentSerializer,
+            304: openapi.Response(description="La evaluación no ha cambiado"),
+            404: openapi.Response(description="Evaluación no encontrada"),
+        }
     )
-    def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+    def get(self, request, pk):
+        start_payload = get_start_payload(pk)
+        if start_payload is None:
+            return Response(
+                {"error": f"Evaluación con id {pk} no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        etag, payload = start_payload
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(payload, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class SubmitAssessmentView(APIView):
     """
-    Submit an answer to an assessment question.
+    Submit answers to an assessment.
+    - Single answer: {"question_id", "option_id"} returns its correctness.
+    - Answer sheet: {"answers": [...], "time_taken"} grades the whole attempt
+      and stores the Result.
     All authenticated users can submit answers.
     """
     permission_classes = [IsAuthenticated]
     
     @swagger_auto_schema(
-        operation_description="Enviar una respuesta a una pregunta de la evaluación",
-        request_body=SubmitAnswersSerializer,
+        operation_description="""Enviar respuestas de la evaluación.
+        
+        **Modo individual:** enviar `question_id` y `option_id` para conocer si la respuesta es correcta.
+        
+        **Modo hoja completa:** enviar `answers` (lista de `question_id`/`option_id`) y `time_taken`.
+        Se califica toda la evaluación en una sola consulta, se registra el resultado y se
+        actualiza el puntaje global del usuario. Las preguntas sin responder cuentan como incorrectas.
+        """,
+        request_body=SubmitAnswerSheetSerializer,
         responses={
             200: openapi.Response(
-                description="Respuesta procesada correctamente",
+                description="Respuesta procesada correctamente (modo individual)",
                 schema=openapi.Schema(
                     type=openapi.TYPE_OBJECT,
                     properties={
@@ -393,58 +432,256 @@ class SubmitAssessmentView(APIView):
                     }
                 )
             ),
+            201: openapi.Response(
+                description="Evaluación calificada y resultado registrado (modo hoja completa)",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'assessment_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'result_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'score': openapi.Schema(type=openapi.TYPE_NUMBER),
+                        'correct_answers': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'total_questions': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'answered_questions': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'answers': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                        ),
+                    }
+                )
+            ),
             400: openapi.Response(description="Error en la validación de datos"),
             404: openapi.Response(description="Evaluación, pregunta u opción no encontrada"),
         }
     )
     def post(self, request, pk):
+        if 'answers' in request.data:
+            return self.submit_answer_sheet(request, pk)
+        
         serializer = SubmitAnswersSerializer(data=request.data)
         
         if serializer.is_valid():
-            # Atomic transaction to ensure data integrity
-            with transaction.atomic():
-                question_id = serializer.validated_data.get("question_id")
-                option_id = serializer.validated_data.get("option_id")
-                
-                # Validar que la evaluación existe
-                try:
-                    assessment = Assessment.objects.select_for_update().get(pk=pk)
-                except Assessment.DoesNotExist:
-                    return Response(
-                        {"error": f"Evaluación con id {pk} no encontrada"},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Validar que la pregunta existe y pertenece a la evaluación
-                try:
-                    question = Question.objects.get(id=question_id, assessment=assessment)
-                except Question.DoesNotExist:
-                    return Response(
-                        {"error": f"Pregunta con id {question_id} no encontrada en esta evaluación"},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Validar que la opción existe y pertenece a la pregunta
-                try:
-                    option = Option.objects.get(id=option_id, question=question)
-                except Option.DoesNotExist:
-                    return Response(
-                        {"error": f"Opción con id {option_id} no encontrada para esta pregunta"},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Verificar si la respuesta es correcta
-                is_correct = option.is_correct
-                
-                result = {
-                    "message": "Respuesta recibida y procesada correctamente",
-                    "assessment_id": pk,
-                    "question_id": question_id,
-                    "option_id": option_id,
-                    "is_correct": is_correct,
-                }
-                
-                return Response(result, status=status.HTTP_200_OK)
+            question_id = serializer.validated_data.get("question_id")
+            option_id = serializer.validated_data.get("option_id")
+            
+            # La calificación es de solo lectura: no se bloquea la evaluación,
+            # así los candidatos que la presentan a la vez no se esperan entre sí
+            answer_key = get_answer_key(pk)
+            if answer_key is None:
+                return Response(
+                    {"error": f"Evaluación con id {pk} no encontrada"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            # Validar que la pregunta existe y pertenece a la evaluación
+            if not answer_key.has_question(question_id):
+                return Response(
+                    {"error": f"Pregunta con id {question_id} no encontrada en esta evaluación"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            # Validar que la opción existe y pertenece a la pregunta
+            if not answer_key.has_option(question_id, option_id):
+                return Response(
+                    {"error": f"Opción con id {option_id} no encontrada para esta pregunta"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            result = {
+                "message": "Respuesta recibida y procesada correctamente",
+                "assessment_id": pk,
+                "question_id": question_id,
+                "option_id": option_id,
+                "is_correct": answer_key.is_correct(question_id, option_id),
+            }
+            
+            return Response(result, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def submit_answer_sheet(self, request, pk):
+        """Califica la hoja de respuestas completa y registra el resultado"""
+        serializer = SubmitAnswerSheetSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        answer_key = get_answer_key(pk)
+        if answer_key is None:
+            return Response(
+                {"error": f"Evaluación con id {pk} no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        graded, errors = grade_answers(answer_key, serializer.validated_data['answers'])
+        if errors:
+            return Response({"answers": errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = record_result(
+            request.user.id, answer_key, graded, serializer.validated_data['time_taken']
+        )
+        
+        return Response({
+            "message": "Evaluación calificada correctamente",
+            "assessment_id": pk,
+            "result_id": result.id,
+            "score": result.score,
+            "correct_answers": result.correct_answers,
+            "total_questions": result.total_questions,
+            "answered_questions": len(graded),
+            "answers": graded,
+        }, status=status.HTTP_201_CREATED)
+
 
+# ==================== INTENTOS DE EVALUACIÓN ====================
+
+class StartAttemptView(APIView):
+    """
+    Start (or resume) an attempt for an assessment.
+    The attempt expires after the assessment time limit.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description="""Iniciar un intento de la evaluación.
+        
+        Si el usuario tiene un intento en curso para esta evaluación, se retoma (200);
+        si no, se crea uno nuevo (201).
+        El intento vence cuando se cumple el tiempo límite de la evaluación.
+        """,
+        request_body=no_body,
+        responses={
+            200: AssessmentAttemptSerializer,
+            201: AssessmentAttemptSerializer,
+            404: openapi.Response(description="Evaluación no encontrada"),
+            503: openapi.Response(description="No hay una caché compartida configurada"),
+        }
+    )
+    def post(self, request, pk):
+        try:
+            attempt, created = start_attempt(request.user, pk)
+        except AttemptError as error:
+            return Response({"error": str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if attempt is None:
+            return Response(
+                {"error": f"Evaluación con id {pk} no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(
+            AssessmentAttemptSerializer(attempt).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class AttemptDetailView(APIView):
+    """
+    Retrieve an attempt.
+    - Admin/Empresa: any attempt
+    - Aprendiz: only their own attempts
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description="Obtener el estado de un intento",
+        responses={
+            200: AssessmentAttemptSerializer,
+            404: openapi.Response(description="Intento no encontrado"),
+        }
+    )
+    def get(self, request, attempt_id):
+        attempts = AssessmentAttempt.objects.select_related('assessment')
+        if request.user.role not in ['admin', 'empresa']:
+            attempts = attempts.filter(user=request.user)
+        attempt = attempts.filter(pk=attempt_id).first()
+        if attempt is None:
+            return Response(
+                {"error": f"Intento con id {attempt_id} no encontrado"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(AssessmentAttemptSerializer(attempt).data)
+
+
+class AttemptAnswerView(APIView):
+    """
+    Record an answer for an attempt in progress.
+    Answers are stored per question and graded when the attempt finishes.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description="""Registrar la respuesta de una pregunta durante el intento.
+        
+        Se puede cambiar la respuesta de una pregunta enviándola de nuevo.
+        La calificación se informa al finalizar el intento.
+        """,
+        request_body=SubmitAnswersSerializer,
+        responses={
+            200: openapi.Response(description="Respuesta registrada"),
+            400: openapi.Response(description="Respuesta inválida o intento finalizado"),
+            404: openapi.Response(description="Intento no encontrado"),
+        }
+    )
+    def post(self, request, attempt_id):
+        serializer = SubmitAnswersSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        state = get_attempt_state(attempt_id)
+        if state is None or state['user_id'] != request.user.id:
+            return Response(
+                {"error": f"Intento con id {attempt_id} no encontrado"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        question_id = serializer.validated_data['question_id']
+        option_id = serializer.validated_data['option_id']
+        try:
+            record_answer(state, question_id, option_id)
+        except AttemptError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            "message": "Respuesta registrada",
+            "attempt_id": attempt_id,
+            "question_id": question_id,
+            "option_id": option_id,
+        })
+
+
+class FinishAttemptView(APIView):
+    """
+    Finish an attempt: grade the recorded answers on the server and store the Result.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description="""Finalizar el intento.
+        
+        Las respuestas registradas se califican en el servidor, se guarda el resultado
+        y se actualiza el puntaje global. Si el tiempo límite ya pasó, el intento queda
+        como expirado con las respuestas registradas antes del vencimiento.
+        """,
+        request_body=no_body,
+        responses={
+            201: AssessmentAttemptSerializer,
+            400: openapi.Response(description="El intento ya fue finalizado"),
+            404: openapi.Response(description="Intento no encontrado"),
+        }
+    )
+    def post(self, request, attempt_id):
+        try:
+            attempt = finish_attempt(attempt_id, request.user)
+        except AttemptError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if attempt is None:
+            return Response(
+                {"error": f"Intento con id {attempt_id} no encontrado"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        data = AssessmentAttemptSerializer(attempt).data
+        data['score'] = attempt.result.score
+        data['correct_answers'] = attempt.result.correct_answers
+        data['total_questions'] = attempt.result.total_questions
+        return Response(data, status=status.HTTP_201_CREATED)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Certification
+from .models import Certification, CertificateRevocation, CertificationBatch, CertificationSummary
 
 
 @admin.register(Certification)
@@ -21,3 +21,27 @@ class CertificationAdmin(admin.ModelAdmin):
             'fields': ('status', 'issued_at', 'expires_at', 'updated_at')
         }),
     )
+
+
+@admin.register(CertificationBatch)
+class CertificationBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'organization', 'team', 'status', 'processed_users', 'total_users', 'created_count', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('title',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(CertificateRevocation)
+class CertificateRevocationAdmin(admin.ModelAdmin):
+    list_display = ('certificate_id', 'reason', 'revoked_at')
+    list_filter = ('reason',)
+    search_fields = ('certificate_id',)
+    readonly_fields = ('revoked_at',)
+
+
+@admin.register(CertificationSummary)
+class CertificationSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_certifications', 'active_certifications', 'highest_level', 'average_score', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('updated_at',)
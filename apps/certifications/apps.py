@@ -5,3 +5,6 @@ class CertificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.certifications'
     verbose_name = 'Certificaciones'
+
+    def ready(self):
+        from . import signals  # noqa: F401
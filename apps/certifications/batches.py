@@ -0,0 +1,164 @@
+"""
+Generación masiva de certificaciones.
+
+Los agregados de Result de todos los usuarios del lote se calculan con un
+solo GROUP BY; el nivel se calcula en memoria y las certificaciones se
+insertan con bulk_create por bloques, actualizando el progreso del lote
+después de cada bloque. El lote se ejecuta en un hilo en segundo plano
+(o con el comando run_certification_batch).
+
+El hilo no sobrevive a un reinicio del proceso: cada bloque actualiza
+heartbeat_at, y el comando recover_certification_batches (programado, p. ej.
+con cron) reanuda los lotes en cola o en proceso sin señal de vida durante
+BATCH_STALE_AFTER.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import Certification, CertificationBatch, CertificationSummary
+from apps.organizations.models import Team
+from apps.results.models import Result
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Usuarios por bloque de inserción (y de actualización del progreso)
+BATCH_CHUNK_SIZE = 500
+
+# Tiempo sin señal de vida tras el cual un lote en cola o en proceso se considera abandonado
+BATCH_STALE_AFTER = timedelta(minutes=10)
+
+
+def batch_user_ids(batch):
+    """Usuarios destinatarios del lote, sin repetidos y en orden"""
+    if batch.team_id:
+        memberships = Team.members.through.objects.filter(team_id=batch.team_id)
+    elif batch.organization_id:
+        memberships = Team.members.through.objects.filter(team__organization_id=batch.organization_id)
+    else:
+        return list(User.objects.filter(id__in=batch.user_ids).order_by('id').values_list('id', flat=True))
+    return list(memberships.order_by('user_id').values_list('user_id', flat=True).distinct())
+
+
+def run_batch(batch_id):
+    """Procesa el lote. Se puede volver a ejecutar: omite usuarios ya certificados por este lote."""
+    batch = CertificationBatch.objects.get(pk=batch_id)
+    batch.status = 'running'
+    batch.started_at = batch.heartbeat_at = timezone.now()
+    batch.error = ''
+    batch.save(update_fields=['status', 'started_at', 'heartbeat_at', 'error'])
+
+    try:
+        user_ids = batch_user_ids(batch)
+        already_certified = set(batch.certifications.values_list('user_id', flat=True))
+
+        stats = {
+            row['user_id']: row
+            for row in Result.objects.filter(user_id__in=user_ids)
+            .order_by()
+            .values('user_id')
+            .annotate(avg_score=Avg('score'), total_assessments=Count('id'))
+        }
+
+        batch.total_users = len(user_ids)
+        batch.processed_users = batch.created_count = batch.skipped_count = 0
+        batch.save(update_fields=['total_users', 'processed_users', 'created_count', 'skipped_count'])
+
+        for start in range(0, len(user_ids), BATCH_CHUNK_SIZE):
+            chunk = user_ids[start:start + BATCH_CHUNK_SIZE]
+            certifications = []
+            for user_id in chunk:
+                if user_id in already_certified:
+                    continue
+                row = stats.get(user_id)
+                if row is None:
+                    batch.skipped_count += 1
+                    continue
+                certification = Certification(
+                    user_id=user_id,
+                    batch=batch,
+                    title=batch.title,
+                    description=batch.description or '',
+                    total_score=row['avg_score'] or 0,
+                    assessments_completed=row['total_assessments'],
+                    evidence_links=batch.evidence_links or '',
+                    expires_at=batch.expires_at,
+                )
+                certification.calculate_level()
+                certifications.append(certification)
+
+            with transaction.atomic():
+                Certification.objects.bulk_create(certifications)
+                # bulk_create no dispara señales
+                CertificationSummary.refresh([certification.user_id for certification in certifications])
+                batch.processed_users += len(chunk)
+                batch.created_count += len(certifications)
+                batch.heartbeat_at = timezone.now()
+                batch.save(update_fields=['processed_users', 'created_count', 'skipped_count', 'heartbeat_at'])
+
+        batch.created_count = batch.certifications.count()
+        batch.status = 'completed'
+    except Exception as exc:
+        logger.exception("Falló el lote de certificación %s", batch_id)
+        batch.status = 'failed'
+        batch.error = str(exc)
+    batch.finished_at = timezone.now()
+    batch.save(update_fields=['status', 'error', 'created_count', 'finished_at'])
+    return batch
+
+
+def _run_in_thread(batch_id):
+    close_old_connections()
+    try:
+        run_batch(batch_id)
+    finally:
+        connection.close()
+
+
+def start_batch(batch):
+    """
+    Encola el lote al confirmar la transacción. Con CERTIFICATION_BATCHES_ASYNC
+    desactivado se ejecuta en la misma petición.
+    """
+    def start():
+        if getattr(settings, 'CERTIFICATION_BATCHES_ASYNC', True):
+            threading.Thread(target=_run_in_thread, args=(batch.id,), daemon=True).start()
+        else:
+            run_batch(batch.id)
+
+    transaction.on_commit(start)
+
+
+def stale_batches(now=None):
+    """Lotes en cola o en proceso sin señal de vida durante BATCH_STALE_AFTER"""
+    limit = (now or timezone.now()) - BATCH_STALE_AFTER
+    return CertificationBatch.objects.filter(
+        Q(status='running', heartbeat_at__lt=limit)
+        | Q(status='running', heartbeat_at__isnull=True, started_at__lt=limit)
+        | Q(status='queued', created_at__lt=limit)
+    )
+
+
+def recover_stale_batches(now=None):
+    """
+    Reanuda en primer plano los lotes abandonados (p. ej. por un reinicio).
+    Cada lote se reclama con un UPDATE condicional, para que dos ejecuciones
+    simultáneas no procesen el mismo. Retorna los lotes reanudados.
+    """
+    now = now or timezone.now()
+    recovered = []
+    for batch_id in stale_batches(now).order_by('created_at').values_list('id', flat=True):
+        claimed = stale_batches(now).filter(pk=batch_id).update(status='running', heartbeat_at=timezone.now())
+        if not claimed:
+            continue
+        logger.warning("Reanudando el lote de certificación abandonado %s", batch_id)
+        recovered.append(run_batch(batch_id))
+    return recovered
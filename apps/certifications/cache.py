@@ -0,0 +1,22 @@
+"""
+Caché de la verificación de certificados.
+
+Las entradas tienen un tiempo de vida corto y se invalidan desde las señales de
+Certification, una vez confirmada la transacción, cuando cambia el estado o la
+fecha de expiración (o se elimina la certificación).
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+# Tiempo de vida de una verificación en la caché (segundos)
+VERIFICATION_CACHE_TIMEOUT = 60
+
+
+def verification_cache_key(certificate_id):
+    return f'certifications:verify:{certificate_id}'
+
+
+def invalidate_verifications(*certificate_ids):
+    """Descarta las verificaciones en caché al confirmar la transacción"""
+    keys = [verification_cache_key(certificate_id) for certificate_id in certificate_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
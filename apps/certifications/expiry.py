@@ -0,0 +1,75 @@
+"""
+Expiración de certificaciones.
+
+`expires_at` no cambia el estado por sí solo: este barrido pasa a 'expired' las
+certificaciones activas vencidas, para que los filtros por estado (y el índice
+status/-issued_at) sean correctos. Recorre el índice (status, expires_at) en
+orden (expires_at, pk), por bloques con paginación por llave sobre ese par, y
+actualiza cada bloque con un solo UPDATE (y los resúmenes por usuario de ese
+bloque).
+
+También elimina de la lista de revocación las entradas 'superseded' cuyos
+tokens reemplazados ya expiraron: esos tokens se rechazan por su propia fecha
+de expiración firmada, así que la entrada ya no hace falta.
+Se ejecuta periódicamente con el comando expire_certifications.
+"""
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import invalidate_verifications
+from .models import Certification, CertificateRevocation, CertificationSummary
+from .tokens import invalidate_revocations
+
+logger = logging.getLogger(__name__)
+
+# Certificaciones por bloque de actualización
+EXPIRY_BATCH_SIZE = 1000
+
+
+def expire_certifications(now=None, batch_size=None):
+    """
+    Marca como expiradas las certificaciones activas con expires_at vencido.
+    Retorna la cantidad de certificaciones actualizadas.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or EXPIRY_BATCH_SIZE
+    started = time.monotonic()
+    expired = 0
+
+    due = Certification.objects.filter(status='active', expires_at__lt=now)
+    pending = due
+    while True:
+        rows = list(
+            pending.order_by('expires_at', 'pk')
+            .values_list('expires_at', 'pk', 'certificate_id', 'user_id')[:batch_size]
+        )
+        if not rows:
+            break
+        with transaction.atomic():
+            expired += Certification.objects.filter(
+                pk__in=[pk for _, pk, _, _ in rows], status='active'
+            ).update(status='expired', updated_at=now)
+            CertificationSummary.refresh({user_id for _, _, _, user_id in rows})
+            invalidate_verifications(*(certificate_id for _, _, certificate_id, _ in rows))
+        if len(rows) < batch_size:
+            break
+        last_expires_at, last_pk = rows[-1][:2]
+        pending = due.filter(
+            Q(expires_at__gt=last_expires_at) | Q(expires_at=last_expires_at, pk__gt=last_pk)
+        )
+
+    with transaction.atomic():
+        purged, _ = CertificateRevocation.objects.filter(reason='superseded', expires_at__lt=now).delete()
+        if purged:
+            invalidate_revocations()
+
+    duration_ms = (time.monotonic() - started) * 1000
+    logger.info(
+        "certifications.expired count=%d purged_revocations=%d duration_ms=%.1f", expired, purged, duration_ms,
+        extra={'expired_count': expired, 'purged_revocations': purged, 'duration_ms': duration_ms}
+    )
+    return expired
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.certifications.expiry import expire_certifications
+
+
+class Command(BaseCommand):
+    help = "Marca como expiradas las certificaciones activas vencidas (ejecutar periódicamente, p. ej. con cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Certificaciones por bloque de actualización"
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        expired = expire_certifications(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Certificaciones expiradas: {expired} ({time.monotonic() - started:.2f}s)"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.certifications.batches import recover_stale_batches
+
+
+class Command(BaseCommand):
+    help = "Reanuda los lotes de certificación abandonados (ejecutar periódicamente, p. ej. con cron)"
+
+    def handle(self, *args, **options):
+        recovered = recover_stale_batches()
+        for batch in recovered:
+            self.stdout.write(f"Lote {batch.id}: {batch.get_status_display()}")
+        self.stdout.write(self.style.SUCCESS(f"Lotes reanudados: {len(recovered)}"))
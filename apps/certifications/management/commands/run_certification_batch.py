@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.certifications.batches import run_batch
+from apps.certifications.models import CertificationBatch
+
+
+class Command(BaseCommand):
+    help = "Procesa (o reanuda) un lote de certificaciones en primer plano"
+
+    def add_arguments(self, parser):
+        parser.add_argument('batch_id', type=int)
+
+    def handle(self, *args, **options):
+        if not CertificationBatch.objects.filter(pk=options['batch_id']).exists():
+            raise CommandError(f"Lote {options['batch_id']} no encontrado")
+        batch = run_batch(options['batch_id'])
+        if batch.status == 'failed':
+            raise CommandError(f"El lote falló: {batch.error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Lote {batch.id}: {batch.created_count} certificaciones, {batch.skipped_count} usuarios sin resultados"
+        ))
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-17 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0001_initial'),
+        ('organizations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_ids', models.JSONField(blank=True, default=list, help_text='Usuarios explícitos del lote')),
+                ('title', models.CharField(help_text='Título de la certificación', max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('evidence_links', models.TextField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'En proceso'), ('completed', 'Completado'), ('failed', 'Fallido')], default='queued', max_length=20)),
+                ('total_users', models.IntegerField(default=0)),
+                ('processed_users', models.IntegerField(default=0)),
+                ('created_count', models.IntegerField(default=0, help_text='Certificaciones emitidas')),
+                ('skipped_count', models.IntegerField(default=0, help_text='Usuarios sin resultados')),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='certification_batches', to=settings.AUTH_USER_MODEL)),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='certification_batches', to='organizations.organization')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='certification_batches', to='organizations.team')),
+            ],
+            options={
+                'verbose_name': 'Lote de Certificación',
+                'verbose_name_plural': 'Lotes de Certificación',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='certification',
+            name='batch',
+            field=models.ForeignKey(blank=True, help_text='Lote de generación masiva', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='certifications', to='certifications.certificationbatch'),
+        ),
+    ]
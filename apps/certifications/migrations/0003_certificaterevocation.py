@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 20:30
+
+from django.db import migrations, models
+
+
+def revoke_existing(apps, schema_editor):
+    Certification = apps.get_model('certifications', 'Certification')
+    CertificateRevocation = apps.get_model('certifications', 'CertificateRevocation')
+    CertificateRevocation.objects.bulk_create([
+        CertificateRevocation(certificate_id=certificate_id, reason='revoked')
+        for certificate_id in Certification.objects.filter(status='revoked').values_list('certificate_id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0002_certificationbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRevocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certificate_id', models.UUIDField(unique=True)),
+                ('reason', models.CharField(choices=[('revoked', 'Revocada'), ('suspended', 'Suspendida'), ('expired', 'Expirada'), ('deleted', 'Eliminada')], default='revoked', max_length=20)),
+                ('revoked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Revocación de Certificado',
+                'verbose_name_plural': 'Revocaciones de Certificados',
+                'ordering': ['-revoked_at'],
+            },
+        ),
+        migrations.RunPython(revoke_existing, migrations.RunPython.noop),
+    ]
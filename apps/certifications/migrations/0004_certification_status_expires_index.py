@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-17 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0003_certificaterevocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certification',
+            index=models.Index(fields=['status', 'expires_at'], name='certificati_status_443814_idx'),
+        ),
+    ]
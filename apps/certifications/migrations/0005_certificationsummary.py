@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-17 12:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Q
+
+
+def build_summaries(apps, schema_editor):
+    Certification = apps.get_model('certifications', 'Certification')
+    CertificationSummary = apps.get_model('certifications', 'CertificationSummary')
+    rows = (
+        Certification.objects.order_by()
+        .values('user_id')
+        .annotate(
+            total_certifications=Count('id'),
+            active_certifications=Count('id', filter=Q(status='active')),
+            pending_certifications=Count('id', filter=Q(status='pending')),
+            expired_certifications=Count('id', filter=Q(status='expired')),
+            revoked_certifications=Count('id', filter=Q(status='revoked')),
+            highest_level=Max('level', filter=Q(status='active')),
+            average_score=Avg('total_score'),
+        )
+    )
+    summaries = []
+    for row in rows:
+        row['highest_level'] = row['highest_level'] or 0
+        row['average_score'] = round(row['average_score'] or 0, 2)
+        summaries.append(CertificationSummary(**row))
+    CertificationSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0004_certification_status_expires_index'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificationSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='certification_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_certifications', models.PositiveIntegerField(default=0)),
+                ('active_certifications', models.PositiveIntegerField(default=0)),
+                ('pending_certifications', models.PositiveIntegerField(default=0)),
+                ('expired_certifications', models.PositiveIntegerField(default=0)),
+                ('revoked_certifications', models.PositiveIntegerField(default=0)),
+                ('highest_level', models.IntegerField(default=0, help_text='Nivel más alto entre las certificaciones activas')),
+                ('average_score', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Certificaciones',
+                'verbose_name_plural': 'Resúmenes de Certificaciones',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0005_certificationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificaterevocation',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='certification',
+            name='token_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='certificaterevocation',
+            name='reason',
+            field=models.CharField(choices=[('revoked', 'Revocada'), ('suspended', 'Suspendida'), ('expired', 'Expirada'), ('deleted', 'Eliminada'), ('superseded', 'Reemplazada')], default='revoked', max_length=20),
+        ),
+    ]
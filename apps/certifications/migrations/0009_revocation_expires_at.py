@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0008_certificationbatch_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificaterevocation',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='certificaterevocation',
+            index=models.Index(fields=['reason', 'expires_at'], name='certificati_reason_2b3bd5_idx'),
+        ),
+    ]
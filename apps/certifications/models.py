@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Avg, Count, Max, Q
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 
@@ -59,10 +61,22 @@ class Certification(models.Model):
     # Estado de la certificación
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     
+    # Lote que generó la certificación (generación masiva)
+    batch = models.ForeignKey(
+        'CertificationBatch', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='certifications', help_text="Lote de generación masiva"
+    )
+    
     # Fechas
     issued_at = models.DateTimeField(auto_now_add=True, help_text="Fecha de emisión")
     expires_at = models.DateTimeField(null=True, blank=True, help_text="Fecha de expiración")
     updated_at = models.DateTimeField(auto_now=True)
+    
+    # Versión del token firmado; aumenta al cambiar un dato firmado y deja sin efecto los tokens anteriores
+    token_version = models.PositiveIntegerField(default=1, editable=False)
+    
+    # Campos incluidos en el token firmado (apps.certifications.tokens)
+    SIGNED_FIELDS = ('user_id', 'level', 'total_score', 'issued_at', 'expires_at')
 
     class Meta:
         ordering = ['-issued_at']
@@ -71,12 +85,38 @@ class Certification(models.Model):
         indexes = [
             models.Index(fields=['user', '-issued_at']),
             models.Index(fields=['status', '-issued_at']),
+            models.Index(fields=['status', 'expires_at']),
             models.Index(fields=['level', '-total_score']),
+            models.Index(fields=['-issued_at', '-id']),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username} (Nivel {self.level})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado y expiración cargados, para detectar revocaciones e invalidar la caché al guardar
+        loaded = dict(zip(field_names, values))
+        instance._loaded_status = loaded.get('status')
+        instance._loaded_expires_at = loaded.get('expires_at')
+        instance._loaded_token_version = loaded.get('token_version')
+        if all(field in loaded for field in cls.SIGNED_FIELDS):
+            instance._loaded_claims = tuple(loaded[field] for field in cls.SIGNED_FIELDS)
+        return instance
+    
+    def signed_claims(self):
+        return tuple(getattr(self, field) for field in self.SIGNED_FIELDS)
+    
+    def save(self, *args, **kwargs):
+        # Si cambió un dato firmado (o no se sabe cuál tenía), los tokens emitidos dejan de valer
+        if not self._state.adding and getattr(self, '_loaded_claims', None) != self.signed_claims():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+    
     def calculate_level(self):
         """Calcula el nivel basado en el puntaje total"""
         if self.total_score >= 90:
@@ -101,3 +141,199 @@ class Certification(models.Model):
         if self.expires_at and self.expires_at < timezone.now():
             return False
         return True
+
+
+
+class CertificationSummary(models.Model):
+    """
+    Resumen materializado de las certificaciones de un usuario.
+    Se recalcula en cada escritura de sus certificaciones, para servir las
+    estadísticas desde una sola fila.
+    """
+    
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='certification_summary'
+    )
+    total_certifications = models.PositiveIntegerField(default=0)
+    active_certifications = models.PositiveIntegerField(default=0)
+    pending_certifications = models.PositiveIntegerField(default=0)
+    expired_certifications = models.PositiveIntegerField(default=0)
+    revoked_certifications = models.PositiveIntegerField(default=0)
+    highest_level = models.IntegerField(default=0, help_text="Nivel más alto entre las certificaciones activas")
+    average_score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STAT_FIELDS = [
+        'total_certifications', 'active_certifications', 'pending_certifications',
+        'expired_certifications', 'revoked_certifications', 'highest_level', 'average_score',
+    ]
+
+    class Meta:
+        verbose_name = 'Resumen de Certificaciones'
+        verbose_name_plural = 'Resúmenes de Certificaciones'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.total_certifications} certificaciones"
+
+    @classmethod
+    def compute(cls, user_ids):
+        """
+        Calcula las estadísticas con un solo GROUP BY con agregados condicionales.
+        Retorna {user_id: estadísticas}; los usuarios sin certificaciones llevan ceros.
+        """
+        stats = {user_id: cls.empty_stats() for user_id in user_ids}
+        rows = (
+            Certification.objects.filter(user_id__in=user_ids)
+            .order_by()
+            .values('user_id')
+            .annotate(
+                total_certifications=Count('id'),
+                active_certifications=Count('id', filter=Q(status='active')),
+                pending_certifications=Count('id', filter=Q(status='pending')),
+                expired_certifications=Count('id', filter=Q(status='expired')),
+                revoked_certifications=Count('id', filter=Q(status='revoked')),
+                highest_level=Max('level', filter=Q(status='active')),
+                average_score=Avg('total_score'),
+            )
+        )
+        for row in rows:
+            user_id = row.pop('user_id')
+            row['highest_level'] = row['highest_level'] or 0
+            row['average_score'] = round(row['average_score'] or 0, 2)
+            stats[user_id] = row
+        return stats
+
+    @classmethod
+    def empty_stats(cls):
+        return {field: 0 for field in cls.STAT_FIELDS}
+
+    @classmethod
+    def refresh(cls, user_ids):
+        """
+        Recalcula y guarda el resumen de los usuarios (omite usuarios ya eliminados).
+
+        Inserta los resúmenes faltantes ignorando los existentes y luego actualiza
+        todos: no usa bulk_create(update_conflicts=...) con unique_fields, que el
+        backend de MySQL no admite.
+        """
+        user_ids = set(User.objects.filter(id__in=set(user_ids)).values_list('id', flat=True))
+        if not user_ids:
+            return
+        stats = cls.compute(user_ids)
+        now = timezone.now()
+        summaries = [cls(user_id=user_id, updated_at=now, **values) for user_id, values in stats.items()]
+        cls.objects.bulk_create(summaries, ignore_conflicts=True, batch_size=1000)
+        cls.objects.bulk_update(summaries, cls.STAT_FIELDS + ['updated_at'], batch_size=1000)
+
+    @classmethod
+    def for_users(cls, user_ids):
+        """
+        Estadísticas de varios usuarios: desde los resúmenes guardados y, para los
+        usuarios sin resumen, con una consulta de agregados condicionales.
+        """
+        stats = {
+            row.pop('user_id'): row
+            for row in cls.objects.filter(user_id__in=user_ids).values('user_id', *cls.STAT_FIELDS)
+        }
+        missing = [user_id for user_id in user_ids if user_id not in stats]
+        if missing:
+            stats.update(cls.compute(missing))
+        return stats
+
+
+class CertificateRevocation(models.Model):
+    """
+    Lista de revocación: certificados cuyo token firmado ya no debe aceptarse
+    (revocados, suspendidos, expirados manualmente o eliminados), o cuyos
+    tokens anteriores a `token_version` quedaron reemplazados.
+    """
+    
+    REASON_CHOICES = [
+        ('revoked', 'Revocada'),
+        ('suspended', 'Suspendida'),
+        ('expired', 'Expirada'),
+        ('deleted', 'Eliminada'),
+        ('superseded', 'Reemplazada'),
+    ]
+    
+    certificate_id = models.UUIDField(unique=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='revoked')
+    # Con 'superseded': versión más alta de token que ya no se acepta (los datos firmados cambiaron)
+    token_version = models.PositiveIntegerField(default=0)
+    # Con 'superseded': expiración más tardía firmada en los tokens reemplazados (null si
+    # alguno no expira o no se conoce). Pasada esa fecha los tokens ya se rechazan por
+    # expirados y el barrido de expiración elimina la entrada.
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-revoked_at']
+        verbose_name = 'Revocación de Certificado'
+        verbose_name_plural = 'Revocaciones de Certificados'
+        indexes = [
+            models.Index(fields=['reason', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.certificate_id} ({self.get_reason_display()})"
+
+
+class CertificationBatch(models.Model):
+    """Generación masiva de certificaciones para una organización, equipo o lista de usuarios"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'En proceso'),
+        ('completed', 'Completado'),
+        ('failed', 'Fallido'),
+    ]
+    
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='certification_batches'
+    )
+    
+    # Destinatarios: organización, equipo o lista explícita de usuarios
+    organization = models.ForeignKey(
+        'organizations.Organization', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='certification_batches'
+    )
+    team = models.ForeignKey(
+        'organizations.Team', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='certification_batches'
+    )
+    user_ids = models.JSONField(default=list, blank=True, help_text="Usuarios explícitos del lote")
+    
+    # Datos de las certificaciones a emitir
+    title = models.CharField(max_length=200, help_text="Título de la certificación")
+    description = models.TextField(null=True, blank=True)
+    evidence_links = models.TextField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    # Progreso
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_users = models.IntegerField(default=0)
+    processed_users = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0, help_text="Certificaciones emitidas")
+    skipped_count = models.IntegerField(default=0, help_text="Usuarios sin resultados")
+    error = models.TextField(blank=True, default='')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Última señal de vida del proceso que ejecuta el lote (se actualiza en cada bloque)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Lote de Certificación'
+        verbose_name_plural = 'Lotes de Certificación'
+
+    def __str__(self):
+        return f"Lote {self.id} - {self.title} ({self.get_status_display()})"
+    
+    @property
+    def progress(self):
+        """Porcentaje de usuarios procesados"""
+        if self.total_users == 0:
+            return 100.0 if self.status == 'completed' else 0.0
+        return round(self.processed_users / self.total_users * 100, 2)
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Certification
+from .models import Certification, CertificationBatch
+from .tokens import sign_certificate
+from .verification import MAX_BULK_VERIFY
+from apps.organizations.models import Organization, Team
 
 
 class CertificationSerializer(serializers.ModelSerializer):
@@ -8,19 +11,24 @@ class CertificationSerializer(serializers.ModelSerializer):
     level_display = serializers.CharField(source='get_level_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     is_valid = serializers.SerializerMethodField()
+    token = serializers.SerializerMethodField()
     
     class Meta:
         model = Certification
         fields = [
             'id', 'certificate_id', 'user', 'username', 'title', 'description',
             'level', 'level_display', 'total_score', 'assessments_completed',
-            'evidence_links', 'status', 'status_display', 'is_valid',
+            'evidence_links', 'status', 'status_display', 'is_valid', 'token',
             'issued_at', 'expires_at', 'updated_at'
         ]
         read_only_fields = ['id', 'certificate_id', 'issued_at', 'updated_at']
     
     def get_is_valid(self, obj):
         return obj.is_valid()
+    
+    def get_token(self, obj):
+        """Token firmado para verificar la certificación sin consultar la base de datos"""
+        return sign_certificate(obj)
 
 
 class CertificationCreateSerializer(serializers.ModelSerializer):
@@ -45,6 +53,56 @@ class CertificationGenerateSerializer(serializers.Serializer):
     expires_at = serializers.DateTimeField(required=False, allow_null=True, help_text="Fecha de expiración opcional")
 
 
+class CertificationBatchCreateSerializer(CertificationGenerateSerializer):
+    """Serializer para generar certificaciones en lote: una organización, un equipo o una lista de usuarios"""
+    organization = serializers.PrimaryKeyRelatedField(
+        queryset=Organization.objects.all(), required=False, help_text="ID de la organización"
+    )
+    team = serializers.PrimaryKeyRelatedField(
+        queryset=Team.objects.select_related('organization'), required=False, help_text="ID del equipo"
+    )
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000,
+        help_text="IDs de usuarios"
+    )
+    
+    def validate(self, attrs):
+        targets = [field for field in ('organization', 'team', 'user_ids') if attrs.get(field)]
+        if len(targets) != 1:
+            raise serializers.ValidationError("Indique exactamente uno de: organization, team o user_ids")
+        return attrs
+
+
+class CertificationBatchSerializer(serializers.ModelSerializer):
+    """Serializer para el estado y progreso de un lote"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = CertificationBatch
+        fields = [
+            'id', 'title', 'organization', 'team', 'user_ids', 'status', 'status_display',
+            'total_users', 'processed_users', 'progress', 'created_count', 'skipped_count',
+            'error', 'created_by', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class CertificateTokenSerializer(serializers.Serializer):
+    """Serializer para verificar un token de certificado"""
+    token = serializers.CharField(help_text="Token firmado de la certificación")
+
+
+class CertificationBulkVerifySerializer(serializers.Serializer):
+    """Serializer para verificar varias certificaciones a la vez"""
+    certificate_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=MAX_BULK_VERIFY,
+        help_text=f"UUIDs de las certificaciones (máximo {MAX_BULK_VERIFY})"
+    )
+
+
 class CertificationHistorySerializer(serializers.ModelSerializer):
     """Serializer simplificado para historial de certificaciones"""
     level_display = serializers.CharField(source='get_level_display', read_only=True)
@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_verifications
+from .models import Certification, CertificateRevocation, CertificationSummary
+from .tokens import invalidate_revocations
+
+# Estados en los que el token de la certificación no debe aceptarse, con el motivo
+# ('expired' cubre la expiración manual; la fecha de expiración ya va firmada en el token)
+REVOKED_STATUSES = {
+    'revoked': 'revoked',
+    'pending': 'suspended',
+    'expired': 'expired',
+}
+
+_UNKNOWN = object()
+_UNCHANGED = object()
+
+
+@receiver(post_save, sender=Certification)
+def certification_saved(sender, instance, created, **kwargs):
+    previous_status = _UNKNOWN if created else getattr(instance, '_loaded_status', _UNKNOWN)
+    previous_expires_at = _UNKNOWN if created else getattr(instance, '_loaded_expires_at', _UNKNOWN)
+    previous_token_version = _UNKNOWN if created else getattr(instance, '_loaded_token_version', _UNKNOWN)
+    instance._loaded_status = instance.status
+    instance._loaded_expires_at = instance.expires_at
+    instance._loaded_token_version = instance.token_version
+    instance._loaded_claims = instance.signed_claims()
+    CertificationSummary.refresh([instance.user_id])
+    if created:
+        # Una certificación nueva aún no tiene tokens emitidos ni verificaciones en caché
+        return
+
+    token_changed = previous_token_version != instance.token_version
+    if previous_status != instance.status or previous_expires_at != instance.expires_at or token_changed:
+        invalidate_verifications(instance.certificate_id)
+    if previous_status != instance.status or token_changed:
+        sync_revocation(instance, previous_expires_at if token_changed else _UNCHANGED)
+
+
+def _superseded_expiry(instance, replaced_expires_at):
+    """
+    Expiración más tardía de los tokens reemplazados: la de la entrada anterior y la
+    del token que se acaba de reemplazar. None si alguna no expira o no se conoce.
+    """
+    previous = CertificateRevocation.objects.filter(
+        certificate_id=instance.certificate_id, reason='superseded'
+    ).values_list('expires_at', flat=True).first()
+    if replaced_expires_at is _UNCHANGED:
+        return previous
+    if replaced_expires_at is _UNKNOWN or replaced_expires_at is None:
+        return None
+    if instance.token_version > 2 and previous is None:
+        # Los tokens de versiones anteriores no tienen una expiración conocida
+        return None
+    return max(previous, replaced_expires_at) if previous else replaced_expires_at
+
+
+def sync_revocation(instance, replaced_expires_at=_UNKNOWN):
+    """
+    Alinea la lista de revocación con la certificación: revocada según su estado,
+    o con sus tokens anteriores reemplazados si cambió algún dato firmado.
+    `replaced_expires_at` es la expiración del token reemplazado (_UNCHANGED si el token no cambió).
+    """
+    if instance.status in REVOKED_STATUSES:
+        CertificateRevocation.objects.update_or_create(
+            certificate_id=instance.certificate_id,
+            defaults={'reason': REVOKED_STATUSES[instance.status], 'token_version': 0, 'expires_at': None}
+        )
+    elif instance.token_version > 1:
+        CertificateRevocation.objects.update_or_create(
+            certificate_id=instance.certificate_id,
+            defaults={
+                'reason': 'superseded',
+                'token_version': instance.token_version - 1,
+                'expires_at': _superseded_expiry(instance, replaced_expires_at),
+            }
+        )
+    elif not CertificateRevocation.objects.filter(certificate_id=instance.certificate_id).delete()[0]:
+        return
+    invalidate_revocations()
+
+
+@receiver(post_delete, sender=Certification)
+def certification_deleted(sender, instance, **kwargs):
+    CertificateRevocation.objects.update_or_create(
+        certificate_id=instance.certificate_id, defaults={'reason': 'deleted', 'token_version': 0}
+    )
+    invalidate_revocations()
+    invalidate_verifications(instance.certificate_id)
+    # Al confirmar: si se está eliminando el usuario, su resumen ya no debe recrearse
+    user_id = instance.user_id
+    transaction.on_commit(lambda: CertificationSummary.refresh([user_id]))
@@ -1,8 +1,24 @@
-from django.test import TestCase
+from datetime import timedelta
+import time
+from io import StringIO
+import uuid
+from unittest import mock
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Certification
+from .models import Certification, CertificationBatch, CertificateRevocation, CertificationSummary
+from . import batches, expiry, tokens
+from .verification import MAX_BULK_VERIFY, verify_certificates
+from apps.assessments.models import Assessment
+from apps.organizations.models import Organization, Team
+from apps.results.models import Result
 
 User = get_user_model()
 
@@ -102,3 +118,482 @@ class CertificationAPITest(APITestCase):
         response = self.client.get(f'/certifications/verify/{self.certification.certificate_id}/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['is_valid'])
+
+
+@override_settings(CERTIFICATION_BATCHES_ASYNC=False)
+class CertificationBatchAPITest(APITestCase):
+    """Tests para la generación masiva de certificaciones"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='empresa', email='empresa@test.com',
+                                              password='testpass123', role='empresa')
+        self.client.force_authenticate(user=self.owner)
+        self.organization = Organization.objects.create(name='Acme', email='acme@test.com', owner=self.owner)
+        self.team = Team.objects.create(name='Backend', organization=self.organization)
+        other_team = Team.objects.create(name='Frontend', organization=self.organization)
+        assessment = Assessment.objects.create(title='Python Básico')
+
+        self.users = []
+        for index, score in enumerate([95, 80, 45, None]):
+            user = User.objects.create_user(username=f'aprendiz{index}', email=f'aprendiz{index}@test.com',
+                                            password='testpass123', role='aprendiz')
+            self.users.append(user)
+            (self.team if index < 2 else other_team).members.add(user)
+            if score is not None:
+                Result.objects.create(user=user, assessment=assessment, score=score,
+                                      correct_answers=1, total_questions=1)
+        # Miembro de los dos equipos: se certifica una sola vez
+        other_team.members.add(self.users[0])
+
+    def create_batch(self, **target):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/certifications/batches/', {'title': 'Bootcamp 2026', **target}, format='json')
+        return response
+
+    def test_batch_for_organization(self):
+        """Test lote por organización con niveles calculados en memoria"""
+        response = self.create_batch(organization=self.organization.id)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        batch = CertificationBatch.objects.get(pk=response.data['id'])
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual((batch.total_users, batch.processed_users), (4, 4))
+        self.assertEqual((batch.created_count, batch.skipped_count), (3, 1))
+        levels = dict(Certification.objects.filter(batch=batch).values_list('user__username', 'level'))
+        self.assertEqual(levels, {'aprendiz0': 5, 'aprendiz1': 4, 'aprendiz2': 2})
+
+        response = self.client.get(f'/certifications/batches/{batch.id}/')
+        self.assertEqual(response.data['progress'], 100.0)
+
+    def test_batch_for_team_and_user_list(self):
+        """Test lote por equipo y por lista de usuarios"""
+        self.create_batch(team=self.team.id)
+        self.assertEqual(Certification.objects.count(), 2)
+
+        self.create_batch(user_ids=[self.users[2].id, self.users[3].id, 999999])
+        batch = CertificationBatch.objects.latest('id')
+        self.assertEqual((batch.total_users, batch.created_count, batch.skipped_count), (2, 1, 1))
+
+    def test_batch_single_aggregate_and_chunked_inserts(self):
+        """Test un solo GROUP BY sobre resultados e inserciones por bloques"""
+        batch = CertificationBatch.objects.create(title='Lote', organization=self.organization)
+        with mock.patch.object(batches, 'BATCH_CHUNK_SIZE', 2), \
+                CaptureQueriesContext(connection) as context:
+            batches.run_batch(batch.id)
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(sum('"results_result"' in sql for sql in queries), 1)
+        self.assertEqual(sum(sql.startswith('INSERT INTO "certifications_certification"') for sql in queries), 2)
+
+    def test_batch_validation_and_permissions(self):
+        """Test destino único y permisos sobre la organización"""
+        response = self.create_batch(organization=self.organization.id, team=self.team.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        stranger = User.objects.create_user(username='otra', email='otra@test.com',
+                                            password='testpass123', role='empresa')
+        self.client.force_authenticate(user=stranger)
+        response = self.create_batch(organization=self.organization.id)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.users[0])
+        response = self.create_batch(user_ids=[self.users[0].id])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_rerun_does_not_duplicate(self):
+        """Test reanudar un lote no duplica certificaciones"""
+        self.create_batch(organization=self.organization.id)
+        batch = CertificationBatch.objects.get()
+        out = StringIO()
+        call_command('run_certification_batch', batch.id, stdout=out)
+        self.assertEqual(Certification.objects.filter(batch=batch).count(), 3)
+        self.assertIn('3 certificaciones', out.getvalue())
+
+    def test_recover_stale_batches(self):
+        """Test los lotes sin señal de vida se reanudan y los activos no se tocan"""
+        old = timezone.now() - batches.BATCH_STALE_AFTER - timedelta(minutes=1)
+        interrupted = CertificationBatch.objects.create(
+            title='Interrumpido', organization=self.organization, status='running',
+            started_at=old, heartbeat_at=old, processed_users=2
+        )
+        # Un lote interrumpido ya pudo emitir parte de sus certificaciones
+        Certification.objects.create(user=self.users[0], batch=interrupted, title='Interrumpido', total_score=95)
+        never_started = CertificationBatch.objects.create(title='En cola', team=self.team)
+        CertificationBatch.objects.filter(pk=never_started.pk).update(created_at=old)
+        alive = CertificationBatch.objects.create(
+            title='Activo', team=self.team, status='running', started_at=old, heartbeat_at=timezone.now()
+        )
+
+        out = StringIO()
+        call_command('recover_certification_batches', stdout=out)
+        self.assertIn('Lotes reanudados: 2', out.getvalue())
+        interrupted.refresh_from_db()
+        self.assertEqual((interrupted.status, interrupted.created_count), ('completed', 3))
+        self.assertEqual(Certification.objects.filter(batch=interrupted, user=self.users[0]).count(), 1)
+        self.assertEqual(CertificationBatch.objects.get(pk=never_started.pk).status, 'completed')
+        self.assertEqual(CertificationBatch.objects.get(pk=alive.pk).status, 'running')
+        self.assertEqual(batches.recover_stale_batches(), [])
+
+
+class CertificateTokenTest(APITestCase):
+    """Tests para los tokens firmados y la lista de revocación"""
+
+    def setUp(self):
+        cache.clear()
+        tokens._local_snapshot = None
+        self.user = User.objects.create_user(
+            username='tokenuser',
+            email='tokenuser@test.com',
+            password='testpass123'
+        )
+        self.certification = Certification.objects.create(
+            user=self.user,
+            title='Token Cert',
+            total_score=82.5,
+            assessments_completed=4
+        )
+
+    def verify(self, token):
+        return self.client.post('/certifications/verify-token/', {'token': token}, format='json')
+
+    def test_valid_token_without_queries(self):
+        """Test un token válido se verifica sin consultar la base de datos"""
+        token = tokens.sign_certificate(self.certification)
+        tokens.get_revocations()
+        with self.assertNumQueries(0):
+            response = self.verify(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_valid'])
+        self.assertEqual(response.data['certificate_id'], str(self.certification.certificate_id))
+        self.assertEqual(response.data['total_score'], 82.5)
+
+    def test_tampered_token(self):
+        """Test un token alterado se rechaza"""
+        token = tokens.sign_certificate(self.certification)
+        response = self.verify(token[:-2] + ('AA' if not token.endswith('AA') else 'BB'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_and_reactivate(self):
+        """Test revocar invalida el token y reactivar lo vuelve a aceptar"""
+        token = tokens.sign_certificate(self.certification)
+        self.assertTrue(self.verify(token).data['is_valid'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.status = 'revoked'
+            self.certification.save()
+        response = self.verify(token)
+        self.assertFalse(response.data['is_valid'])
+        self.assertEqual(response.data['reason'], 'revoked')
+        self.assertIsNone(tokens.sign_certificate(self.certification))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.status = 'active'
+            self.certification.save()
+        self.assertFalse(CertificateRevocation.objects.exists())
+        self.assertTrue(self.verify(token).data['is_valid'])
+
+    def test_expired_and_deleted(self):
+        """Test un token expirado o de una certificación eliminada no es válido"""
+        self.certification.expires_at = timezone.now() - timedelta(days=1)
+        response = self.verify(tokens.sign_certificate(self.certification))
+        self.assertEqual(response.data['reason'], 'expired')
+
+        token = tokens.sign_certificate(Certification.objects.get(pk=self.certification.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Certification.objects.get(pk=self.certification.pk).delete()
+        response = self.verify(token)
+        self.assertFalse(response.data['is_valid'])
+        self.assertEqual(response.data['reason'], 'revoked')
+
+    def test_revocation_list_etag(self):
+        """Test la lista de revocación responde 304 si no cambió"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.status = 'revoked'
+            self.certification.save()
+        response = self.client.get('/certifications/revocations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['certificate_ids'], [str(self.certification.certificate_id)])
+
+        response = self.client.get('/certifications/revocations/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_signed_field_change_supersedes_old_tokens(self):
+        """Test cambiar un dato firmado invalida los tokens emitidos y acepta el nuevo"""
+        old_token = tokens.sign_certificate(self.certification)
+        with self.captureOnCommitCallbacks(execute=True):
+            certification = Certification.objects.get(pk=self.certification.pk)
+            certification.total_score = 95
+            certification.level = 5
+            certification.save()
+        self.assertEqual(certification.token_version, 2)
+        response = self.verify(old_token)
+        self.assertFalse(response.data['is_valid'])
+        self.assertEqual(response.data['reason'], 'superseded')
+        response = self.verify(tokens.sign_certificate(certification))
+        self.assertTrue(response.data['is_valid'])
+        self.assertEqual(response.data['total_score'], 95)
+
+        response = self.client.get('/certifications/revocations/')
+        self.assertEqual(response.data['certificate_ids'], [])
+        self.assertEqual(response.data['superseded'], {str(certification.certificate_id): 1})
+
+        # Un cambio que no toca datos firmados conserva la versión del token
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.title = 'Otro título'
+            certification.save(update_fields=['title'])
+        self.assertEqual(Certification.objects.get(pk=certification.pk).token_version, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.expires_at = timezone.now() + timedelta(days=30)
+            certification.save(update_fields=['expires_at'])
+        certification = Certification.objects.get(pk=certification.pk)
+        self.assertEqual(certification.token_version, 3)
+        self.assertTrue(self.verify(tokens.sign_certificate(certification)).data['is_valid'])
+
+    def test_revocations_reread_after_max_age(self):
+        """Test la copia en memoria se vuelve a leer tras REVOCATIONS_MAX_AGE aunque la versión no cambie"""
+        token = tokens.sign_certificate(self.certification)
+        self.assertTrue(self.verify(token).data['is_valid'])
+        # Revocación de otro proceso cuya versión no llegó a esta caché
+        CertificateRevocation.objects.create(certificate_id=self.certification.certificate_id)
+        self.assertTrue(self.verify(token).data['is_valid'])
+
+        with mock.patch.object(tokens.time, 'monotonic', return_value=time.monotonic() + tokens.REVOCATIONS_MAX_AGE):
+            response = self.verify(token)
+        self.assertFalse(response.data['is_valid'])
+        self.assertEqual(response.data['reason'], 'revoked')
+
+
+class CertificationBulkVerifyTest(APITestCase):
+    """Tests para la verificación en lote y su caché"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='verifier',
+            email='verifier@test.com',
+            password='testpass123',
+            role='empresa'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.certifications = [
+            Certification.objects.create(user=self.user, title=f'Cert {i}', total_score=50.0 + i)
+            for i in range(3)
+        ]
+
+    def bulk_verify(self, certificate_ids):
+        return self.client.post('/certifications/verify/', {
+            'certificate_ids': [str(certificate_id) for certificate_id in certificate_ids]
+        }, format='json')
+
+    def test_bulk_verify_single_query_and_cache(self):
+        """Test el lote se resuelve con una consulta y luego se sirve desde caché"""
+        certificate_ids = [certification.certificate_id for certification in self.certifications]
+        unknown = uuid.uuid4()
+        with self.assertNumQueries(1):
+            response = self.bulk_verify(certificate_ids + [unknown])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(response.data['valid'], 3)
+        self.assertEqual(response.data['results'][0]['certificate_id'], str(certificate_ids[0]))
+        self.assertFalse(response.data['results'][3]['found'])
+
+        with self.assertNumQueries(0):
+            response = self.bulk_verify(certificate_ids)
+        self.assertEqual(response.data['valid'], 3)
+
+    def test_status_and_expiration_changes_invalidate_cache(self):
+        """Test cambiar el estado o la expiración invalida la verificación en caché"""
+        first, second = self.certifications[:2]
+        self.bulk_verify([first.certificate_id, second.certificate_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'revoked'
+            first.save()
+            second.expires_at = timezone.now() - timedelta(days=1)
+            second.save()
+        response = self.bulk_verify([first.certificate_id, second.certificate_id])
+        self.assertEqual(response.data['valid'], 0)
+        self.assertEqual(response.data['results'][0]['status'], 'revoked')
+
+        response = self.client.get(f'/certifications/verify/{second.certificate_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_valid'])
+
+    def test_bulk_verify_validation(self):
+        """Test límites del lote"""
+        self.assertEqual(self.bulk_verify([]).status_code, status.HTTP_400_BAD_REQUEST)
+        too_many = [uuid.uuid4() for _ in range(MAX_BULK_VERIFY + 1)]
+        self.assertEqual(self.bulk_verify(too_many).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(f'/certifications/verify/{uuid.uuid4()}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CertificationExpiryTest(TestCase):
+    """Tests para el barrido de certificaciones vencidas"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='expiryuser',
+            email='expiryuser@test.com',
+            password='testpass123'
+        )
+        now = timezone.now()
+        self.expired = [
+            Certification.objects.create(user=self.user, title=f'Vencida {i}', total_score=60.0,
+                                         expires_at=now - timedelta(days=i + 1))
+            for i in range(3)
+        ]
+        self.current = Certification.objects.create(user=self.user, title='Vigente', total_score=60.0,
+                                                    expires_at=now + timedelta(days=30))
+        self.permanent = Certification.objects.create(user=self.user, title='Sin expiración', total_score=60.0)
+
+    def test_sweeper_expires_in_batches(self):
+        """Test el barrido actualiza solo las vencidas, por bloques"""
+        out = StringIO()
+        with self.assertLogs('apps.certifications.expiry', level='INFO') as logs, \
+                CaptureQueriesContext(connection) as context:
+            call_command('expire_certifications', '--batch-size', '2', stdout=out)
+        self.assertIn('Certificaciones expiradas: 3', out.getvalue())
+        self.assertIn('count=3', logs.output[0])
+        self.assertEqual(
+            set(Certification.objects.filter(status='expired').values_list('pk', flat=True)),
+            {certification.pk for certification in self.expired}
+        )
+        self.assertEqual(Certification.objects.filter(status='active').count(), 2)
+        # El segundo bloque continúa después del último (expires_at, pk) del primero
+        self.assertTrue(any(
+            '"certifications_certification"."expires_at" > ' in query['sql'] for query in context.captured_queries
+        ))
+
+        # Un segundo barrido no encuentra nada pendiente: solo la consulta y la limpieza de revocaciones
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(expiry.expire_certifications(), 0)
+        self.assertEqual(len([query for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]), 2)
+
+    def test_sweeper_purges_expired_superseded_revocations(self):
+        """Test las entradas 'superseded' se eliminan cuando sus tokens reemplazados ya expiraron"""
+        now = timezone.now()
+        certification = Certification.objects.get(pk=self.current.pk)
+        old_token = tokens.sign_certificate(certification)
+        certification.expires_at = now + timedelta(days=60)
+        certification.save()
+        certification.expires_at = now + timedelta(days=90)
+        certification.save()
+        revocation = CertificateRevocation.objects.get(certificate_id=certification.certificate_id)
+        self.assertEqual((revocation.reason, revocation.token_version), ('superseded', 2))
+        self.assertEqual(revocation.expires_at, now + timedelta(days=60))
+
+        # Un reemplazo con expiración desconocida no se elimina nunca
+        permanent = Certification.objects.get(pk=self.permanent.pk)
+        permanent.total_score = 80
+        permanent.save()
+        self.assertIsNone(CertificateRevocation.objects.get(certificate_id=permanent.certificate_id).expires_at)
+
+        expiry.expire_certifications(now=now + timedelta(days=59))
+        self.assertTrue(CertificateRevocation.objects.filter(certificate_id=certification.certificate_id).exists())
+        expiry.expire_certifications(now=now + timedelta(days=61))
+        self.assertFalse(CertificateRevocation.objects.filter(certificate_id=certification.certificate_id).exists())
+        self.assertTrue(CertificateRevocation.objects.filter(certificate_id=permanent.certificate_id).exists())
+
+        # El token reemplazado sigue rechazado por su propia expiración
+        with mock.patch('apps.certifications.tokens.timezone.now', return_value=now + timedelta(days=61)):
+            _, is_valid, reason = tokens.verify_token(old_token)
+        self.assertEqual((is_valid, reason), (False, 'expired'))
+
+    def test_sweeper_invalidates_verification_cache(self):
+        """Test el barrido descarta las verificaciones en caché"""
+        certificate_id = self.expired[0].certificate_id
+        verify_certificates([certificate_id])
+        with self.captureOnCommitCallbacks(execute=True):
+            expiry.expire_certifications()
+        self.assertEqual(verify_certificates([certificate_id])[certificate_id]['status'], 'expired')
+
+
+class CertificationSummaryTest(APITestCase):
+    """Tests para el resumen materializado de certificaciones"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='summaryuser',
+            email='summaryuser@test.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='summaryother',
+            email='summaryother@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.certifications = [
+            Certification.objects.create(user=self.user, title=f'Cert {score}', total_score=score, level=level)
+            for score, level in ((95.0, 5), (65.0, 3), (45.0, 2))
+        ]
+
+    def test_summary_maintained_on_writes(self):
+        """Test el resumen se actualiza al crear, cambiar de estado y eliminar"""
+        summary = CertificationSummary.objects.get(user=self.user)
+        self.assertEqual(summary.total_certifications, 3)
+        self.assertEqual(summary.active_certifications, 3)
+        self.assertEqual(summary.highest_level, 5)
+        self.assertEqual(summary.average_score, 68.33)
+
+        expert = self.certifications[0]
+        expert.status = 'revoked'
+        expert.save()
+        summary.refresh_from_db()
+        self.assertEqual((summary.active_certifications, summary.revoked_certifications), (2, 1))
+        self.assertEqual(summary.highest_level, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            expert.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_certifications, 2)
+        self.assertEqual(summary.average_score, 55.0)
+
+    def test_stats_served_from_summary(self):
+        """Test las estadísticas se leen de una fila, con respaldo por agregados"""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/certifications/{self.user.id}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_certifications'], 3)
+        self.assertEqual(response.data['highest_level'], 5)
+
+        CertificationSummary.objects.all().delete()
+        response = self.client.get(f'/certifications/stats/?users={self.user.id},{self.other.id},999999')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['user_id'] for row in response.data], [self.user.id, self.other.id])
+        self.assertEqual(response.data[0]['average_score'], 68.33)
+        self.assertEqual(response.data[1]['total_certifications'], 0)
+
+        response = self.client.get('/certifications/stats/?users=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refresh_without_upsert_target_support(self):
+        """Test el resumen se guarda en backends sin ON CONFLICT (campos) como MySQL"""
+        CertificationSummary.objects.filter(user=self.other).delete()
+        Certification.objects.filter(user=self.user).update(status='expired')
+        features = connection.features
+        with mock.patch.object(features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(features, 'supports_update_conflicts', False):
+            CertificationSummary.refresh([self.user.id, self.other.id])
+        summary = CertificationSummary.objects.get(user=self.user)
+        self.assertEqual((summary.active_certifications, summary.expired_certifications), (0, 3))
+        self.assertEqual(CertificationSummary.objects.get(user=self.other).total_certifications, 0)
+
+    def test_batch_and_sweeper_refresh_summary(self):
+        """Test la generación masiva y el barrido de expiración actualizan el resumen"""
+        Result.objects.create(
+            user=self.other,
+            assessment=Assessment.objects.create(title='Resumen'),
+            correct_answers=8, total_questions=10
+        )
+        batches.run_batch(CertificationBatch.objects.create(
+            title='Lote', user_ids=[self.other.id], expires_at=timezone.now() - timedelta(days=1)
+        ).id)
+        summary = CertificationSummary.objects.get(user=self.other)
+        self.assertEqual(summary.active_certifications, 1)
+
+        expiry.expire_certifications()
+        summary.refresh_from_db()
+        self.assertEqual((summary.active_certifications, summary.expired_certifications), (0, 1))
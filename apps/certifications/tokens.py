@@ -0,0 +1,172 @@
+"""
+Certificados verificables sin consultar la base de datos.
+
+Cada certificación activa lleva un token firmado con HMAC (django.core.signing)
+sobre su identificador, usuario, nivel, puntaje y fechas de emisión y
+expiración. Verificar un token solo requiere la clave de firma y la lista de
+revocación, que se sirve desde memoria: la versión vigente vive en la caché
+compartida y la lista se vuelve a leer de la base de datos cuando cambia una
+revocación o, aunque la versión no cambie, cuando la copia en memoria supera
+REVOCATIONS_MAX_AGE (si la caché es local a cada proceso o pierde la versión,
+una revocación tarda como máximo ese tiempo en propagarse).
+
+Cambiar un dato firmado aumenta la versión del token de la certificación; los
+tokens de versiones anteriores quedan en la lista como reemplazados.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CertificateRevocation
+
+TOKEN_SALT = 'apps.certifications.certificate'
+
+REVOCATIONS_VERSION_KEY = 'certifications:revocations:version'
+
+# Segundos que se sirve la copia en memoria sin volver a leer la base de datos
+REVOCATIONS_MAX_AGE = 60
+
+# Tiempo de vida de la versión en la caché (segundos)
+REVOCATIONS_VERSION_TIMEOUT = 60 * 60
+
+
+def _signing_key():
+    return getattr(settings, 'CERTIFICATE_SIGNING_KEY', None) or None
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value else None
+
+
+def sign_certificate(certification):
+    """Token firmado de la certificación, o None si no está activa"""
+    if certification.status != 'active':
+        return None
+    payload = {
+        'c': certification.certificate_id.hex,
+        'u': certification.user_id,
+        'l': certification.level,
+        's': round(certification.total_score, 2),
+        'i': _timestamp(certification.issued_at),
+        'e': _timestamp(certification.expires_at),
+        'v': certification.token_version,
+    }
+    return signing.dumps(payload, key=_signing_key(), salt=TOKEN_SALT, compress=True)
+
+
+def read_token(token):
+    """
+    Verifica la firma del token y retorna sus datos.
+    Lanza signing.BadSignature si el token fue alterado o no es válido.
+    """
+    payload = signing.loads(token, key=_signing_key(), salt=TOKEN_SALT)
+
+    def to_datetime(value):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc) if value is not None else None
+
+    return {
+        'certificate_id': uuid.UUID(hex=payload['c']),
+        'user_id': payload['u'],
+        'level': payload['l'],
+        'total_score': payload['s'],
+        'issued_at': to_datetime(payload['i']),
+        'expires_at': to_datetime(payload['e']),
+        'token_version': payload.get('v', 1),
+    }
+
+
+# ==================== LISTA DE REVOCACIÓN ====================
+
+class RevocationSnapshot:
+    """Copia en memoria de la lista de revocación para una versión"""
+
+    def __init__(self, version, revocations):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # certificate_id -> (motivo, versión de token reemplazada)
+        self.entries = {
+            certificate_id: (reason, token_version) for certificate_id, reason, token_version in revocations
+        }
+        self.certificate_ids = frozenset(
+            certificate_id for certificate_id, (reason, _) in self.entries.items() if reason != 'superseded'
+        )
+        self.superseded = {
+            certificate_id: token_version
+            for certificate_id, (reason, token_version) in self.entries.items() if reason == 'superseded'
+        }
+
+    def __contains__(self, certificate_id):
+        return certificate_id in self.certificate_ids
+
+    def is_stale(self, version):
+        return self.version != version or time.monotonic() - self.loaded_at >= REVOCATIONS_MAX_AGE
+
+    def rejection(self, certificate_id, token_version):
+        """Motivo por el que el token no se acepta, o None"""
+        reason, superseded_version = self.entries.get(certificate_id, (None, 0))
+        if reason == 'superseded':
+            return reason if token_version <= superseded_version else None
+        return reason
+
+
+_local_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def revocations_version():
+    """Versión vigente de la lista de revocación (se crea si la caché no la tiene)"""
+    version = cache.get(REVOCATIONS_VERSION_KEY)
+    if version is None:
+        version = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        if not cache.add(REVOCATIONS_VERSION_KEY, version, REVOCATIONS_VERSION_TIMEOUT):
+            version = cache.get(REVOCATIONS_VERSION_KEY, version)
+    return version
+
+
+def get_revocations():
+    """
+    Lista de revocación vigente; se consulta la base de datos cuando cambió la
+    versión o la copia en memoria tiene más de REVOCATIONS_MAX_AGE segundos
+    """
+    global _local_snapshot
+
+    version = revocations_version()
+    snapshot = _local_snapshot
+    if snapshot is not None and not snapshot.is_stale(version):
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _local_snapshot
+        if snapshot is None or snapshot.is_stale(version):
+            revocations = CertificateRevocation.objects.values_list('certificate_id', 'reason', 'token_version')
+            snapshot = RevocationSnapshot(version, revocations)
+            _local_snapshot = snapshot
+    return snapshot
+
+
+def invalidate_revocations():
+    """Publica una nueva versión de la lista una vez confirmada la transacción"""
+    transaction.on_commit(lambda: cache.delete(REVOCATIONS_VERSION_KEY))
+
+
+def verify_token(token):
+    """
+    Verifica un token sin consultar la base de datos.
+    Retorna (datos del certificado, es válido, motivo) o lanza signing.BadSignature.
+    """
+    data = read_token(token)
+    reason = get_revocations().rejection(data['certificate_id'], data['token_version'])
+    if reason == 'superseded':
+        return data, False, reason
+    if reason is not None:
+        return data, False, 'revoked'
+    if data['expires_at'] and data['expires_at'] < timezone.now():
+        return data, False, 'expired'
+    return data, True, None
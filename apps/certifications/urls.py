@@ -5,7 +5,13 @@ from .views import (
     GenerateCertificationView,
     CertificationHistoryView,
     CertificationVerifyView,
-    UserCertificationStatsView
+    CertificationBulkVerifyView,
+    UserCertificationStatsView,
+    CertificationStatsListView,
+    CertificationBatchCreateView,
+    CertificationBatchDetailView,
+    CertificateTokenVerifyView,
+    CertificateRevocationListView
 )
 
 urlpatterns = [
@@ -19,5 +25,13 @@ urlpatterns = [
     
     # Endpoints adicionales
     path('verify/<uuid:certificate_id>/', CertificationVerifyView.as_view(), name='certification-verify'),
+    path('verify/', CertificationBulkVerifyView.as_view(), name='certification-bulk-verify'),
+    path('verify-token/', CertificateTokenVerifyView.as_view(), name='certification-verify-token'),
+    path('revocations/', CertificateRevocationListView.as_view(), name='certification-revocations'),
+    path('stats/', CertificationStatsListView.as_view(), name='certification-stats-list'),
     path('<int:user_id>/stats/', UserCertificationStatsView.as_view(), name='certification-stats'),
+    
+    # Generación masiva
+    path('batches/', CertificationBatchCreateView.as_view(), name='certification-batch-create'),
+    path('batches/<int:pk>/', CertificationBatchDetailView.as_view(), name='certification-batch-detail'),
 ]
@@ -0,0 +1,67 @@
+"""
+Verificación de certificados por UUID, individual o en lote.
+
+Las verificaciones se leen de la caché con una sola operación (get_many); los
+UUID que faltan se resuelven con una sola consulta certificate_id__in (con el
+usuario en el mismo JOIN) y se guardan con set_many. La validez se recalcula
+en cada lectura, ya que una certificación puede expirar mientras está en caché.
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import verification_cache_key, VERIFICATION_CACHE_TIMEOUT
+from .models import Certification
+from .tokens import sign_certificate
+
+# UUIDs por petición de verificación en lote
+MAX_BULK_VERIFY = 100
+
+
+def verification_data(certification):
+    """Datos públicos de verificación de una certificación"""
+    return {
+        "certificate_id": str(certification.certificate_id),
+        "status": certification.status,
+        "status_display": certification.get_status_display(),
+        "user": certification.user.username,
+        "title": certification.title,
+        "level": certification.level,
+        "level_display": certification.get_level_display(),
+        "total_score": certification.total_score,
+        "issued_at": certification.issued_at,
+        "expires_at": certification.expires_at,
+        "token": sign_certificate(certification),
+    }
+
+
+def with_validity(data):
+    expires_at = data['expires_at']
+    is_valid = data['status'] == 'active' and not (expires_at and expires_at < timezone.now())
+    return {"certificate_id": data['certificate_id'], "is_valid": is_valid, **data}
+
+
+def verify_certificates(certificate_ids):
+    """
+    Verifica los UUID dados.
+    Retorna un diccionario {uuid: datos de verificación}; los UUID inexistentes no se incluyen.
+    """
+    keys = {certificate_id: verification_cache_key(certificate_id) for certificate_id in certificate_ids}
+    cached = cache.get_many(keys.values())
+    found = {
+        certificate_id: cached[key]
+        for certificate_id, key in keys.items() if key in cached
+    }
+
+    missing = [certificate_id for certificate_id in keys if certificate_id not in found]
+    if missing:
+        fresh = {
+            certification.certificate_id: verification_data(certification)
+            for certification in Certification.objects.select_related('user').filter(certificate_id__in=missing)
+        }
+        cache.set_many(
+            {keys[certificate_id]: data for certificate_id, data in fresh.items()},
+            VERIFICATION_CACHE_TIMEOUT
+        )
+        found.update(fresh)
+
+    return {certificate_id: with_validity(data) for certificate_id, data in found.items()}
@@ -1,26 +1,39 @@
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.core import signing
 from django.db.models import Avg, Sum, Count
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Certification
+from .models import Certification, CertificationBatch, CertificationSummary
 from .serializers import (
     CertificationSerializer,
     CertificationCreateSerializer,
     CertificationGenerateSerializer,
-    CertificationHistorySerializer
+    CertificationHistorySerializer,
+    CertificationBatchCreateSerializer,
+    CertificationBatchSerializer,
+    CertificateTokenSerializer,
+    CertificationBulkVerifySerializer
 )
 from .filters import CertificationFilter
-from apps.users.permissions import IsAdminOrEmpresaOrReadOnly, CanManageResults
+from .batches import start_batch
+from .tokens import get_revocations, verify_token
+from .verification import MAX_BULK_VERIFY, verify_certificates
+from apps.users.permissions import IsAdminOrEmpresa, IsAdminOrEmpresaOrReadOnly, CanManageResults
 
 User = get_user_model()
 
+# Usuarios por petición de estadísticas en lote
+MAX_STATS_USERS = 100
+
 
 # ==================== CRUD DE CERTIFICATIONS ====================
 
@@ -35,6 +48,9 @@ class CertificationListCreateView(generics.ListCreateAPIView):
     search_fields = ['user__username', 'title', 'description']
     ordering_fields = ['id', 'level', 'total_score', 'issued_at', 'expires_at']
     ordering = ['-issued_at']
+    # Modo cursor (?pagination=cursor), alineado con los índices (-issued_at, -id),
+    # (user, -issued_at) y (status, -issued_at)
+    cursor_ordering = ['-issued_at', '-id']
     permission_classes = [CanManageResults]
     
     def get_queryset(self):
@@ -203,6 +219,85 @@ class GenerateCertificationView(APIView):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
+# ==================== GENERACIÓN MASIVA ====================
+
+class CertificationBatchCreateView(APIView):
+    """
+    Generate certifications for a whole organization, team or user list in the background.
+    Endpoint: /certifications/batches/
+    - Only Admin and Empresa can create batches
+    """
+    permission_classes = [IsAdminOrEmpresa]
+    
+    @swagger_auto_schema(
+        operation_description="""Crea un lote de generación de certificaciones.
+        
+        Indique exactamente uno de:
+        - organization: todos los miembros de los equipos de la organización
+        - team: los miembros del equipo
+        - user_ids: lista explícita de usuarios
+        
+        El lote se procesa en segundo plano; consulte su progreso en
+        /certifications/batches/{id}/. Los usuarios sin resultados se omiten.
+        El nivel se calcula igual que en la generación individual.
+        """,
+        operation_summary="Generar certificaciones en lote",
+        request_body=CertificationBatchCreateSerializer,
+        responses={
+            202: CertificationBatchSerializer,
+            400: "Datos inválidos",
+            403: "Sin permisos sobre la organización"
+        }
+    )
+    def post(self, request):
+        serializer = CertificationBatchCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        
+        organization = data.get('organization') or (data['team'].organization if data.get('team') else None)
+        if organization is not None and not organization.can_manage(request.user):
+            return Response(
+                {"error": "No tiene permisos sobre esta organización"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        batch = CertificationBatch.objects.create(
+            created_by=request.user,
+            organization=data.get('organization'),
+            team=data.get('team'),
+            user_ids=data.get('user_ids', []),
+            title=data['title'],
+            description=data.get('description', ''),
+            evidence_links=data.get('evidence_links', ''),
+            expires_at=data.get('expires_at'),
+        )
+        start_batch(batch)
+        return Response(CertificationBatchSerializer(batch).data, status=status.HTTP_202_ACCEPTED)
+
+
+class CertificationBatchDetailView(generics.RetrieveAPIView):
+    """
+    Status and progress of a certification batch.
+    Endpoint: /certifications/batches/{id}/
+    """
+    serializer_class = CertificationBatchSerializer
+    permission_classes = [IsAdminOrEmpresa]
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'admin':
+            return CertificationBatch.objects.all()
+        return CertificationBatch.objects.filter(created_by=user)
+    
+    @swagger_auto_schema(
+        operation_description="Consultar el estado y progreso de un lote de certificaciones",
+        responses={200: CertificationBatchSerializer, 404: "Lote no encontrado"}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 class CertificationHistoryView(generics.ListAPIView):
     """
     Historial de certificaciones de un usuario.
@@ -213,6 +308,7 @@ class CertificationHistoryView(generics.ListAPIView):
     filterset_class = CertificationFilter
     ordering_fields = ['level', 'total_score', 'issued_at']
     ordering = ['-issued_at']
+    cursor_ordering = ['-issued_at', '-id']
     
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
@@ -281,23 +377,157 @@ class CertificationVerifyView(APIView):
         }
     )
     def get(self, request, certificate_id):
-        certification = get_object_or_404(Certification, certificate_id=certificate_id)
+        verification = verify_certificates([certificate_id]).get(certificate_id)
+        if verification is None:
+            return Response(
+                {"error": "Certificación no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(verification)
+
+
+class CertificationBulkVerifyView(APIView):
+    """Verificar varias certificaciones por sus UUID en una sola petición"""
+    
+    @swagger_auto_schema(
+        operation_description=f"""Verifica hasta {MAX_BULK_VERIFY} certificaciones a la vez.
+        
+        Todas se resuelven con una sola consulta y se guardan en caché por UUID
+        durante un tiempo corto. Los UUID inexistentes se devuelven con
+        `found: false`.
+        """,
+        operation_summary="Verificar certificaciones en lote",
+        request_body=CertificationBulkVerifySerializer,
+        responses={
+            200: openapi.Response(
+                description="Verificación por UUID, en el orden recibido",
+                examples={
+                    "application/json": {
+                        "count": 2,
+                        "valid": 1,
+                        "results": [
+                            {"certificate_id": "uuid-1", "found": True, "is_valid": True, "status": "active"},
+                            {"certificate_id": "uuid-2", "found": False, "is_valid": False}
+                        ]
+                    }
+                }
+            ),
+            400: "Datos inválidos"
+        }
+    )
+    def post(self, request):
+        serializer = CertificationBulkVerifySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        certificate_ids = list(dict.fromkeys(serializer.validated_data['certificate_ids']))
+        verifications = verify_certificates(certificate_ids)
+        results = [
+            {"found": True, **verifications[certificate_id]} if certificate_id in verifications
+            else {"certificate_id": str(certificate_id), "found": False, "is_valid": False}
+            for certificate_id in certificate_ids
+        ]
+        return Response({
+            "count": len(results),
+            "valid": sum(result['is_valid'] for result in results),
+            "results": results
+        })
+
+
+class CertificateTokenVerifyView(APIView):
+    """Verificar un certificado por su token firmado, sin consultar la base de datos"""
+    permission_classes = [AllowAny]
+    
+    @swagger_auto_schema(
+        operation_description="""Verifica el token firmado de una certificación.
+        
+        La firma, la expiración y la lista de revocación se comprueban en memoria:
+        este endpoint no consulta la base de datos. `reason` indica por qué el
+        certificado no es válido (revoked o expired).
+        """,
+        operation_summary="Verificar token de certificado",
+        request_body=CertificateTokenSerializer,
+        responses={
+            200: openapi.Response(
+                description="Resultado de la verificación",
+                examples={
+                    "application/json": {
+                        "certificate_id": "uuid-string",
+                        "is_valid": True,
+                        "reason": None,
+                        "user_id": 1,
+                        "level": 3,
+                        "level_display": "Competente",
+                        "total_score": 72.5,
+                        "issued_at": "2024-01-01T00:00:00Z",
+                        "expires_at": None
+                    }
+                }
+            ),
+            400: "Token alterado o inválido"
+        }
+    )
+    def post(self, request):
+        serializer = CertificateTokenSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            data, is_valid, reason = verify_token(serializer.validated_data['token'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return Response(
+                {"error": "Token de certificado inválido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response({
-            "certificate_id": str(certification.certificate_id),
-            "is_valid": certification.is_valid(),
-            "status": certification.status,
-            "status_display": certification.get_status_display(),
-            "user": certification.user.username,
-            "title": certification.title,
-            "level": certification.level,
-            "level_display": certification.get_level_display(),
-            "total_score": certification.total_score,
-            "issued_at": certification.issued_at,
-            "expires_at": certification.expires_at
+            "certificate_id": str(data['certificate_id']),
+            "is_valid": is_valid,
+            "reason": reason,
+            "user_id": data['user_id'],
+            "level": data['level'],
+            "level_display": dict(Certification.LEVEL_CHOICES).get(data['level']),
+            "total_score": data['total_score'],
+            "issued_at": data['issued_at'],
+            "expires_at": data['expires_at']
         })
 
 
+class CertificateRevocationListView(APIView):
+    """Lista de revocación vigente, servida desde memoria"""
+    permission_classes = [AllowAny]
+    
+    @swagger_auto_schema(
+        operation_description="""Lista de certificados revocados, para verificar tokens sin conexión.
+        
+        `superseded` indica, por certificado, la versión de token más alta que ya no
+        se acepta porque cambiaron sus datos firmados (el token lleva la versión en `v`).
+        
+        Incluye el encabezado `ETag` con la versión de la lista; con `If-None-Match`
+        responde 304 si no hubo cambios.
+        """,
+        operation_summary="Lista de revocación de certificados",
+        responses={200: openapi.Response(description="Versión y certificados revocados"), 304: "Sin cambios"}
+    )
+    def get(self, request):
+        revocations = get_revocations()
+        etag = f'"{revocations.version}"'
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = Response({
+                "version": revocations.version,
+                "certificate_ids": sorted(str(certificate_id) for certificate_id in revocations.certificate_ids),
+                "superseded": {
+                    str(certificate_id): token_version
+                    for certificate_id, token_version in sorted(revocations.superseded.items())
+                }
+            })
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+        return response
+
+
 class UserCertificationStatsView(APIView):
     """Estadísticas de certificaciones de un usuario"""
     
@@ -313,6 +543,9 @@ class UserCertificationStatsView(APIView):
                         "username": "usuario",
                         "total_certifications": 5,
                         "active_certifications": 4,
+                        "pending_certifications": 0,
+                        "expired_certifications": 1,
+                        "revoked_certifications": 0,
                         "highest_level": 4,
                         "average_score": 75.5
                     }
@@ -322,30 +555,55 @@ class UserCertificationStatsView(APIView):
         }
     )
     def get(self, request, user_id):
-        user = get_object_or_404(User, pk=user_id)
-        
-        certifications = Certification.objects.filter(user=user)
-        active_certs = certifications.filter(status='active')
-        
-        stats = certifications.aggregate(
-            total=Count('id'),
-            avg_score=Avg('total_score')
-        )
-        
-        active_stats = active_certs.aggregate(
-            active_count=Count('id'),
-            highest_level=models.Max('level')
-        )
+        user = get_object_or_404(User.objects.only('id', 'username'), pk=user_id)
+        stats = CertificationSummary.for_users([user.id])[user.id]
+        return Response({"user_id": user.id, "username": user.username, **stats})
+
+
+class CertificationStatsListView(APIView):
+    """Estadísticas de certificaciones de varios usuarios a la vez"""
+    
+    @swagger_auto_schema(
+        operation_description=f"""Estadísticas de certificaciones de hasta {MAX_STATS_USERS} usuarios.
         
-        # Importar models para Max
-        from django.db.models import Max
-        highest = active_certs.aggregate(highest=Max('level'))
+        Se sirven desde el resumen materializado de cada usuario; los usuarios
+        sin resumen se calculan con una sola consulta de agregados.
+        """,
+        operation_summary="Estadísticas de certificaciones de varios usuarios",
+        manual_parameters=[
+            openapi.Parameter(
+                'users',
+                openapi.IN_QUERY,
+                description="IDs de usuario separados por comas",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={
+            200: openapi.Response(description="Estadísticas por usuario, en el orden recibido"),
+            400: "Parámetro users inválido"
+        }
+    )
+    def get(self, request):
+        try:
+            user_ids = list(dict.fromkeys(
+                int(value) for value in request.query_params.get('users', '').split(',') if value.strip()
+            ))
+        except ValueError:
+            return Response(
+                {"error": "users debe ser una lista de IDs separados por comas"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not user_ids or len(user_ids) > MAX_STATS_USERS:
+            return Response(
+                {"error": f"Indique entre 1 y {MAX_STATS_USERS} usuarios"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response({
-            "user_id": user.id,
-            "username": user.username,
-            "total_certifications": stats['total'] or 0,
-            "active_certifications": active_stats['active_count'] or 0,
-            "highest_level": highest['highest'] or 0,
-            "average_score": round(stats['avg_score'] or 0, 2)
-        })
+        usernames = dict(User.objects.filter(id__in=user_ids).values_list('id', 'username'))
+        user_ids = [user_id for user_id in user_ids if user_id in usernames]
+        stats = CertificationSummary.for_users(user_ids)
+        return Response([
+            {"user_id": user_id, "username": usernames[user_id], **stats[user_id]}
+            for user_id in user_ids
+        ])
@@ -0,0 +1,39 @@
+"""
+Utilidades para exportaciones en streaming con memoria constante.
+
+Las filas se leen por lotes de ids crecientes (paginación por llave, válida en
+cualquier motor de base de datos): cada lote se escribe y se descarta antes de
+leer el siguiente. El CSV se genera línea por línea con un buffer que retorna
+lo escrito.
+"""
+import csv
+
+
+def keyset_rows(queryset, lookups, batch_size):
+    """
+    Itera la consulta como tuplas de `lookups` por lotes de ids crecientes.
+    El primer campo de `lookups` debe ser el id.
+    """
+    queryset = queryset.order_by('id').values_list(*lookups)
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1][0]
+
+
+class Echo:
+    """Buffer de escritura que retorna lo escrito, para generar CSV por líneas"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """Líneas CSV del encabezado y de cada fila"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
@@ -2,7 +2,7 @@
 Admin configuration for organizations app.
 """
 from django.contrib import admin
-from .models import Organization, Team
+from .models import Organization, OrganizationAccess, OrganizationSkillInventory, Team
 
 
 @admin.register(Organization)
@@ -60,4 +60,20 @@ class TeamAdmin(admin.ModelAdmin):
     def member_count(self, obj):
         """Display member count in list."""
         return obj.members.count()
-    member_count.short_description = 'Miembros'
\ No newline at end of file
+    member_count.short_description = 'Miembros'
+
+
+@admin.register(OrganizationAccess)
+class OrganizationAccessAdmin(admin.ModelAdmin):
+    """Admin configuration for OrganizationAccess model."""
+    list_display = ['user', 'organization', 'relation']
+    list_filter = ['relation']
+    search_fields = ['user__username', 'organization__name']
+
+
+@admin.register(OrganizationSkillInventory)
+class OrganizationSkillInventoryAdmin(admin.ModelAdmin):
+    """Admin configuration for OrganizationSkillInventory model."""
+    list_display = ['organization', 'skill', 'level', 'member_count']
+    list_filter = ['level']
+    search_fields = ['organization__name', 'skill__name']
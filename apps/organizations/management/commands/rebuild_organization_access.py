@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.organizations.models import OrganizationAccess
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla de accesos a organizaciones desde propietarios, administradores y equipos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', type=int, action='append', dest='organization_ids',
+            help="Solo reconstruir esta organización (puede repetirse)"
+        )
+
+    def handle(self, *args, **options):
+        rows = OrganizationAccess.rebuild(organization_ids=options['organization_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Accesos guardados: {rows}"))
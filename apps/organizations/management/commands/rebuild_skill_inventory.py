@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.organizations.models import OrganizationSkillInventory
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el inventario de habilidades de las organizaciones desde SkillLevel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', type=int, action='append', dest='organization_ids',
+            help="Solo reconstruir esta organización (puede repetirse)"
+        )
+
+    def handle(self, *args, **options):
+        rows = OrganizationSkillInventory.rebuild(organization_ids=options['organization_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Filas de inventario guardadas: {rows}"))
@@ -0,0 +1,135 @@
+"""
+Operaciones masivas sobre los miembros de un equipo.
+
+Los usuarios se identifican por id, nombre de usuario o correo y se resuelven
+con una sola consulta. Los cambios en la tabla intermedia Team-members se
+aplican con un solo bulk_create (altas) y un solo DELETE (bajas), seguidos de
+la señal membership_changed, y cada identificador recibido lleva su resultado
+en el reporte.
+"""
+import csv
+import io
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Team
+from .signals import membership_changed
+from apps.users.models import User
+
+MAX_BULK_MEMBERS = 5000
+
+OPERATIONS = ['add', 'remove', 'replace']
+
+# Columnas reconocidas en un CSV (si no hay ninguna, se usa la primera columna)
+CSV_IDENTIFIER_COLUMNS = ['user', 'user_id', 'id', 'username', 'email']
+
+
+def identifiers_from_csv(uploaded_file):
+    """
+    Lee los identificadores de un CSV, con o sin encabezado.
+    Lanza ValueError si el archivo no es texto UTF-8.
+    """
+    try:
+        text = uploaded_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError("El archivo debe ser un CSV en UTF-8")
+    rows = [row for row in csv.reader(io.StringIO(text)) if row and any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(name) for name in CSV_IDENTIFIER_COLUMNS if name in header), None)
+    if column is None:
+        column = 0
+    else:
+        rows = rows[1:]
+    return [row[column].strip() if column < len(row) else '' for row in rows]
+
+
+def resolve_users(identifiers):
+    """
+    Resuelve ids, nombres de usuario y correos con una sola consulta.
+    Retorna {identificador: id de usuario} para los identificadores encontrados.
+    """
+    ids = {int(value) for value in identifiers if value.isdigit()}
+    emails = {value.lower() for value in identifiers if '@' in value}
+    usernames = {value for value in identifiers if value and not value.isdigit() and '@' not in value}
+    if not (ids or emails or usernames):
+        return {}
+
+    users = User.objects.filter(
+        Q(id__in=ids) | Q(email__in=emails) | Q(username__in=usernames)
+    ).values_list('id', 'username', 'email')
+    by_id, by_username, by_email = {}, {}, {}
+    for user_id, username, email in users:
+        by_id[user_id] = user_id
+        by_username[username] = user_id
+        if email:
+            by_email[email.lower()] = user_id
+
+    resolved = {}
+    for value in identifiers:
+        if value.isdigit():
+            user_id = by_id.get(int(value))
+        elif '@' in value:
+            user_id = by_email.get(value.lower())
+        else:
+            user_id = by_username.get(value)
+        if user_id is not None:
+            resolved[value] = user_id
+    return resolved
+
+
+def apply_bulk_membership(team, operation, identifiers):
+    """
+    Aplica la operación (add, remove o replace) a los miembros del equipo.
+    Retorna (reporte por fila, resumen de cambios).
+    """
+    resolved = resolve_users(identifiers)
+    requested = set(resolved.values())
+    memberships = Team.members.through.objects.filter(team=team)
+
+    with transaction.atomic():
+        current = set(memberships.values_list('user_id', flat=True))
+        if operation == 'add':
+            to_add, to_remove = requested - current, set()
+        elif operation == 'remove':
+            to_add, to_remove = set(), requested & current
+        else:
+            to_add, to_remove = requested - current, current - requested
+
+        if to_remove:
+            memberships.filter(user_id__in=to_remove).delete()
+        Team.members.through.objects.bulk_create(
+            [Team.members.through(team=team, user_id=user_id) for user_id in sorted(to_add)],
+            batch_size=1000, ignore_conflicts=True
+        )
+        if to_add or to_remove:
+            membership_changed.send(
+                sender=Team, team_id=team.id, organization_id=team.organization_id,
+                user_ids=to_add | to_remove
+            )
+
+    report = []
+    seen = set()
+    for index, value in enumerate(identifiers):
+        user_id = resolved.get(value)
+        if user_id is None:
+            outcome = 'not_found'
+        elif user_id in seen:
+            outcome = 'duplicate'
+        elif operation == 'remove':
+            outcome = 'removed' if user_id in to_remove else 'not_member'
+        else:
+            outcome = 'added' if user_id in to_add else 'already_member'
+        if user_id is not None:
+            seen.add(user_id)
+        report.append({'row': index, 'identifier': value, 'user_id': user_id, 'status': outcome})
+
+    summary = {
+        'added': len(to_add),
+        'removed': len(to_remove),
+        'not_found': sum(row['status'] == 'not_found' for row in report),
+        'member_count': len(current - to_remove) + len(to_add),
+    }
+    return report, summary
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_access(apps, schema_editor):
+    Organization = apps.get_model('organizations', 'Organization')
+    Team = apps.get_model('organizations', 'Team')
+    OrganizationAccess = apps.get_model('organizations', 'OrganizationAccess')
+    rows = {
+        (organization_id, 'owner', user_id)
+        for organization_id, user_id in Organization.objects.values_list('id', 'owner_id')
+    }
+    rows.update(
+        (organization_id, 'administrator', user_id)
+        for organization_id, user_id in Organization.administrators.through.objects.values_list('organization_id', 'user_id')
+    )
+    rows.update(
+        (organization_id, 'member', user_id)
+        for organization_id, user_id in Team.members.through.objects.values_list('team__organization_id', 'user_id')
+    )
+    OrganizationAccess.objects.bulk_create(
+        [OrganizationAccess(organization_id=organization_id, relation=relation, user_id=user_id)
+         for organization_id, relation, user_id in rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relation', models.CharField(choices=[('owner', 'Propietario'), ('administrator', 'Administrador'), ('member', 'Miembro')], max_length=20)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='organizations.organization')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='organization_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Acceso a organización',
+                'verbose_name_plural': 'Accesos a organizaciones',
+                'indexes': [models.Index(fields=['user', 'relation', 'organization'], name='organizatio_user_id_230755_idx')],
+                'unique_together': {('organization', 'relation', 'user')},
+            },
+        ),
+        migrations.RunPython(build_access, migrations.RunPython.noop),
+    ]
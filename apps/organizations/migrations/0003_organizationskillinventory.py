@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_inventory(apps, schema_editor):
+    SkillLevel = apps.get_model('skills', 'SkillLevel')
+    OrganizationSkillInventory = apps.get_model('organizations', 'OrganizationSkillInventory')
+    rows = (
+        SkillLevel.objects.filter(user__organization_access__relation='member')
+        .order_by()
+        .values_list('user__organization_access__organization_id', 'skill_id', 'level')
+        .annotate(total=Count('id'))
+    )
+    OrganizationSkillInventory.objects.bulk_create(
+        [OrganizationSkillInventory(organization_id=organization_id, skill_id=skill_id, level=level, member_count=total)
+         for organization_id, skill_id, level, total in rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0002_organizationaccess'),
+        ('skills', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationSkillInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_inventory', to='organizations.organization')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='organization_inventory', to='skills.skill')),
+            ],
+            options={
+                'verbose_name': 'Inventario de habilidades',
+                'verbose_name_plural': 'Inventarios de habilidades',
+                'unique_together': {('organization', 'skill', 'level')},
+            },
+        ),
+        migrations.RunPython(build_inventory, migrations.RunPython.noop),
+    ]
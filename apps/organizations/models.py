@@ -1,9 +1,14 @@
 """
 Models for organizations app.
 """
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.validators import RegexValidator
 from apps.users.models import User
+from apps.skills.models import Skill, SkillLevel
 
 
 class Organization(models.Model):
@@ -72,14 +77,50 @@ class Organization(models.Model):
     def __str__(self):
         return self.name
     
+    @classmethod
+    def with_counts(cls, queryset=None):
+        """
+        Annotates member and team counts with correlated subqueries, so listing
+        organizations costs the same number of queries for any page size.
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        members = (
+            Team.members.through.objects.filter(team__organization=OuterRef('pk'))
+            .order_by()
+            .values('team__organization')
+            .annotate(total=Count('user_id', distinct=True))
+            .values('total')
+        )
+        teams = (
+            Team.objects.filter(organization=OuterRef('pk'))
+            .order_by()
+            .values('organization')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return queryset.annotate(
+            annotated_total_members=Coalesce(Subquery(members), 0),
+            annotated_total_teams=Coalesce(Subquery(teams), 0),
+        )
+    
+    def can_manage(self, user):
+        """Admins manage any organization; empresa users only those they own or administer."""
+        if user.role == 'admin':
+            return True
+        return self.owner_id == user.id or self.administrators.filter(pk=user.pk).exists()
+    
     @property
     def total_members(self):
         """Returns total number of members in all teams."""
+        if hasattr(self, 'annotated_total_members'):
+            return self.annotated_total_members
         return User.objects.filter(team_members__organization=self).distinct().count()
     
     @property
     def total_teams(self):
         """Returns total number of teams."""
+        if hasattr(self, 'annotated_total_teams'):
+            return self.annotated_total_teams
         return self.teams.count()
 
 
@@ -134,4 +175,230 @@ class Team(models.Model):
     @property
     def member_count(self):
         """Returns the number of members in the team."""
-        return self.members.count()
\ No newline at end of file
+        return self.members.count()
+
+
+class OrganizationAccess(models.Model):
+    """
+    Denormalized (user, organization, relation) rows used to scope querysets by role.
+    Kept in sync by the signals in signals.py; rebuild with rebuild_organization_access.
+    """
+    RELATION_CHOICES = [
+        ('owner', 'Propietario'),
+        ('administrator', 'Administrador'),
+        ('member', 'Miembro'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='organization_access')
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='access')
+    relation = models.CharField(max_length=20, choices=RELATION_CHOICES)
+    
+    class Meta:
+        verbose_name = 'Acceso a organización'
+        verbose_name_plural = 'Accesos a organizaciones'
+        unique_together = ['organization', 'relation', 'user']
+        indexes = [
+            models.Index(fields=['user', 'relation', 'organization']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} -> {self.organization_id} ({self.relation})"
+    
+    @classmethod
+    def organization_ids(cls, user, relations):
+        """Subquery of the organization ids the user reaches through the given relations."""
+        return cls.objects.filter(user=user, relation__in=relations).values('organization_id')
+    
+    @classmethod
+    def add(cls, organization_id, relation, user_ids):
+        cls.objects.bulk_create(
+            [cls(organization_id=organization_id, relation=relation, user_id=user_id) for user_id in user_ids],
+            batch_size=1000, ignore_conflicts=True
+        )
+    
+    @classmethod
+    def sync_owner(cls, organization):
+        cls.objects.filter(organization=organization, relation='owner').exclude(user_id=organization.owner_id).delete()
+        cls.add(organization.id, 'owner', [organization.owner_id])
+    
+    @classmethod
+    def sync_members(cls, organization_id, user_ids):
+        """
+        Grants or revokes member access for the users depending on whether they are still in any team,
+        and updates the organization skill inventory for the users who joined or left.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        members = set(
+            Team.members.through.objects.filter(team__organization_id=organization_id, user_id__in=user_ids)
+            .values_list('user_id', flat=True)
+        )
+        current = set(
+            cls.objects.filter(organization_id=organization_id, relation='member', user_id__in=user_ids)
+            .values_list('user_id', flat=True)
+        )
+        joined, left = members - current, current - members
+        if left:
+            cls.objects.filter(organization_id=organization_id, relation='member', user_id__in=left).delete()
+        cls.add(organization_id, 'member', joined)
+        OrganizationSkillInventory.apply_members(organization_id, joined=joined, left=left)
+    
+    @classmethod
+    def rebuild(cls, organization_ids=None):
+        """Recreates the access rows from owners, administrators and team members. Returns the row count."""
+        organizations = Organization.objects.all()
+        administrators = Organization.administrators.through.objects.all()
+        members = Team.members.through.objects.all().distinct()
+        access = cls.objects.all()
+        if organization_ids is not None:
+            organizations = organizations.filter(id__in=organization_ids)
+            administrators = administrators.filter(organization_id__in=organization_ids)
+            members = members.filter(team__organization_id__in=organization_ids)
+            access = access.filter(organization_id__in=organization_ids)
+        
+        rows = {
+            (organization_id, 'owner', user_id)
+            for organization_id, user_id in organizations.values_list('id', 'owner_id')
+        }
+        rows.update(
+            (organization_id, 'administrator', user_id)
+            for organization_id, user_id in administrators.values_list('organization_id', 'user_id')
+        )
+        rows.update(
+            (organization_id, 'member', user_id)
+            for organization_id, user_id in members.values_list('team__organization_id', 'user_id')
+        )
+        with transaction.atomic():
+            access.delete()
+            cls.objects.bulk_create(
+                [cls(organization_id=organization_id, relation=relation, user_id=user_id)
+                 for organization_id, relation, user_id in rows],
+                batch_size=1000
+            )
+        return len(rows)
+
+
+class OrganizationSkillInventory(models.Model):
+    """
+    Precomputed skill inventory: how many members of the organization have each
+    skill at each level. Updated incrementally when SkillLevel rows or memberships
+    change; rebuild with rebuild_skill_inventory.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='skill_inventory')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='organization_inventory')
+    level = models.PositiveSmallIntegerField()
+    member_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Inventario de habilidades'
+        verbose_name_plural = 'Inventarios de habilidades'
+        unique_together = ['organization', 'skill', 'level']
+    
+    def __str__(self):
+        return f"{self.organization_id} - {self.skill_id} nivel {self.level}: {self.member_count}"
+    
+    @classmethod
+    def apply_counts(cls, counts):
+        """Adds deltas to several rows: counts is {(organization_id, skill_id, level): delta}."""
+        counts = {key: delta for key, delta in counts.items() if delta}
+        if not counts:
+            return
+        cls.objects.bulk_create(
+            [cls(organization_id=organization_id, skill_id=skill_id, level=level)
+             for (organization_id, skill_id, level), delta in counts.items() if delta > 0],
+            ignore_conflicts=True
+        )
+        for (organization_id, skill_id, level), delta in counts.items():
+            cls.objects.filter(organization_id=organization_id, skill_id=skill_id, level=level).update(
+                member_count=F('member_count') + delta
+            )
+    
+    @classmethod
+    def apply_members(cls, organization_id, joined=(), left=()):
+        """Adds the skill levels of users who joined the organization and removes those of users who left."""
+        counts = Counter()
+        for user_ids, sign in ((joined, 1), (left, -1)):
+            if not user_ids:
+                continue
+            rows = (
+                SkillLevel.objects.filter(user_id__in=user_ids)
+                .order_by()
+                .values_list('skill_id', 'level')
+                .annotate(total=Count('id'))
+            )
+            for skill_id, level, total in rows:
+                counts[(organization_id, skill_id, level)] += sign * total
+        cls.apply_counts(counts)
+    
+    @classmethod
+    def apply_skill_level(cls, user_id, previous=None, current=None):
+        """
+        Moves a user's skill level in every organization the user belongs to.
+        previous and current are (skill_id, level) pairs, or None.
+        """
+        if previous == current:
+            return
+        organization_ids = list(
+            OrganizationAccess.objects.filter(user_id=user_id, relation='member').values_list('organization_id', flat=True)
+        )
+        counts = Counter()
+        for organization_id in organization_ids:
+            if previous is not None:
+                counts[(organization_id, *previous)] -= 1
+            if current is not None:
+                counts[(organization_id, *current)] += 1
+        cls.apply_counts(counts)
+    
+    @classmethod
+    def rebuild(cls, organization_ids=None):
+        """Recomputes the inventory from member access rows and SkillLevel. Returns the row count."""
+        membership = {'user__organization_access__relation': 'member'}
+        inventory = cls.objects.all()
+        if organization_ids is not None:
+            # Same filter() call, so both conditions apply to the same access row
+            membership['user__organization_access__organization_id__in'] = organization_ids
+            inventory = inventory.filter(organization_id__in=organization_ids)
+        
+        rows = (
+            SkillLevel.objects.filter(**membership)
+            .order_by()
+            .values_list('user__organization_access__organization_id', 'skill_id', 'level')
+            .annotate(total=Count('id'))
+        )
+        entries = [
+            cls(organization_id=organization_id, skill_id=skill_id, level=level, member_count=total)
+            for organization_id, skill_id, level, total in rows
+        ]
+        with transaction.atomic():
+            inventory.delete()
+            cls.objects.bulk_create(entries, batch_size=1000)
+        return len(entries)
+    
+    @classmethod
+    def report(cls, organization_id, skill_ids=None, min_level=None):
+        """Per-skill member counts, level distribution and average level, from the inventory rows."""
+        rows = cls.objects.filter(organization_id=organization_id, member_count__gt=0).select_related('skill')
+        if skill_ids:
+            rows = rows.filter(skill_id__in=skill_ids)
+        
+        skills = {}
+        for row in rows.order_by('skill_id', 'level'):
+            entry = skills.setdefault(row.skill_id, {
+                'skill_id': row.skill_id,
+                'skill': row.skill.name,
+                'members': 0,
+                'average_level': 0,
+                'distribution': {},
+            })
+            entry['members'] += row.member_count
+            entry['average_level'] += row.level * row.member_count
+            entry['distribution'][row.level] = row.member_count
+        
+        for entry in skills.values():
+            entry['average_level'] = round(entry['average_level'] / entry['members'], 2)
+            if min_level is not None:
+                entry['members_at_or_above'] = sum(
+                    count for level, count in entry['distribution'].items() if level >= min_level
+                )
+        return sorted(skills.values(), key=lambda entry: (-entry['members'], entry['skill']))
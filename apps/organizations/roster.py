@@ -0,0 +1,86 @@
+"""
+Nómina de miembros de una organización.
+
+La nómina se lee directamente de la tabla intermedia Team-members, con el
+usuario y el equipo unidos en la misma consulta: una fila por pertenencia
+(usuario, equipo). La vista la pagina; la exportación CSV la recorre por
+lotes de ids crecientes (paginación por llave) con memoria constante.
+"""
+from .models import Team
+from apps.core.streaming import csv_lines, keyset_rows
+
+# (columna, campo de la consulta)
+ROSTER_FIELDS = [
+    ('membership_id', 'id'),
+    ('id', 'user_id'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('role', 'user__role'),
+    ('team_id', 'team_id'),
+    ('team', 'team__name'),
+]
+
+# Criterios de ordenamiento admitidos (?ordering=, con '-' para descendente)
+ROSTER_ORDERING = {
+    'username': 'user__username',
+    'email': 'user__email',
+    'role': 'user__role',
+    'team': 'team__name',
+    'id': 'user_id',
+}
+
+DEFAULT_ROSTER_ORDERING = 'username'
+
+ROSTER_EXPORT_BATCH_SIZE = 2000
+
+
+def roster_queryset(organization, team_ids=None, role=None):
+    """Pertenencias de la organización, opcionalmente filtradas por equipo y rol"""
+    memberships = Team.members.through.objects.filter(team__organization=organization)
+    if team_ids:
+        memberships = memberships.filter(team_id__in=team_ids)
+    if role:
+        memberships = memberships.filter(user__role=role)
+    return memberships
+
+
+def order_roster(memberships, ordering=None):
+    """
+    Ordena la nómina según un criterio de ROSTER_ORDERING.
+    Lanza ValueError si el criterio no está admitido.
+    """
+    ordering = ordering or DEFAULT_ROSTER_ORDERING
+    descending = ordering.startswith('-')
+    lookup = ROSTER_ORDERING.get(ordering.lstrip('-'))
+    if lookup is None:
+        raise ValueError(ordering)
+    prefix = '-' if descending else ''
+    return memberships.order_by(f'{prefix}{lookup}', f'{prefix}id')
+
+
+def roster_values(memberships):
+    return memberships.values_list(*(lookup for _, lookup in ROSTER_FIELDS))
+
+
+def roster_row(values):
+    """Fila de la nómina como diccionario, con el nombre completo del usuario"""
+    row = dict(zip((column for column, _ in ROSTER_FIELDS), values))
+    row['full_name'] = f"{row['first_name']} {row['last_name']}".strip() or row['username']
+    return row
+
+
+def roster_rows(memberships, batch_size=None):
+    """Itera la nómina completa por lotes de ids de pertenencia crecientes"""
+    lookups = [lookup for _, lookup in ROSTER_FIELDS]
+    return keyset_rows(memberships, lookups, batch_size or ROSTER_EXPORT_BATCH_SIZE)
+
+
+def roster_csv_lines(memberships):
+    columns = [column for column, _ in ROSTER_FIELDS]
+    rows = (roster_row(values) for values in roster_rows(memberships))
+    return csv_lines(
+        columns + ['full_name'],
+        ([row[column] for column in columns] + [row['full_name']] for row in rows)
+    )
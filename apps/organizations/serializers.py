@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Organization, Team
+from .membership import MAX_BULK_MEMBERS, OPERATIONS, identifiers_from_csv
 from apps.users.serializers import UserSerializer
 
 
@@ -128,3 +129,28 @@ class TeamUpdateSerializer(serializers.ModelSerializer):
         if member_ids is not None:
             instance.members.set(member_ids)
         return instance
+
+
+class TeamBulkMembersSerializer(serializers.Serializer):
+    operation = serializers.ChoiceField(choices=OPERATIONS)
+    users = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        max_length=MAX_BULK_MEMBERS,
+        help_text='IDs, nombres de usuario o correos'
+    )
+    file = serializers.FileField(required=False, write_only=True, help_text='CSV con una columna user, id, username o email')
+
+    def validate(self, attrs):
+        if ('users' in attrs) == ('file' in attrs):
+            raise serializers.ValidationError('Indique users o file (CSV), pero no ambos')
+        if 'file' in attrs:
+            try:
+                attrs['users'] = identifiers_from_csv(attrs.pop('file'))
+            except ValueError as exc:
+                raise serializers.ValidationError({'file': str(exc)})
+            if len(attrs['users']) > MAX_BULK_MEMBERS:
+                raise serializers.ValidationError({'file': f'Máximo {MAX_BULK_MEMBERS} filas por archivo'})
+        if not attrs['users'] and attrs['operation'] != 'replace':
+            raise serializers.ValidationError({'users': 'La lista de usuarios está vacía'})
+        return attrs
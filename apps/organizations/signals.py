@@ -0,0 +1,115 @@
+"""
+Signals that keep OrganizationAccess in sync with owners, administrators and
+team memberships, OrganizationSkillInventory in sync with SkillLevel, and the
+organization and team leaderboards in sync with team memberships.
+
+Bulk membership operations write the Team-members table directly (without
+m2m_changed), so they send `membership_changed` instead.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .models import Organization, OrganizationAccess, OrganizationSkillInventory, Team
+from apps.results.leaderboards import sync_member_entries
+from apps.skills.models import SkillLevel
+from apps.users.models import User
+
+# Sent with team_id, organization_id and user_ids when team memberships change in bulk
+membership_changed = Signal()
+
+
+@receiver(post_save, sender=Organization)
+def organization_saved(sender, instance, **kwargs):
+    OrganizationAccess.sync_owner(instance)
+
+
+@receiver(m2m_changed, sender=Organization.administrators.through)
+def administrators_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # clear() sends no pk_set: remember the affected rows before they are deleted
+        related = instance.administered_organizations if reverse else instance.administrators
+        instance._cleared_administrators = set(related.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_administrators', set())
+    pairs = [(instance.pk, pk) for pk in pk_set] if not reverse else [(pk, instance.pk) for pk in pk_set]
+
+    if action == 'post_add':
+        OrganizationAccess.objects.bulk_create(
+            [OrganizationAccess(organization_id=organization_id, relation='administrator', user_id=user_id)
+             for organization_id, user_id in pairs],
+            ignore_conflicts=True
+        )
+    else:
+        for organization_id, user_id in pairs:
+            OrganizationAccess.objects.filter(
+                organization_id=organization_id, relation='administrator', user_id=user_id
+            ).delete()
+
+
+def sync_team_members(team_ids, user_ids):
+    """Recomputes member access of the users in the organizations of the given teams."""
+    organization_ids = set(Team.objects.filter(id__in=team_ids).values_list('organization_id', flat=True))
+    for organization_id in organization_ids:
+        OrganizationAccess.sync_members(organization_id, user_ids)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        related = instance.team_members if reverse else instance.members
+        instance._cleared_members = set(related.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_members', set())
+    if reverse:
+        sync_team_members(pk_set, [instance.pk])
+        sync_member_entries([instance.pk])
+    else:
+        OrganizationAccess.sync_members(instance.organization_id, pk_set)
+        sync_member_entries(pk_set)
+
+
+@receiver(membership_changed)
+def bulk_membership_changed(sender, organization_id, user_ids, **kwargs):
+    OrganizationAccess.sync_members(organization_id, user_ids)
+    sync_member_entries(user_ids)
+
+
+@receiver(pre_delete, sender=Team)
+def team_deleting(sender, instance, **kwargs):
+    # The through rows are deleted without m2m_changed
+    instance._deleted_member_ids = set(instance.members.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Team)
+def team_deleted(sender, instance, **kwargs):
+    member_ids = getattr(instance, '_deleted_member_ids', set())
+    OrganizationAccess.sync_members(instance.organization_id, member_ids)
+    sync_member_entries(member_ids)
+
+
+@receiver(post_save, sender=SkillLevel)
+def skill_level_saved(sender, instance, created, **kwargs):
+    previous = None if created else getattr(instance, '_loaded_skill_level', None)
+    OrganizationSkillInventory.apply_skill_level(instance.user_id, previous, (instance.skill_id, instance.level))
+
+
+@receiver(post_delete, sender=SkillLevel)
+def skill_level_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_skill_level', (instance.skill_id, instance.level))
+    OrganizationSkillInventory.apply_skill_level(instance.user_id, previous, None)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Memberships and skill levels are removed by cascade: take the user out of the
+    # inventories now and drop the member access so the SkillLevel signals skip it
+    access = OrganizationAccess.objects.filter(user=instance, relation='member')
+    for organization_id in access.values_list('organization_id', flat=True):
+        OrganizationSkillInventory.apply_members(organization_id, left=[instance.pk])
+    access.delete()
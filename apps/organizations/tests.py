@@ -1,11 +1,16 @@
 """
 Tests for organizations app.
 """
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from .models import Organization, Team
+from .models import Organization, OrganizationAccess, OrganizationSkillInventory, Team
+from apps.skills.models import Category, Skill, SkillLevel
 from apps.users.models import User
 
 
@@ -270,4 +275,354 @@ class OrganizationPermissionsTest(APITestCase):
         url = reverse('organization-detail', kwargs={'pk': self.organization.id})
         data = {'name': 'Hacked Org'}
         response = self.client.patch(url, data)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrganizationListQueriesTest(APITestCase):
+    """Tests for annotated organization counts."""
+    
+    def setUp(self):
+        """Set up organizations with teams and members."""
+        self.admin = User.objects.create_user(
+            username='listadmin',
+            email='listadmin@example.com',
+            password='pass123',
+            role='admin'
+        )
+        self.members = [
+            User.objects.create_user(username=f'listmember{i}', email=f'listmember{i}@example.com', password='pass123')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin)
+        self.create_organizations(2)
+    
+    def create_organizations(self, count):
+        start = Organization.objects.count()
+        for i in range(start, start + count):
+            organization = Organization.objects.create(
+                name=f'List Org {i}', email=f'listorg{i}@example.com', owner=self.admin
+            )
+            first = Team.objects.create(name='A', organization=organization)
+            second = Team.objects.create(name='B', organization=organization)
+            first.members.add(*self.members)
+            second.members.add(self.members[0])
+    
+    def test_list_counts_without_per_row_queries(self):
+        """Test list cost does not depend on the page size."""
+        with self.assertNumQueries(2):
+            response = self.client.get('/organizations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.create_organizations(8)
+        with self.assertNumQueries(2):
+            response = self.client.get('/organizations/')
+        rows = response.data['results']
+        self.assertEqual(len(rows), 10)
+        self.assertTrue(all(row['total_members'] == 3 and row['total_teams'] == 2 for row in rows))
+        self.assertEqual(rows[0]['owner_name'], 'listadmin')
+    
+    def test_annotated_counts_match_properties(self):
+        """Test annotations and fallback properties agree."""
+        organization = Organization.with_counts().get(name='List Org 0')
+        plain = Organization.objects.get(pk=organization.pk)
+        self.assertEqual((organization.total_members, organization.total_teams), (3, 2))
+        self.assertEqual((plain.total_members, plain.total_teams), (3, 2))
+
+
+class OrganizationRosterTest(APITestCase):
+    """Tests for the organization member roster."""
+    
+    def setUp(self):
+        """Set up an organization with several teams."""
+        self.owner = User.objects.create_user(
+            username='rosterowner',
+            email='rosterowner@example.com',
+            password='pass123',
+            role='empresa'
+        )
+        self.organization = Organization.objects.create(
+            name='Roster Org', email='rosterorg@example.com', owner=self.owner
+        )
+        self.teams = [Team.objects.create(name=f'Team {i}', organization=self.organization) for i in range(4)]
+        self.users = [
+            User.objects.create_user(
+                username=f'roster{i:02d}', email=f'roster{i:02d}@example.com', password='pass123',
+                role='empresa' if i == 0 else 'aprendiz'
+            )
+            for i in range(12)
+        ]
+        for index, user in enumerate(self.users):
+            self.teams[index % 4].members.add(user)
+        self.teams[1].members.add(self.users[0])
+        self.client.force_authenticate(user=self.owner)
+        self.url = f'/organizations/{self.organization.id}/members/'
+    
+    def test_roster_is_paginated_with_constant_queries(self):
+        """Test the roster joins memberships in one query and paginates."""
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 13)
+        self.assertEqual(response.data['total_members'], 12)
+        self.assertEqual(len(response.data['members']), 10)
+        self.assertIsNotNone(response.data['next'])
+        first = response.data['members'][0]
+        self.assertEqual((first['username'], first['team']), ('roster00', 'Team 0'))
+        self.assertEqual(first['full_name'], 'roster00')
+    
+    def test_roster_filters_and_ordering(self):
+        """Test filtering by team and role and sorting."""
+        response = self.client.get(self.url, {'team': f'{self.teams[1].id}', 'ordering': '-username'})
+        self.assertEqual(
+            [row['username'] for row in response.data['members']],
+            ['roster09', 'roster05', 'roster01', 'roster00']
+        )
+        response = self.client.get(self.url, {'role': 'empresa'})
+        self.assertEqual(response.data['count'], 2)
+        
+        self.assertEqual(self.client.get(self.url, {'ordering': 'password'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'team': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_roster_csv_export(self):
+        """Test the complete roster streams as CSV."""
+        response = self.client.get(self.url, {'export_format': 'csv', 'team': f'{self.teams[0].id},{self.teams[1].id}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertTrue(lines[0].startswith('membership_id,id,username'))
+        self.assertEqual(len(lines), 1 + 7)
+
+
+class TeamBulkMembersTest(APITestCase):
+    """Tests for bulk team membership operations."""
+    
+    def setUp(self):
+        """Set up a team and candidate users."""
+        self.owner = User.objects.create_user(
+            username='bulkowner',
+            email='bulkowner@example.com',
+            password='pass123',
+            role='empresa'
+        )
+        self.organization = Organization.objects.create(
+            name='Bulk Org', email='bulkorg@example.com', owner=self.owner
+        )
+        self.team = Team.objects.create(name='Cohort', organization=self.organization)
+        self.users = [
+            User.objects.create_user(username=f'bulk{i}', email=f'bulk{i}@example.com', password='pass123')
+            for i in range(5)
+        ]
+        self.team.members.add(self.users[0])
+        self.client.force_authenticate(user=self.owner)
+        self.url = f'/organizations/{self.organization.id}/teams/{self.team.id}/members/bulk/'
+    
+    def member_ids(self):
+        return set(self.team.members.values_list('id', flat=True))
+    
+    def test_bulk_add_resolves_ids_usernames_and_emails(self):
+        """Test adding by id, username and email with a per-row report."""
+        users = [str(self.users[0].id), 'bulk1', 'BULK2@example.com', str(self.users[1].id), 'ghost']
+        response = self.client.post(self.url, {'operation': 'add', 'users': users}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['status'] for row in response.data['rows']],
+            ['already_member', 'added', 'added', 'duplicate', 'not_found']
+        )
+        self.assertEqual((response.data['added'], response.data['member_count']), (2, 3))
+        self.assertEqual(self.member_ids(), {user.id for user in self.users[:3]})
+    
+    def test_bulk_remove_and_replace(self):
+        """Test removing and replacing members."""
+        self.team.members.add(self.users[1], self.users[2])
+        response = self.client.post(self.url, {'operation': 'remove', 'users': ['bulk1', 'bulk3']}, format='json')
+        self.assertEqual([row['status'] for row in response.data['rows']], ['removed', 'not_member'])
+        self.assertEqual(self.member_ids(), {self.users[0].id, self.users[2].id})
+        
+        response = self.client.post(self.url, {'operation': 'replace', 'users': ['bulk2', 'bulk4']}, format='json')
+        self.assertEqual((response.data['added'], response.data['removed']), (1, 1))
+        self.assertEqual(self.member_ids(), {self.users[2].id, self.users[4].id})
+    
+    def test_bulk_add_from_csv_uses_constant_queries(self):
+        """Test a CSV upload is resolved and applied without per-user queries."""
+        content = 'email,name\n' + ''.join(f'bulk{i}@example.com,Bulk {i}\n' for i in range(5))
+        upload = SimpleUploadedFile('cohort.csv', content.encode(), content_type='text/csv')
+        with self.assertNumQueries(14):
+            response = self.client.post(self.url, {'operation': 'add', 'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['added'], 4)
+        self.assertEqual(len(self.member_ids()), 5)
+    
+    def test_bulk_validation_and_permissions(self):
+        """Test invalid payloads and non-managers are rejected."""
+        response = self.client.post(self.url, {'operation': 'merge', 'users': ['bulk1']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'operation': 'add'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post(self.url, {'operation': 'add', 'users': ['bulk1']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrganizationAccessTest(APITestCase):
+    """Tests for the denormalized organization access table."""
+    
+    def setUp(self):
+        """Set up an organization with two teams."""
+        self.owner = User.objects.create_user(
+            username='accessowner',
+            email='accessowner@example.com',
+            password='pass123',
+            role='empresa'
+        )
+        self.admin = User.objects.create_user(
+            username='accessadmin',
+            email='accessadmin@example.com',
+            password='pass123',
+            role='empresa'
+        )
+        self.learner = User.objects.create_user(
+            username='accesslearner',
+            email='accesslearner@example.com',
+            password='pass123',
+            role='aprendiz'
+        )
+        self.organization = Organization.objects.create(
+            name='Access Org', email='accessorg@example.com', owner=self.owner
+        )
+        self.other = Organization.objects.create(
+            name='Other Org', email='otherorg@example.com', owner=self.admin
+        )
+        self.first = Team.objects.create(name='First', organization=self.organization)
+        self.second = Team.objects.create(name='Second', organization=self.organization)
+    
+    def access(self):
+        return set(OrganizationAccess.objects.filter(organization=self.organization).values_list('user__username', 'relation'))
+    
+    def test_access_follows_owner_administrators_and_members(self):
+        """Test signals keep the access rows in sync."""
+        self.organization.administrators.add(self.admin)
+        self.first.members.add(self.learner)
+        self.learner.team_members.add(self.second)
+        self.assertEqual(self.access(), {
+            ('accessowner', 'owner'), ('accessadmin', 'administrator'), ('accesslearner', 'member')
+        })
+        
+        # Sigue siendo miembro mientras pertenezca a algún equipo
+        self.first.members.remove(self.learner)
+        self.assertIn(('accesslearner', 'member'), self.access())
+        self.second.delete()
+        self.assertNotIn(('accesslearner', 'member'), self.access())
+        
+        self.admin.administered_organizations.clear()
+        self.organization.owner = self.admin
+        self.organization.save()
+        self.assertEqual(self.access(), {('accessadmin', 'owner')})
+    
+    def test_querysets_scoped_by_access(self):
+        """Test each role only reaches its organizations."""
+        self.first.members.add(self.learner)
+        self.client.force_authenticate(user=self.learner)
+        response = self.client.get('/organizations/')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.organization.id])
+        
+        self.organization.administrators.add(self.admin)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/organizations/')
+        self.assertEqual({row['id'] for row in response.data['results']}, {self.organization.id, self.other.id})
+        self.assertEqual(response.data['count'], 2)
+        
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(f'/organizations/{self.other.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_bulk_membership_and_rebuild(self):
+        """Test bulk operations update access and the rebuild command restores it."""
+        self.client.force_authenticate(user=self.owner)
+        self.client.post(
+            f'/organizations/{self.organization.id}/teams/{self.first.id}/members/bulk/',
+            {'operation': 'add', 'users': ['accesslearner']}, format='json'
+        )
+        self.assertIn(('accesslearner', 'member'), self.access())
+        
+        OrganizationAccess.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_organization_access', stdout=out)
+        self.assertIn('Accesos guardados: 3', out.getvalue())
+        self.assertEqual(self.access(), {('accessowner', 'owner'), ('accesslearner', 'member')})
+
+
+class OrganizationSkillInventoryTest(APITestCase):
+    """Tests for the precomputed organization skill inventory."""
+    
+    def setUp(self):
+        """Set up an organization, skills and members with skill levels."""
+        self.owner = User.objects.create_user(
+            username='inventoryowner',
+            email='inventoryowner@example.com',
+            password='pass123',
+            role='empresa'
+        )
+        self.organization = Organization.objects.create(
+            name='Inventory Org', email='inventoryorg@example.com', owner=self.owner
+        )
+        self.team = Team.objects.create(name='Inventory', organization=self.organization)
+        category = Category.objects.create(name='Programación', slug='programacion')
+        self.python = Skill.objects.create(name='Python', slug='python', category=category)
+        self.sql = Skill.objects.create(name='SQL', slug='sql', category=category)
+        self.users = [
+            User.objects.create_user(username=f'inventory{i}', email=f'inventory{i}@example.com', password='pass123')
+            for i in range(3)
+        ]
+        for user, level in zip(self.users, (8, 7, 4)):
+            SkillLevel.objects.create(user=user, skill=self.python, level=level)
+        SkillLevel.objects.create(user=self.users[0], skill=self.sql, level=5)
+        self.team.members.add(*self.users[:2])
+        self.client.force_authenticate(user=self.owner)
+    
+    def inventory(self):
+        return dict(
+            (((skill, level), count) for skill, level, count in OrganizationSkillInventory.objects.filter(
+                organization=self.organization, member_count__gt=0
+            ).values_list('skill__slug', 'level', 'member_count'))
+        )
+    
+    def test_inventory_follows_memberships_and_skill_levels(self):
+        """Test incremental updates match a full rebuild."""
+        self.assertEqual(self.inventory(), {('python', 8): 1, ('python', 7): 1, ('sql', 5): 1})
+        
+        self.team.members.add(self.users[2])
+        level = SkillLevel.objects.get(user=self.users[1], skill=self.python)
+        level.level = 9
+        level.save()
+        SkillLevel.objects.filter(user=self.users[0], skill=self.sql).get().delete()
+        self.team.members.remove(self.users[0])
+        expected = {('python', 9): 1, ('python', 4): 1}
+        self.assertEqual(self.inventory(), expected)
+        
+        self.users[1].delete()
+        self.assertEqual(self.inventory(), {('python', 4): 1})
+        
+        out = StringIO()
+        call_command('rebuild_skill_inventory', stdout=out)
+        self.assertEqual(self.inventory(), {('python', 4): 1})
+    
+    def test_skills_report(self):
+        """Test the report reads counts, distributions and averages from the inventory."""
+        self.client.post(
+            f'/organizations/{self.organization.id}/teams/{self.team.id}/members/bulk/',
+            {'operation': 'add', 'users': ['inventory2']}, format='json'
+        )
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/organizations/{self.organization.id}/skills/', {'min_level': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_members'], 3)
+        python = response.data['skills'][0]
+        self.assertEqual((python['skill'], python['members'], python['members_at_or_above']), ('Python', 3, 2))
+        self.assertEqual(python['distribution'], {4: 1, 7: 1, 8: 1})
+        self.assertEqual(python['average_level'], 6.33)
+        
+        response = self.client.get(f'/organizations/{self.organization.id}/skills/', {'skill': self.sql.id})
+        self.assertEqual([entry['skill'] for entry in response.data['skills']], ['SQL'])
+        response = self.client.get(f'/organizations/{self.organization.id}/skills/', {'min_level': 'alto'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
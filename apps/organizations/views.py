@@ -2,18 +2,25 @@ from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from .models import Organization, Team
+from .models import Organization, OrganizationAccess, OrganizationSkillInventory, Team
 from .serializers import (
     OrganizationListSerializer, OrganizationDetailSerializer,
     OrganizationCreateSerializer, OrganizationUpdateSerializer,
-    TeamListSerializer, TeamCreateSerializer, TeamUpdateSerializer
+    TeamListSerializer, TeamCreateSerializer, TeamUpdateSerializer,
+    TeamBulkMembersSerializer
 )
 from .filters import OrganizationFilter
+from .membership import MAX_BULK_MEMBERS, apply_bulk_membership
+from .roster import ROSTER_ORDERING, order_roster, roster_csv_lines, roster_queryset, roster_row, roster_values
 from apps.users.models import User
+from apps.results.leaderboards import MAX_FILTERED_MEMBERS, scope_entries
+from apps.results.views import leaderboard
 
 
 class OrganizationViewSet(viewsets.ModelViewSet):
@@ -37,10 +44,16 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return Organization.objects.all()
-        elif user.role == 'empresa':
-            return Organization.objects.filter(owner=user) | Organization.objects.filter(administrators=user)
-        return Organization.objects.filter(teams__members=user).distinct()
+            queryset = Organization.objects.all()
+        else:
+            # Una sola búsqueda indexada en la tabla de accesos (sin OR ni DISTINCT)
+            relations = ['owner', 'administrator'] if user.role == 'empresa' else ['member']
+            queryset = Organization.objects.filter(id__in=OrganizationAccess.organization_ids(user, relations))
+        
+        if self.action in ['list', 'retrieve']:
+            # Conteos y propietario en la misma consulta (sin consultas por fila)
+            queryset = Organization.with_counts(queryset.select_related('owner'))
+        return queryset
 
     @extend_schema(
         operation_id='organizations_list',
@@ -93,30 +106,79 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     @extend_schema(
         operation_id='organizations_members_list',
         summary='Listar miembros',
-        description='Obtiene todos los miembros de la organización'
+        description='Nómina paginada de la organización, con una fila por miembro y equipo. '
+                    'Filtros: team (ids separados por comas) y role. '
+                    'Orden: ordering=username|email|role|team|id (con - para descendente). '
+                    'Con export_format=csv descarga la nómina completa en streaming.',
+        parameters=[
+            OpenApiParameter('team', str, description='IDs de equipo separados por comas'),
+            OpenApiParameter('role', str, description='Rol del usuario'),
+            OpenApiParameter('ordering', str, description='username, email, role, team o id'),
+            OpenApiParameter('export_format', str, enum=['csv'], description='csv para descargar la nómina'),
+        ]
     )
     @action(detail=True, methods=['get'])
     def members(self, request, pk=None):
-        """Obtener todos los miembros de una organización"""
+        """Obtener la nómina de miembros de una organización"""
         organization = self.get_object()
-        teams = organization.teams.all()
-        members_data = []
-        
-        for team in teams:
-            for member in team.members.all():
-                members_data.append({
-                    "id": member.id,
-                    "username": member.username,
-                    "email": member.email,
-                    "full_name": member.full_name,
-                    "team": team.name,
-                    "team_id": team.id
-                })
+        params = request.query_params
+        try:
+            team_ids = [int(value) for value in params.get('team', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'team debe ser una lista de ids'}, status=status.HTTP_400_BAD_REQUEST)
+        memberships = roster_queryset(organization, team_ids=team_ids, role=params.get('role'))
+        
+        export_format = params.get('export_format')
+        if export_format is not None:
+            if export_format != 'csv':
+                return Response({'error': 'Formato no soportado. Opciones: csv'}, status=status.HTTP_400_BAD_REQUEST)
+            response = StreamingHttpResponse(roster_csv_lines(memberships), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="organization-{organization.id}-members.csv"'
+            return response
+        
+        try:
+            ordered = order_roster(memberships, params.get('ordering'))
+        except ValueError:
+            return Response(
+                {'error': f"ordering no soportado. Opciones: {', '.join(ROSTER_ORDERING)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page = self.paginate_queryset(roster_values(ordered))
+        data = self.get_paginated_response([roster_row(values) for values in page]).data
+        data['members'] = data.pop('results')
         
         return Response({
             "organization": organization.name,
-            "total_members": len(set([m['id'] for m in members_data])),
-            "members": members_data
+            "total_members": memberships.aggregate(total=Count('user_id', distinct=True))['total'],
+            **data
+        })
+
+    @extend_schema(
+        operation_id='organizations_skills_inventory',
+        summary='Inventario de habilidades',
+        description='Cantidad de miembros por habilidad, distribución por nivel y nivel promedio, '
+                    'desde el inventario precalculado de la organización. '
+                    'Filtros: skill (ids separados por comas); min_level agrega members_at_or_above.',
+        parameters=[
+            OpenApiParameter('skill', str, description='IDs de habilidad separados por comas'),
+            OpenApiParameter('min_level', int, description='Nivel mínimo para members_at_or_above'),
+        ]
+    )
+    @action(detail=True, methods=['get'])
+    def skills(self, request, pk=None):
+        """Inventario de habilidades de los miembros de la organización"""
+        organization = self.get_object()
+        params = request.query_params
+        try:
+            skill_ids = [int(value) for value in params.get('skill', '').split(',') if value.strip()]
+            min_level = int(params['min_level']) if params.get('min_level') else None
+        except ValueError:
+            return Response({'error': 'skill y min_level deben ser números'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'organization': organization.name,
+            'total_members': organization.access.filter(relation='member').count(),
+            'skills': OrganizationSkillInventory.report(organization.id, skill_ids=skill_ids, min_level=min_level),
         })
 
     @extend_schema(
@@ -208,6 +270,92 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         except Team.DoesNotExist:
             return Response({'error': 'Equipo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
+    @extend_schema(
+        operation_id='organizations_team_members_bulk',
+        summary='Operación masiva sobre miembros del equipo',
+        description='Agrega (add), remueve (remove) o reemplaza (replace) miembros del equipo. '
+                    f'Acepta hasta {MAX_BULK_MEMBERS} usuarios por id, nombre de usuario o correo, '
+                    'en la lista users o en un CSV (file). Retorna un reporte por fila.',
+        request=TeamBulkMembersSerializer
+    )
+    @action(detail=True, methods=['post'], url_path='teams/(?P<team_id>[^/.]+)/members/bulk')
+    def bulk_team_members(self, request, pk=None, team_id=None):
+        """Agregar, remover o reemplazar miembros de un equipo en una sola operación"""
+        organization = self.get_object()
+        if not organization.can_manage(request.user):
+            return Response(
+                {'error': 'No tiene permisos para gestionar esta organización'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            team = organization.teams.get(id=team_id)
+        except Team.DoesNotExist:
+            return Response({'error': 'Equipo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = TeamBulkMembersSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        operation = serializer.validated_data['operation']
+        report, summary = apply_bulk_membership(team, operation, serializer.validated_data['users'])
+        return Response({'team': team.name, 'operation': operation, **summary, 'rows': report})
+
+    def _members_leaderboard(self, request, member_scope, member_scope_id, memberships):
+        """
+        Clasificación de los miembros. La global es la materializada de la organización
+        o equipo; las de una evaluación o habilidad filtran esa clasificación por los
+        miembros, por lo que solo se ofrecen a grupos de hasta MAX_FILTERED_MEMBERS.
+        """
+        for scope in ('assessment', 'skill'):
+            scope_id = request.query_params.get(scope)
+            if scope_id is not None:
+                if not scope_id.isdigit():
+                    return Response({'error': f'{scope} debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+                scope_id = int(scope_id)
+                break
+        else:
+            return leaderboard(request, scope_entries(member_scope, member_scope_id), member_scope, member_scope_id)
+        
+        member_ids = memberships.values('user_id').distinct()
+        if member_ids.order_by()[:MAX_FILTERED_MEMBERS + 1].count() > MAX_FILTERED_MEMBERS:
+            return Response(
+                {'error': f'La clasificación por {scope} solo está disponible para grupos de hasta '
+                          f'{MAX_FILTERED_MEMBERS} miembros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        entries = scope_entries(scope, scope_id).filter(user_id__in=member_ids)
+        return leaderboard(request, entries, scope, scope_id, total=entries.count())
+
+    @extend_schema(
+        operation_id='organizations_leaderboard',
+        summary='Clasificación de la organización',
+        description='Clasificación de los miembros de la organización por puntaje global, '
+                    'o por evaluación (?assessment=<id>) o habilidad (?skill=<id>) en organizaciones '
+                    f'de hasta {MAX_FILTERED_MEMBERS} miembros. '
+                    'Admite limit, y around/window para la ventana alrededor de un usuario.'
+    )
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        """Clasificación de los miembros de la organización"""
+        organization = self.get_object()
+        memberships = Team.members.through.objects.filter(team__organization=organization)
+        return self._members_leaderboard(request, 'organization', organization.id, memberships)
+
+    @extend_schema(
+        operation_id='organizations_team_leaderboard',
+        summary='Clasificación del equipo',
+        description='Clasificación de los miembros del equipo, con los mismos parámetros que la de la organización'
+    )
+    @action(detail=True, methods=['get'], url_path='teams/(?P<team_id>[^/.]+)/leaderboard')
+    def team_leaderboard(self, request, pk=None, team_id=None):
+        """Clasificación de los miembros de un equipo"""
+        organization = self.get_object()
+        team = organization.teams.filter(id=team_id).first()
+        if team is None:
+            return Response({'error': 'Equipo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        memberships = Team.members.through.objects.filter(team_id=team.id)
+        return self._members_leaderboard(request, 'team', team.id, memberships)
+
     @extend_schema(
         operation_id='organizations_add_admin_create',
         summary='Agregar administrador',
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Result, UserScore
+from .models import LeaderboardEntry, Result, ScoreBucket, UserScore
 
 @admin.register(Result)
 class ResultAdmin(admin.ModelAdmin):
@@ -15,3 +15,16 @@ class UserScoreAdmin(admin.ModelAdmin):
     search_fields = ('user__username',)
     readonly_fields = ('updated_at',)
     ordering = ('-global_score',)
+
+@admin.register(ScoreBucket)
+class ScoreBucketAdmin(admin.ModelAdmin):
+    list_display = ('assessment', 'bucket', 'count')
+    list_filter = ('assessment',)
+    ordering = ('assessment', 'bucket')
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'scope_id', 'user', 'score', 'updated_at')
+    list_filter = ('scope',)
+    search_fields = ('user__username',)
+    ordering = ('scope', 'scope_id', '-score')
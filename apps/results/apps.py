@@ -5,3 +5,6 @@ class ResultsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.results'
     verbose_name = 'Resultados'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,27 @@
+"""
+Caché de las vistas de resultados por usuario.
+
+Las entradas se invalidan desde las señales de Result una vez confirmada la
+transacción, por lo que la vista nunca sirve datos anteriores al último resultado.
+Solo se cachean datos propios del usuario: el percentil y la posición de sus
+resultados dependen de los resultados de los demás y se calculan en cada
+respuesta con los histogramas por evaluación (una consulta).
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+# Tiempo de vida del análisis de mejora en la caché (segundos)
+IMPROVEMENTS_CACHE_TIMEOUT = 60 * 10
+
+# Campos de los resultados que no se cachean
+LIVE_RESULT_FIELDS = ('percentile', 'rank')
+
+
+def improvements_cache_key(user_id):
+    return f'results:improvements:{user_id}'
+
+
+def invalidate_user_results(*user_ids):
+    """Descarta las entradas en caché de los usuarios al confirmar la transacción"""
+    keys = [improvements_cache_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
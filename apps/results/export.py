@@ -0,0 +1,58 @@
+"""
+Exportación de resultados en NDJSON o CSV con memoria constante.
+
+Las filas se leen por lotes ordenados por id (apps.core.streaming) y con el
+usuario y la evaluación unidos en la misma consulta.
+"""
+import json
+
+from apps.core import streaming
+
+# (columna exportada, campo de la consulta)
+EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('assessment_id', 'assessment_id'),
+    ('assessment_title', 'assessment__title'),
+    ('score', 'score'),
+    ('correct_answers', 'correct_answers'),
+    ('total_questions', 'total_questions'),
+    ('time_taken', 'time_taken'),
+    ('created_at', 'created_at'),
+]
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+EXPORT_BATCH_SIZE = 2000
+
+
+def export_rows(queryset, batch_size=None):
+    """Itera las filas de la consulta como tuplas, por lotes de ids crecientes"""
+    lookups = [lookup for _, lookup in EXPORT_FIELDS]
+    return streaming.keyset_rows(queryset, lookups, batch_size or EXPORT_BATCH_SIZE)
+
+
+def _encode(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def ndjson_lines(rows):
+    columns = [column for column, _ in EXPORT_FIELDS]
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_encode, row))), ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    return streaming.csv_lines(
+        [column for column, _ in EXPORT_FIELDS],
+        ([_encode(value) for value in row] for row in rows)
+    )
+
+
+def export_lines(queryset, export_format):
+    rows = export_rows(queryset)
+    return csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
@@ -1,10 +1,12 @@
 from django_filters import rest_framework as filters
 from .models import Result, UserScore
+from apps.organizations.models import Team
 
 class ResultFilter(filters.FilterSet):
     """Filtros para resultados"""
     user = filters.NumberFilter(help_text="Filtrar por ID de usuario")
     assessment = filters.NumberFilter(help_text="Filtrar por ID de evaluación")
+    organization = filters.NumberFilter(method='filter_organization', help_text="Filtrar por ID de organización (miembros de sus equipos)")
     
     score_min = filters.NumberFilter(field_name='score', lookup_expr='gte', help_text="Puntaje mínimo")
     score_max = filters.NumberFilter(field_name='score', lookup_expr='lte', help_text="Puntaje máximo")
@@ -21,3 +23,7 @@ class ResultFilter(filters.FilterSet):
     class Meta:
         model = Result
         fields = ['user', 'assessment']
+    
+    def filter_organization(self, queryset, name, value):
+        members = Team.members.through.objects.filter(team__organization_id=value).values('user_id')
+        return queryset.filter(user_id__in=members)
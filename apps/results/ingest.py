@@ -0,0 +1,98 @@
+"""
+Importación masiva de resultados desde sistemas externos (LMS).
+
+Un lote se valida completo antes de escribir: la forma de cada fila con un
+serializer sin relaciones, y la existencia de usuarios y evaluaciones con una
+consulta por tabla. Las filas se insertan con bulk_create y el puntaje
+calculado en memoria; como bulk_create no dispara señales, los agregados
+(UserScore, histogramas y clasificaciones) se actualizan una sola vez por
+usuario o evaluación al final del lote.
+
+Cada fila lleva un external_id: las filas ya importadas se omiten, por lo que
+reintentar un lote no duplica resultados.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import leaderboards
+from .models import Result, ScoreBucket, UserScore
+
+User = get_user_model()
+
+MAX_BULK_RESULTS = 5000
+
+
+def validate_rows(rows):
+    """
+    Valida relaciones y reglas entre campos de filas ya deserializadas.
+    Retorna la lista de errores por índice.
+    """
+    from apps.assessments.models import Assessment
+
+    errors = []
+    user_ids = {row['user'] for row in rows}
+    assessment_ids = {row['assessment'] for row in rows}
+    existing_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+    existing_assessments = set(Assessment.objects.filter(id__in=assessment_ids).values_list('id', flat=True))
+    key_counts = Counter(row['external_id'] for row in rows)
+
+    for index, row in enumerate(rows):
+        if row['user'] not in existing_users:
+            errors.append({'index': index, 'error': f"Usuario con id {row['user']} no encontrado"})
+        if row['assessment'] not in existing_assessments:
+            errors.append({'index': index, 'error': f"Evaluación con id {row['assessment']} no encontrada"})
+        if row['correct_answers'] > row['total_questions']:
+            errors.append({'index': index, 'error': "correct_answers no puede ser mayor que total_questions"})
+        if key_counts[row['external_id']] > 1:
+            errors.append({'index': index, 'error': f"external_id {row['external_id']} repetido en el lote"})
+    return errors
+
+
+def ingest_results(rows):
+    """
+    Inserta las filas validadas que aún no fueron importadas.
+    Retorna (resultados creados, cantidad de filas omitidas por estar ya importadas).
+    """
+    keys = [row['external_id'] for row in rows]
+    imported = set(Result.objects.filter(external_id__in=keys).values_list('external_id', flat=True))
+
+    results = []
+    for row in rows:
+        if row['external_id'] in imported:
+            continue
+        result = Result(
+            user_id=row['user'],
+            assessment_id=row['assessment'],
+            correct_answers=row['correct_answers'],
+            total_questions=row['total_questions'],
+            time_taken=row['time_taken'],
+            external_id=row['external_id'],
+        )
+        result.calculate_score()
+        results.append(result)
+
+    with transaction.atomic():
+        Result.objects.bulk_create(results, batch_size=1000)
+        refresh_aggregates(results)
+    return results, len(rows) - len(results)
+
+
+def refresh_aggregates(results):
+    """Actualiza UserScore, histogramas y clasificaciones para resultados insertados sin señales"""
+    if not results:
+        return
+    user_ids = {result.user_id for result in results}
+    UserScore.reconcile(user_ids=user_ids)
+
+    ScoreBucket.apply_counts(Counter(
+        (result.assessment_id, ScoreBucket.bucket_for(result.score)) for result in results
+    ))
+
+    best = {}
+    for result in results:
+        key = (result.assessment_id, result.user_id)
+        best[key] = max(best.get(key, result.score), result.score)
+    leaderboards.record_scores('assessment', best)
+    leaderboards.sync_global_entries(user_ids)
@@ -0,0 +1,319 @@
+"""
+Clasificaciones por evaluación, habilidad, organización y equipo.
+
+Las consultas se hacen sobre LeaderboardEntry con el índice
+(scope, scope_id, -score, user): el top-N es un recorrido del índice con
+LIMIT y la ventana "alrededor de mí" usa paginación por llave (keyset)
+en lugar de OFFSET. El total de cada clasificación se lee de
+LeaderboardTotal, que se actualiza al crear o eliminar entradas.
+
+La posición de un usuario se obtiene contando el lado más corto de la
+clasificación (las entradas de adelante o, con el total, las de atrás), por
+lo que el recorrido del índice es proporcional a la distancia del usuario al
+extremo más cercano, nunca a toda la cohorte.
+
+Las clasificaciones de organización y equipo (ámbitos 'organization' y 'team')
+copian el puntaje global de cada miembro y se mantienen con los cambios de
+membresía (sync_member_entries) y de UserScore (sync_global_entry).
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import LeaderboardEntry, LeaderboardTotal, Result, UserScore
+from apps.organizations.models import Team
+from apps.skills.models import SkillLevel
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+DEFAULT_WINDOW = 5
+MAX_WINDOW = 50
+MEMBER_SCOPES = ('organization', 'team')
+# Las clasificaciones por evaluación o habilidad de una organización o equipo no
+# están materializadas: se filtran por miembros solo en grupos de hasta este tamaño
+MAX_FILTERED_MEMBERS = 500
+
+
+def scope_entries(scope, scope_id=0):
+    return LeaderboardEntry.objects.filter(scope=scope, scope_id=scope_id)
+
+
+# ==================== ACTUALIZACIÓN ====================
+
+def record_score(scope, scope_id, user_id, score):
+    """Registra un puntaje nuevo: solo reemplaza la entrada si la mejora"""
+    entries = scope_entries(scope, scope_id).filter(user_id=user_id)
+    if not entries.filter(score__lt=score).update(score=score, updated_at=timezone.now()):
+        _, created = LeaderboardEntry.objects.get_or_create(
+            scope=scope, scope_id=scope_id, user_id=user_id, defaults={'score': score}
+        )
+        if created:
+            LeaderboardTotal.apply_deltas({(scope, scope_id): 1})
+
+
+def set_score(scope, scope_id, user_id, score, create=True):
+    """Fija el puntaje de la entrada; score=None la elimina. Retorna True si creó la entrada."""
+    entries = scope_entries(scope, scope_id).filter(user_id=user_id)
+    if score is None:
+        deleted, _ = entries.delete()
+        LeaderboardTotal.apply_deltas({(scope, scope_id): -deleted})
+    elif not entries.update(score=score, updated_at=timezone.now()) and create:
+        _, created = LeaderboardEntry.objects.get_or_create(
+            scope=scope, scope_id=scope_id, user_id=user_id, defaults={'score': score}
+        )
+        if created:
+            LeaderboardTotal.apply_deltas({(scope, scope_id): 1})
+        return created
+    return False
+
+
+def record_scores(scope, scores, keep_best=True):
+    """
+    Versión por lotes de record_score/set_score: scores es {(scope_id, user_id): puntaje}.
+    Carga las entradas existentes en una consulta y usa bulk_update/bulk_create.
+    """
+    if not scores:
+        return
+    existing = {
+        (entry.scope_id, entry.user_id): entry
+        for entry in LeaderboardEntry.objects.filter(
+            scope=scope,
+            scope_id__in={scope_id for scope_id, _ in scores},
+            user_id__in={user_id for _, user_id in scores},
+        )
+    }
+    now = timezone.now()
+    changed, missing = [], []
+    for (scope_id, user_id), score in scores.items():
+        entry = existing.get((scope_id, user_id))
+        if entry is None:
+            missing.append(LeaderboardEntry(scope=scope, scope_id=scope_id, user_id=user_id, score=score))
+        elif score > entry.score or (not keep_best and score != entry.score):
+            entry.score = score
+            entry.updated_at = now
+            changed.append(entry)
+    LeaderboardEntry.objects.bulk_update(changed, ['score', 'updated_at'], batch_size=1000)
+    LeaderboardEntry.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+    LeaderboardTotal.apply_deltas(Counter((scope, entry.scope_id) for entry in missing))
+
+
+def forget_user(user_id):
+    """Elimina las entradas del usuario (antes de eliminarlo) y las descuenta de los totales"""
+    entries = LeaderboardEntry.objects.filter(user_id=user_id)
+    counts = entries.order_by().values('scope', 'scope_id').annotate(total=Count('id'))
+    deltas = {(row['scope'], row['scope_id']): -row['total'] for row in counts}
+    entries.delete()
+    LeaderboardTotal.apply_deltas(deltas)
+
+
+def _member_scores(memberships, scores):
+    """{(ámbito, id, usuario): puntaje global} de las membresías de usuarios con puntaje"""
+    wanted = {}
+    for team_id, organization_id, user_id in memberships.values_list('team_id', 'team__organization_id', 'user_id'):
+        if user_id in scores:
+            wanted[('team', team_id, user_id)] = scores[user_id]
+            wanted[('organization', organization_id, user_id)] = scores[user_id]
+    return wanted
+
+
+def sync_member_entries(user_ids):
+    """
+    Alinea las entradas de organización y equipo de los usuarios con sus
+    membresías y su puntaje global: crea las que faltan, elimina las de
+    equipos u organizaciones que dejaron y corrige los puntajes.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    scores = dict(UserScore.objects.filter(user_id__in=user_ids).values_list('user_id', 'global_score'))
+    wanted = _member_scores(Team.members.through.objects.filter(user_id__in=user_ids), scores)
+    existing = {
+        (entry.scope, entry.scope_id, entry.user_id): entry
+        for entry in LeaderboardEntry.objects.filter(scope__in=MEMBER_SCOPES, user_id__in=user_ids)
+    }
+    stale = [key for key in existing if key not in wanted]
+    now = timezone.now()
+    changed = []
+    for key, score in wanted.items():
+        entry = existing.get(key)
+        if entry is not None and entry.score != score:
+            entry.score = score
+            entry.updated_at = now
+            changed.append(entry)
+    missing = [
+        LeaderboardEntry(scope=scope, scope_id=scope_id, user_id=user_id, score=score)
+        for (scope, scope_id, user_id), score in wanted.items() if (scope, scope_id, user_id) not in existing
+    ]
+    if stale:
+        LeaderboardEntry.objects.filter(id__in=[existing[key].id for key in stale]).delete()
+    LeaderboardEntry.objects.bulk_update(changed, ['score', 'updated_at'], batch_size=1000)
+    LeaderboardEntry.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+    deltas = Counter((entry.scope, entry.scope_id) for entry in missing)
+    deltas.subtract(Counter((scope, scope_id) for scope, scope_id, _ in stale))
+    LeaderboardTotal.apply_deltas(deltas)
+
+
+def sync_global_entries(user_ids):
+    """Versión por lotes de sync_global_entry"""
+    record_scores(
+        'global',
+        {(0, user_id): global_score
+         for user_id, global_score in UserScore.objects.filter(user_id__in=user_ids).values_list('user_id', 'global_score')},
+        keep_best=False
+    )
+    sync_member_entries(user_ids)
+
+
+def sync_assessment_entry(user_id, assessment_id):
+    """Recalcula el mejor puntaje del usuario en la evaluación (tras modificar o eliminar)"""
+    best = Result.objects.filter(
+        assessment_id=assessment_id, user_id=user_id
+    ).aggregate(best=Max('score'))['best']
+    set_score('assessment', assessment_id, user_id, best)
+
+
+def sync_global_entry(user_id, create=True):
+    """Copia el puntaje global incremental del usuario a su entrada global"""
+    global_score = (
+        UserScore.objects.filter(user_id=user_id)
+        .values_list('global_score', flat=True)
+        .first()
+    )
+    created = set_score('global', 0, user_id, global_score, create=create)
+    if created or global_score is None:
+        sync_member_entries([user_id])
+    else:
+        LeaderboardEntry.objects.filter(scope__in=MEMBER_SCOPES, user_id=user_id).update(
+            score=global_score, updated_at=timezone.now()
+        )
+
+
+# ==================== CONSULTAS ====================
+
+def _serialize(entries, first_rank):
+    return [
+        {
+            'rank': first_rank + index,
+            'user_id': entry.user_id,
+            'username': entry.user.username,
+            'score': entry.score,
+        }
+        for index, entry in enumerate(entries)
+    ]
+
+
+def _ahead_of(score, user_id):
+    """Entradas que van antes que (score, user_id) en el orden de la clasificación"""
+    return Q(score__gt=score) | Q(score=score, user_id__lt=user_id)
+
+
+def _behind(score, user_id):
+    return Q(score__lt=score) | Q(score=score, user_id__gt=user_id)
+
+
+def top_entries(entries, limit):
+    rows = entries.select_related('user').order_by('-score', 'user_id')[:limit]
+    return _serialize(rows, 1)
+
+
+def _rank(entries, me, total):
+    """
+    Posición del usuario. Se cuentan las entradas de adelante hasta la mitad de
+    la clasificación; si hay más, se cuentan las de atrás y se restan del total.
+    """
+    half = total // 2 + 1
+    ahead = entries.filter(_ahead_of(me.score, me.user_id)).order_by()[:half].count()
+    if ahead < half:
+        return ahead + 1
+    return total - entries.filter(_behind(me.score, me.user_id)).count()
+
+
+def entries_around(entries, user_id, window, total):
+    """
+    Ventana de entradas alrededor del usuario, o None si no está clasificado.
+    Retorna (entrada del usuario, ventana).
+    """
+    me = entries.select_related('user').filter(user_id=user_id).first()
+    if me is None:
+        return None
+    rank = _rank(entries, me, total)
+
+    above = list(
+        entries.filter(_ahead_of(me.score, me.user_id))
+        .select_related('user')
+        .order_by('score', '-user_id')[:window]
+    )
+    above.reverse()
+    below = (
+        entries.filter(_behind(me.score, me.user_id))
+        .select_related('user')
+        .order_by('-score', 'user_id')[:window]
+    )
+    rows = above + [me] + list(below)
+    window_entries = _serialize(rows, rank - len(above))
+    return window_entries[len(above)], window_entries
+
+
+def _int_param(request, name, default, maximum):
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return min(max(value, 1), maximum)
+
+
+def leaderboard_response(request, entries, total=None, **extra):
+    """
+    Arma la respuesta de una clasificación. `total` es la cantidad de entradas
+    (de LeaderboardTotal); si no se indica, se cuentan las entradas.
+
+    Parámetros de consulta:
+    - limit: tamaño del top-N (por defecto 10, máximo 100)
+    - around: id del usuario ("me" para el usuario autenticado) para obtener su ventana
+    - window: entradas antes y después del usuario (por defecto 5, máximo 50)
+    """
+    data = dict(extra)
+    data['total'] = entries.count() if total is None else total
+    around = request.query_params.get('around')
+    if around:
+        user_id = request.user.id if around == 'me' else around
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        window = entries_around(
+            entries, user_id, _int_param(request, 'window', DEFAULT_WINDOW, MAX_WINDOW), data['total']
+        )
+        data['me'], data['entries'] = window if window else (None, [])
+    else:
+        data['entries'] = top_entries(entries, _int_param(request, 'limit', DEFAULT_LIMIT, MAX_LIMIT))
+    return data
+
+
+def rebuild_leaderboards():
+    """Reconstruye todas las clasificaciones desde Result, UserScore y SkillLevel"""
+    rows = [
+        LeaderboardEntry(scope='assessment', scope_id=row['assessment_id'],
+                         user_id=row['user_id'], score=row['best'])
+        for row in Result.objects.order_by().values('assessment_id', 'user_id').annotate(best=Max('score'))
+    ]
+    rows += [
+        LeaderboardEntry(scope='global', scope_id=0, user_id=user_id, score=global_score)
+        for user_id, global_score in UserScore.objects.values_list('user_id', 'global_score')
+    ]
+    rows += [
+        LeaderboardEntry(scope='skill', scope_id=skill_id, user_id=user_id, score=level)
+        for user_id, skill_id, level in SkillLevel.objects.values_list('user_id', 'skill_id', 'level')
+    ]
+    scores = dict(UserScore.objects.values_list('user_id', 'global_score'))
+    rows += [
+        LeaderboardEntry(scope=scope, scope_id=scope_id, user_id=user_id, score=score)
+        for (scope, scope_id, user_id), score in _member_scores(Team.members.through.objects.all(), scores).items()
+    ]
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(rows, batch_size=1000)
+        LeaderboardTotal.rebuild()
+    return len(rows)
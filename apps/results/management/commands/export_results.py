@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.results.export import EXPORT_FORMATS, export_lines
+from apps.results.filters import ResultFilter
+from apps.results.models import Result
+
+# Opciones del comando que se pasan a ResultFilter
+FILTER_OPTIONS = [
+    'user', 'assessment', 'organization', 'score_min', 'score_max',
+    'created_after', 'created_before',
+]
+
+
+class Command(BaseCommand):
+    help = "Exporta resultados en NDJSON o CSV con memoria constante, con los filtros de ResultFilter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson', dest='export_format')
+        parser.add_argument('--output', help="Archivo de salida (por defecto la salida estándar)")
+        for option in FILTER_OPTIONS:
+            parser.add_argument(f"--{option.replace('_', '-')}", dest=option)
+
+    def handle(self, *args, **options):
+        data = {option: options[option] for option in FILTER_OPTIONS if options[option] is not None}
+        result_filter = ResultFilter(data, queryset=Result.objects.all())
+        if not result_filter.is_valid():
+            raise CommandError(result_filter.errors.as_text())
+
+        lines = export_lines(result_filter.qs, options['export_format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.results.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las clasificaciones desde resultados, puntajes globales y niveles de habilidad"
+
+    def handle(self, *args, **options):
+        entries = rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS(f"Entradas de clasificación: {entries}"))
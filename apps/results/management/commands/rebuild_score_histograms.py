@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.results.models import ScoreBucket
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los histogramas de puntajes por evaluación desde los resultados"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--assessment', type=int, action='append', dest='assessment_ids',
+            help="Solo reconstruir esta evaluación (puede repetirse)"
+        )
+
+    def handle(self, *args, **options):
+        buckets = ScoreBucket.rebuild(assessment_ids=options['assessment_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Buckets reconstruidos: {buckets}"))
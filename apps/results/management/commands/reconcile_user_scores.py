@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.results.models import UserScore
+
+
+class Command(BaseCommand):
+    help = "Recalcula los puntajes globales desde los resultados para corregir desvíos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help="Solo reconciliar este usuario (puede repetirse)"
+        )
+
+    def handle(self, *args, **options):
+        fixed = UserScore.reconcile(user_ids=options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Puntajes corregidos: {fixed}"))
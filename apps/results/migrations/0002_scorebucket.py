@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-17 18:20
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_score_buckets(apps, schema_editor):
+    Result = apps.get_model('results', 'Result')
+    ScoreBucket = apps.get_model('results', 'ScoreBucket')
+    counts = {}
+    for assessment_id, score in Result.objects.order_by().values_list('assessment_id', 'score').iterator():
+        key = (assessment_id, min(max(int(score), 0), 100))
+        counts[key] = counts.get(key, 0) + 1
+    ScoreBucket.objects.bulk_create(
+        [ScoreBucket(assessment_id=assessment_id, bucket=bucket, count=count)
+         for (assessment_id, bucket), count in counts.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0002_assessmentattempt'),
+        ('results', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField(help_text='Puntaje entero del 0 al 100', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('count', models.IntegerField(default=0, help_text='Cantidad de resultados en el bucket')),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='assessments.assessment')),
+            ],
+            options={
+                'verbose_name': 'Bucket de Puntaje',
+                'verbose_name_plural': 'Buckets de Puntajes',
+                'unique_together': {('assessment', 'bucket')},
+            },
+        ),
+        migrations.RunPython(build_score_buckets, migrations.RunPython.noop),
+    ]
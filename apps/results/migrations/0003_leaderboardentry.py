@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-17 18:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def build_leaderboards(apps, schema_editor):
+    Result = apps.get_model('results', 'Result')
+    UserScore = apps.get_model('results', 'UserScore')
+    SkillLevel = apps.get_model('skills', 'SkillLevel')
+    LeaderboardEntry = apps.get_model('results', 'LeaderboardEntry')
+    rows = [
+        LeaderboardEntry(scope='assessment', scope_id=row['assessment_id'],
+                         user_id=row['user_id'], score=row['best'])
+        for row in Result.objects.order_by().values('assessment_id', 'user_id').annotate(best=Max('score'))
+    ]
+    rows += [
+        LeaderboardEntry(scope='global', scope_id=0, user_id=user_id, score=global_score)
+        for user_id, global_score in UserScore.objects.values_list('user_id', 'global_score')
+    ]
+    rows += [
+        LeaderboardEntry(scope='skill', scope_id=skill_id, user_id=user_id, score=level)
+        for user_id, skill_id, level in SkillLevel.objects.values_list('user_id', 'skill_id', 'level')
+    ]
+    LeaderboardEntry.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0002_scorebucket'),
+        ('skills', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('assessment', 'Evaluación'), ('skill', 'Habilidad'), ('global', 'Global')], max_length=20)),
+                ('scope_id', models.PositiveBigIntegerField(default=0, help_text='Id de la evaluación o habilidad (0 en global)')),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Entrada de Clasificación',
+                'verbose_name_plural': 'Entradas de Clasificación',
+                'indexes': [models.Index(fields=['scope', 'scope_id', '-score', 'user'], name='results_lea_scope_37cb70_idx')],
+                'unique_together': {('scope', 'scope_id', 'user')},
+            },
+        ),
+        migrations.RunPython(build_leaderboards, migrations.RunPython.noop),
+    ]
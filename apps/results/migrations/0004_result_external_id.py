@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0003_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Identificador en el sistema de origen; evita importar el mismo resultado dos veces', max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 11:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0003_attemptanswer'),
+        ('results', '0004_result_external_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['-created_at', '-id'], name='results_res_created_170a60_idx'),
+        ),
+    ]
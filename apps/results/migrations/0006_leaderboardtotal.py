@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_totals(apps, schema_editor):
+    LeaderboardEntry = apps.get_model('results', 'LeaderboardEntry')
+    LeaderboardTotal = apps.get_model('results', 'LeaderboardTotal')
+    rows = LeaderboardEntry.objects.order_by().values('scope', 'scope_id').annotate(total=Count('id'))
+    LeaderboardTotal.objects.bulk_create([LeaderboardTotal(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0005_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('assessment', 'Evaluación'), ('skill', 'Habilidad'), ('global', 'Global')], max_length=20)),
+                ('scope_id', models.PositiveBigIntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Total de Clasificación',
+                'verbose_name_plural': 'Totales de Clasificación',
+                'unique_together': {('scope', 'scope_id')},
+            },
+        ),
+        migrations.RunPython(build_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def build_member_entries(apps, schema_editor):
+    LeaderboardEntry = apps.get_model('results', 'LeaderboardEntry')
+    LeaderboardTotal = apps.get_model('results', 'LeaderboardTotal')
+    UserScore = apps.get_model('results', 'UserScore')
+    Team = apps.get_model('organizations', 'Team')
+    scores = dict(UserScore.objects.values_list('user_id', 'global_score'))
+    wanted = {}
+    for team_id, organization_id, user_id in Team.members.through.objects.values_list(
+        'team_id', 'team__organization_id', 'user_id'
+    ):
+        if user_id in scores:
+            wanted[('team', team_id, user_id)] = scores[user_id]
+            wanted[('organization', organization_id, user_id)] = scores[user_id]
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(scope=scope, scope_id=scope_id, user_id=user_id, score=score)
+         for (scope, scope_id, user_id), score in wanted.items()],
+        batch_size=1000
+    )
+    totals = Counter((scope, scope_id) for scope, scope_id, _ in wanted)
+    LeaderboardTotal.objects.bulk_create(
+        [LeaderboardTotal(scope=scope, scope_id=scope_id, total=total) for (scope, scope_id), total in totals.items()],
+        batch_size=1000
+    )
+
+
+def drop_member_entries(apps, schema_editor):
+    apps.get_model('results', 'LeaderboardEntry').objects.filter(scope__in=('organization', 'team')).delete()
+    apps.get_model('results', 'LeaderboardTotal').objects.filter(scope__in=('organization', 'team')).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0003_organizationskillinventory'),
+        ('results', '0006_leaderboardtotal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='scope',
+            field=models.CharField(choices=[('assessment', 'Evaluación'), ('skill', 'Habilidad'), ('global', 'Global'), ('organization', 'Organización'), ('team', 'Equipo')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='scope_id',
+            field=models.PositiveBigIntegerField(default=0, help_text='Id de la evaluación, habilidad, organización o equipo (0 en global)'),
+        ),
+        migrations.AlterField(
+            model_name='leaderboardtotal',
+            name='scope',
+            field=models.CharField(choices=[('assessment', 'Evaluación'), ('skill', 'Habilidad'), ('global', 'Global'), ('organization', 'Organización'), ('team', 'Equipo')], max_length=20),
+        ),
+        migrations.RunPython(build_member_entries, drop_member_entries),
+    ]
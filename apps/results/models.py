@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+from .cache import invalidate_user_results
 
 User = get_user_model()
 
@@ -17,6 +21,10 @@ class Result(models.Model):
     correct_answers = models.IntegerField(default=0, help_text="Cantidad de respuestas correctas")
     total_questions = models.IntegerField(default=0, help_text="Total de preguntas")
     time_taken = models.IntegerField(default=0, help_text="Tiempo tomado en segundos")
+    external_id = models.CharField(
+        max_length=100, unique=True, null=True, blank=True,
+        help_text="Identificador en el sistema de origen; evita importar el mismo resultado dos veces"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -28,11 +36,19 @@ class Result(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['assessment', '-score']),
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self):
         return f"{self.user} - {self.assessment.title} - {self.score}%"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores cargados, para calcular diferencias al actualizar
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
     def calculate_score(self):
         """Calcula el puntaje porcentual"""
         if self.total_questions > 0:
@@ -63,15 +79,306 @@ class UserScore(models.Model):
         return f"Score de {self.user.username}: {self.global_score}%"
     
     def update_global_score(self):
-        """Actualiza el puntaje global basado en todos los resultados"""
-        results = Result.objects.filter(user=self.user)
-        if results.exists():
-            self.total_assessments = results.count()
-            self.total_correct = sum(r.correct_answers for r in results)
-            self.total_questions = sum(r.total_questions for r in results)
-            
-            if self.total_questions > 0:
-                self.global_score = (self.total_correct / self.total_questions) * 100
-            
-            self.save()
+        """Recalcula el puntaje global desde todos los resultados (una sola consulta)"""
+        totals = Result.objects.filter(user_id=self.user_id).aggregate(
+            total_assessments=Count('id'),
+            total_correct=Sum('correct_answers'),
+            total_questions=Sum('total_questions'),
+        )
+        self.total_assessments = totals['total_assessments']
+        self.total_correct = totals['total_correct'] or 0
+        self.total_questions = totals['total_questions'] or 0
+        self.global_score = self.calculate_global_score(self.total_correct, self.total_questions)
+        self.save()
         return self.global_score
+    
+    @staticmethod
+    def calculate_global_score(total_correct, total_questions):
+        if total_questions > 0:
+            return (total_correct / total_questions) * 100
+        return 0
+    
+    @classmethod
+    def apply_delta(cls, user_id, assessments=0, correct=0, questions=0):
+        """
+        Aplica un cambio incremental a los totales del usuario con F() y
+        recalcula el puntaje global sin leer su historial de resultados.
+        """
+        totals = cls.objects.filter(user_id=user_id)
+        updated = totals.update(
+            total_assessments=F('total_assessments') + assessments,
+            total_correct=F('total_correct') + correct,
+            total_questions=F('total_questions') + questions,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            # Solo se crea el registro al sumar: al restar, el usuario puede estar siendo eliminado
+            if assessments <= 0:
+                return
+            cls.objects.get_or_create(user_id=user_id)
+            totals.update(
+                total_assessments=F('total_assessments') + assessments,
+                total_correct=F('total_correct') + correct,
+                total_questions=F('total_questions') + questions,
+            )
+        # Segunda sentencia: MySQL evalúa las asignaciones de un UPDATE en orden
+        totals.update(
+            global_score=Case(
+                When(total_questions__gt=0, then=F('total_correct') * 100.0 / F('total_questions')),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+    
+    @classmethod
+    def reconcile(cls, user_ids=None):
+        """
+        Recalcula los puntajes con un solo GROUP BY sobre Result y los guarda
+        con bulk_update/bulk_create. Retorna la cantidad de puntajes corregidos.
+        """
+        results = Result.objects.all()
+        scores = cls.objects.all()
+        if user_ids is not None:
+            results = results.filter(user_id__in=user_ids)
+            scores = scores.filter(user_id__in=user_ids)
+        
+        totals = {
+            row['user_id']: row
+            for row in results.order_by().values('user_id').annotate(
+                assessments=Count('id'),
+                correct=Sum('correct_answers'),
+                questions=Sum('total_questions'),
+            )
+        }
+        
+        changed = []
+        now = timezone.now()
+        for user_score in scores:
+            row = totals.pop(user_score.user_id, None)
+            values = (
+                (row['assessments'], row['correct'] or 0, row['questions'] or 0) if row else (0, 0, 0)
+            )
+            global_score = cls.calculate_global_score(values[1], values[2])
+            if (user_score.total_assessments, user_score.total_correct,
+                    user_score.total_questions, user_score.global_score) != (*values, global_score):
+                user_score.total_assessments, user_score.total_correct, user_score.total_questions = values
+                user_score.global_score = global_score
+                user_score.updated_at = now
+                changed.append(user_score)
+        
+        fields = ['total_assessments', 'total_correct', 'total_questions', 'global_score', 'updated_at']
+        cls.objects.bulk_update(changed, fields, batch_size=1000)
+        
+        # Usuarios con resultados y sin registro de puntaje
+        missing = [
+            cls(
+                user_id=user_id,
+                total_assessments=row['assessments'],
+                total_correct=row['correct'] or 0,
+                total_questions=row['questions'] or 0,
+                global_score=cls.calculate_global_score(row['correct'] or 0, row['questions'] or 0),
+            )
+            for user_id, row in totals.items()
+        ]
+        cls.objects.bulk_create(missing, batch_size=1000)
+        invalidate_user_results(*[user_score.user_id for user_score in changed + missing])
+        return len(changed) + len(missing)
+
+
+class ScoreBucket(models.Model):
+    """
+    Histograma de puntajes por evaluación: cantidad de resultados por punto
+    entero de puntaje (0-100). Se mantiene con cada escritura de Result.
+    """
+    assessment = models.ForeignKey('assessments.assessment', on_delete=models.CASCADE, related_name='score_buckets')
+    bucket = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text="Puntaje entero del 0 al 100"
+    )
+    count = models.IntegerField(default=0, help_text="Cantidad de resultados en el bucket")
+
+    class Meta:
+        verbose_name = 'Bucket de Puntaje'
+        verbose_name_plural = 'Buckets de Puntajes'
+        unique_together = ('assessment', 'bucket')
+
+    def __str__(self):
+        return f"{self.assessment_id} - {self.bucket}: {self.count}"
+    
+    @staticmethod
+    def bucket_for(score):
+        return min(max(int(score), 0), 100)
+    
+    @classmethod
+    def apply_delta(cls, assessment_id, score, delta):
+        """Suma (o resta) resultados al bucket del puntaje con un UPDATE atómico"""
+        bucket = cls.objects.filter(assessment_id=assessment_id, bucket=cls.bucket_for(score))
+        if not bucket.update(count=F('count') + delta) and delta > 0:
+            # Al restar no se crea el bucket: la evaluación puede estar siendo eliminada
+            cls.objects.get_or_create(assessment_id=assessment_id, bucket=cls.bucket_for(score))
+            bucket.update(count=F('count') + delta)
+    
+    @classmethod
+    def apply_counts(cls, counts):
+        """Suma cantidades a varios buckets: counts es {(assessment_id, bucket): cantidad}"""
+        existing = set()
+        assessment_ids = {assessment_id for assessment_id, _ in counts}
+        for key in cls.objects.filter(assessment_id__in=assessment_ids).values_list('assessment_id', 'bucket'):
+            existing.add(key)
+        cls.objects.bulk_create(
+            [cls(assessment_id=assessment_id, bucket=bucket)
+             for assessment_id, bucket in counts.keys() - existing],
+            ignore_conflicts=True
+        )
+        for (assessment_id, bucket), count in counts.items():
+            cls.objects.filter(assessment_id=assessment_id, bucket=bucket).update(count=F('count') + count)
+    
+    @classmethod
+    def rebuild(cls, assessment_ids=None):
+        """Reconstruye los histogramas desde Result. Retorna la cantidad de buckets guardados."""
+        results = Result.objects.all()
+        buckets = cls.objects.all()
+        if assessment_ids is not None:
+            results = results.filter(assessment_id__in=assessment_ids)
+            buckets = buckets.filter(assessment_id__in=assessment_ids)
+        
+        counts = {}
+        for assessment_id, score in results.order_by().values_list('assessment_id', 'score').iterator():
+            key = (assessment_id, cls.bucket_for(score))
+            counts[key] = counts.get(key, 0) + 1
+        
+        with transaction.atomic():
+            buckets.delete()
+            cls.objects.bulk_create(
+                [cls(assessment_id=assessment_id, bucket=bucket, count=count)
+                 for (assessment_id, bucket), count in counts.items()],
+                batch_size=1000
+            )
+        return len(counts)
+
+
+class ScoreDistribution:
+    """Distribución de puntajes de una evaluación con sumas acumuladas para consultas O(1)"""
+
+    def __init__(self, assessment_id, counts):
+        self.assessment_id = assessment_id
+        self.counts = counts
+        # below[b]: cantidad de resultados con bucket menor que b
+        self.below = [0] * 102
+        for bucket, count in enumerate(counts):
+            self.below[bucket + 1] = self.below[bucket] + count
+        self.total = self.below[101]
+
+    @classmethod
+    def for_assessments(cls, assessment_ids):
+        """Carga las distribuciones de varias evaluaciones con una sola consulta"""
+        counts = {assessment_id: [0] * 101 for assessment_id in assessment_ids}
+        rows = ScoreBucket.objects.filter(
+            assessment_id__in=counts, count__gt=0
+        ).values_list('assessment_id', 'bucket', 'count')
+        for assessment_id, bucket, count in rows:
+            counts[assessment_id][bucket] = count
+        return {assessment_id: cls(assessment_id, values) for assessment_id, values in counts.items()}
+
+    def percentile(self, score):
+        """Porcentaje de resultados por debajo del puntaje (los empates cuentan la mitad)"""
+        if not self.total:
+            return None
+        bucket = ScoreBucket.bucket_for(score)
+        return round((self.below[bucket] + self.counts[bucket] / 2) / self.total * 100, 2)
+
+    def rank(self, score):
+        """Posición del puntaje: 1 + resultados en buckets superiores"""
+        if not self.total:
+            return None
+        return self.total - self.below[ScoreBucket.bucket_for(score) + 1] + 1
+
+    def quantile(self, fraction):
+        """Bucket donde se alcanza la fracción indicada de resultados"""
+        if not self.total:
+            return None
+        target = fraction * self.total
+        for bucket in range(101):
+            if self.below[bucket + 1] >= target:
+                return bucket
+        return 100
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Tabla materializada de clasificaciones. Cada fila es el puntaje de un
+    usuario en un ámbito: su mejor resultado en una evaluación, su nivel en
+    una habilidad o su puntaje global, también dentro de cada organización y
+    equipo del que es miembro. Se actualiza con cada escritura de Result y
+    SkillLevel y con cada cambio de membresía.
+    """
+    SCOPE_CHOICES = [
+        ('assessment', 'Evaluación'),
+        ('skill', 'Habilidad'),
+        ('global', 'Global'),
+        ('organization', 'Organización'),
+        ('team', 'Equipo'),
+    ]
+    
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveBigIntegerField(default=0, help_text="Id de la evaluación, habilidad, organización o equipo (0 en global)")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Entrada de Clasificación'
+        verbose_name_plural = 'Entradas de Clasificación'
+        unique_together = ('scope', 'scope_id', 'user')
+        indexes = [
+            models.Index(fields=['scope', 'scope_id', '-score', 'user']),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.scope_id} - {self.user_id}: {self.score}"
+
+
+class LeaderboardTotal(models.Model):
+    """
+    Cantidad de entradas de cada clasificación, mantenida junto con
+    LeaderboardEntry, para responder el total y calcular posiciones sin
+    contar la cohorte en cada lectura.
+    """
+    scope = models.CharField(max_length=20, choices=LeaderboardEntry.SCOPE_CHOICES)
+    scope_id = models.PositiveBigIntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Total de Clasificación'
+        verbose_name_plural = 'Totales de Clasificación'
+        unique_together = ('scope', 'scope_id')
+
+    def __str__(self):
+        return f"{self.scope}:{self.scope_id} - {self.total}"
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """Suma (o resta) entradas a los totales: deltas es {(scope, scope_id): cantidad}"""
+        for (scope, scope_id), delta in deltas.items():
+            if not delta:
+                continue
+            totals = cls.objects.filter(scope=scope, scope_id=scope_id)
+            if not totals.update(total=F('total') + delta) and delta > 0:
+                cls.objects.get_or_create(scope=scope, scope_id=scope_id)
+                totals.update(total=F('total') + delta)
+
+    @classmethod
+    def for_scope(cls, scope, scope_id=0):
+        return cls.objects.filter(scope=scope, scope_id=scope_id).values_list('total', flat=True).first() or 0
+
+    @classmethod
+    def rebuild(cls):
+        """Recalcula todos los totales desde LeaderboardEntry"""
+        rows = (
+            LeaderboardEntry.objects.order_by()
+            .values('scope', 'scope_id')
+            .annotate(total=Count('id'))
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([cls(**row) for row in rows], batch_size=1000)
@@ -1,19 +1,48 @@
 from rest_framework import serializers
-from .models import Result, UserScore
+from .models import Result, ScoreDistribution, UserScore
+from .ingest import MAX_BULK_RESULTS
+
+
+class ResultListSerializer(serializers.ListSerializer):
+    """Carga de una vez las distribuciones de todas las evaluaciones de la página"""
+    
+    def to_representation(self, data):
+        results = list(data.all() if hasattr(data, 'all') else data)
+        distributions = self.context.setdefault('score_distributions', {})
+        missing = {result.assessment_id for result in results} - distributions.keys()
+        if missing:
+            distributions.update(ScoreDistribution.for_assessments(missing))
+        return super().to_representation(results)
+
 
 class ResultSerializer(serializers.ModelSerializer):
     assessment_title = serializers.CharField(source='assessment.title', read_only=True)
     assessment_difficulty = serializers.IntegerField(source='assessment.difficulty', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
+    percentile = serializers.SerializerMethodField()
+    rank = serializers.SerializerMethodField()
     
     class Meta:
         model = Result
         fields = [
             'id', 'user', 'username', 'assessment', 'assessment_title', 
-            'assessment_difficulty', 'score', 'correct_answers', 
-            'total_questions', 'time_taken', 'created_at', 'updated_at'
+            'assessment_difficulty', 'score', 'percentile', 'rank', 'correct_answers', 
+            'total_questions', 'time_taken', 'external_id', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = ResultListSerializer
+    
+    def get_distribution(self, obj):
+        distributions = self.context.setdefault('score_distributions', {})
+        if obj.assessment_id not in distributions:
+            distributions.update(ScoreDistribution.for_assessments([obj.assessment_id]))
+        return distributions[obj.assessment_id]
+    
+    def get_percentile(self, obj):
+        return self.get_distribution(obj).percentile(obj.score)
+    
+    def get_rank(self, obj):
+        return self.get_distribution(obj).rank(obj.score)
 
 
 class ResultCreateSerializer(serializers.ModelSerializer):
@@ -22,15 +51,33 @@ class ResultCreateSerializer(serializers.ModelSerializer):
         fields = ['user', 'assessment', 'correct_answers', 'total_questions', 'time_taken']
     
     def create(self, validated_data):
-        result = Result.objects.create(**validated_data)
+        # El puntaje se calcula antes de guardar: una sola escritura.
+        # El UserScore se actualiza de forma incremental con la señal post_save.
+        result = Result(**validated_data)
         result.calculate_score()
         result.save()
-        
-        # Actualizar puntaje global del usuario
-        user_score, created = UserScore.objects.get_or_create(user=result.user)
-        user_score.update_global_score()
-        
         return result
+    
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.calculate_score()
+        instance.save()
+        return instance
+
+
+class BulkResultRowSerializer(serializers.Serializer):
+    """Fila de una importación masiva; las relaciones se validan por lote"""
+    external_id = serializers.CharField(max_length=100)
+    user = serializers.IntegerField()
+    assessment = serializers.IntegerField()
+    correct_answers = serializers.IntegerField(min_value=0)
+    total_questions = serializers.IntegerField(min_value=1)
+    time_taken = serializers.IntegerField(min_value=0, default=0)
+
+
+class BulkResultSerializer(serializers.Serializer):
+    results = BulkResultRowSerializer(many=True, allow_empty=False, max_length=MAX_BULK_RESULTS)
 
 
 class UserScoreSerializer(serializers.ModelSerializer):
@@ -52,6 +99,42 @@ class UserScoreSerializer(serializers.ModelSerializer):
         return 0
 
 
+class ScoreDistributionSerializer(serializers.Serializer):
+    """Serializer para la distribución de puntajes de una evaluación"""
+    assessment_id = serializers.IntegerField()
+    total = serializers.IntegerField()
+    counts = serializers.ListField(child=serializers.IntegerField())
+    p25 = serializers.SerializerMethodField()
+    median = serializers.SerializerMethodField()
+    p75 = serializers.SerializerMethodField()
+    
+    def get_p25(self, obj):
+        return obj.quantile(0.25)
+    
+    def get_median(self, obj):
+        return obj.quantile(0.5)
+    
+    def get_p75(self, obj):
+        return obj.quantile(0.75)
+
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+    """Serializer para una posición de una clasificación"""
+    rank = serializers.IntegerField()
+    user_id = serializers.IntegerField()
+    username = serializers.CharField()
+    score = serializers.FloatField()
+
+
+class LeaderboardSerializer(serializers.Serializer):
+    """Serializer para una clasificación (top-N o ventana alrededor de un usuario)"""
+    scope = serializers.CharField()
+    scope_id = serializers.IntegerField()
+    total = serializers.IntegerField()
+    me = LeaderboardEntrySerializer(required=False, allow_null=True)
+    entries = LeaderboardEntrySerializer(many=True)
+
+
 class UserStatsSerializer(serializers.Serializer):
     """Serializer para estadísticas del usuario"""
     user_id = serializers.IntegerField()
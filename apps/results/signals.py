@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import leaderboards
+from .cache import invalidate_user_results
+from .models import Result, ScoreBucket, UserScore
+from apps.skills.models import SkillLevel
+
+User = get_user_model()
+
+TRACKED_FIELDS = ('user_id', 'assessment_id', 'correct_answers', 'total_questions', 'score')
+
+
+def _previous_values(instance):
+    """
+    Valores del resultado antes de guardarlo (los cargados desde la base de datos).
+    Se llama en pre_save: la consulta de respaldo todavía lee la fila sin modificar.
+    """
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if all(field in loaded for field in TRACKED_FIELDS):
+        return {field: loaded[field] for field in TRACKED_FIELDS}
+    # Instancia construida a mano o con campos diferidos
+    return Result.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+def _snapshot(instance):
+    instance._loaded_values = {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+
+def _update_user_score(previous, instance):
+    old_user_id = previous['user_id']
+    correct = instance.correct_answers - previous['correct_answers']
+    questions = instance.total_questions - previous['total_questions']
+    if old_user_id == instance.user_id:
+        if correct or questions:
+            UserScore.apply_delta(instance.user_id, correct=correct, questions=questions)
+    else:
+        UserScore.apply_delta(old_user_id, assessments=-1,
+                              correct=-previous['correct_answers'],
+                              questions=-previous['total_questions'])
+        UserScore.apply_delta(instance.user_id, assessments=1,
+                              correct=instance.correct_answers,
+                              questions=instance.total_questions)
+        invalidate_user_results(old_user_id)
+
+
+def _update_score_buckets(previous, instance):
+    old_bucket = (previous['assessment_id'], ScoreBucket.bucket_for(previous['score']))
+    if old_bucket != (instance.assessment_id, ScoreBucket.bucket_for(instance.score)):
+        ScoreBucket.apply_delta(previous['assessment_id'], previous['score'], -1)
+        ScoreBucket.apply_delta(instance.assessment_id, instance.score, 1)
+
+
+def _update_leaderboards(previous, instance):
+    if previous == {field: getattr(instance, field) for field in TRACKED_FIELDS}:
+        return
+    leaderboards.sync_assessment_entry(instance.user_id, instance.assessment_id)
+    leaderboards.sync_global_entry(instance.user_id)
+    if (previous['user_id'], previous['assessment_id']) != (instance.user_id, instance.assessment_id):
+        leaderboards.sync_assessment_entry(previous['user_id'], previous['assessment_id'])
+        leaderboards.sync_global_entry(previous['user_id'])
+
+
+@receiver(pre_save, sender=Result)
+def result_saving(sender, instance, **kwargs):
+    instance._previous_values = _previous_values(instance) if instance.pk is not None else None
+
+
+@receiver(post_save, sender=Result)
+def result_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_values', None)
+    instance._previous_values = None
+    if created:
+        UserScore.apply_delta(
+            instance.user_id,
+            assessments=1,
+            correct=instance.correct_answers,
+            questions=instance.total_questions,
+        )
+        ScoreBucket.apply_delta(instance.assessment_id, instance.score, 1)
+        leaderboards.record_score('assessment', instance.assessment_id, instance.user_id, instance.score)
+        leaderboards.sync_global_entry(instance.user_id)
+    elif previous is not None:
+        _update_user_score(previous, instance)
+        _update_score_buckets(previous, instance)
+        _update_leaderboards(previous, instance)
+    _snapshot(instance)
+    invalidate_user_results(instance.user_id)
+
+
+@receiver(post_delete, sender=Result)
+def result_deleted(sender, instance, **kwargs):
+    UserScore.apply_delta(
+        instance.user_id,
+        assessments=-1,
+        correct=-instance.correct_answers,
+        questions=-instance.total_questions,
+    )
+    ScoreBucket.apply_delta(instance.assessment_id, instance.score, -1)
+    leaderboards.sync_assessment_entry(instance.user_id, instance.assessment_id)
+    # Sin crear la entrada: el usuario puede estar siendo eliminado
+    leaderboards.sync_global_entry(instance.user_id, create=False)
+    invalidate_user_results(instance.user_id)
+
+
+@receiver(post_save, sender=SkillLevel)
+def skill_level_saved(sender, instance, **kwargs):
+    leaderboards.set_score('skill', instance.skill_id, instance.user_id, instance.level)
+
+
+@receiver(post_delete, sender=SkillLevel)
+def skill_level_deleted(sender, instance, **kwargs):
+    leaderboards.set_score('skill', instance.skill_id, instance.user_id, None)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Las entradas se eliminan en cascada sin pasar por set_score: se descuentan de los totales aquí
+    leaderboards.forget_user(instance.pk)
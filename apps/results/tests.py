@@ -1,3 +1,633 @@
+import csv
+import json
+from io import StringIO
+from unittest import mock
+
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.assessments.models import Assessment
+from apps.organizations.models import Organization, Team
+from apps.skills.models import Category, Skill, SkillLevel
+from .leaderboards import scope_entries
+from .models import LeaderboardEntry, LeaderboardTotal, Result, ScoreBucket, ScoreDistribution, UserScore
+
+User = get_user_model()
+
+
+class UserScoreIncrementalTest(TestCase):
+    """Tests para el mantenimiento incremental del UserScore"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='aprendiz', email='aprendiz@test.com', password='testpass123', role='aprendiz')
+        self.other = User.objects.create_user(username='otro', email='otro@test.com', password='testpass123', role='aprendiz')
+        self.assessment = Assessment.objects.create(title='Python Básico')
+
+    def create_result(self, user=None, correct=5, total=10):
+        result = Result(user=user or self.user, assessment=self.assessment,
+                        correct_answers=correct, total_questions=total)
+        result.calculate_score()
+        result.save()
+        return result
+
+    def assertScore(self, user, assessments, correct, questions):
+        user_score = UserScore.objects.get(user=user)
+        self.assertEqual(
+            (user_score.total_assessments, user_score.total_correct, user_score.total_questions),
+            (assessments, correct, questions)
+        )
+        expected = (correct / questions) * 100 if questions else 0
+        self.assertAlmostEqual(user_score.global_score, expected)
+
+    def test_create_updates_score(self):
+        """Test crear resultados acumula los totales del usuario"""
+        self.create_result(correct=5, total=10)
+        self.create_result(correct=9, total=10)
+        self.assertScore(self.user, 2, 14, 20)
+
+    def test_create_does_not_read_history(self):
+        """Test el costo de crear un resultado no depende del historial"""
+        for _ in range(5):
+            self.create_result()
+        with CaptureQueriesContext(connection) as context:
+            self.create_result()
+        self.assertFalse(any(
+            'FROM "results_result"' in query['sql'] for query in context.captured_queries
+        ))
+
+    def test_update_applies_difference(self):
+        """Test actualizar un resultado aplica solo la diferencia"""
+        self.create_result(correct=5, total=10)
+        result = Result.objects.get()
+        result.correct_answers = 8
+        result.save()
+        self.assertScore(self.user, 1, 8, 10)
+
+        # Guardar de nuevo sin cambios no altera los totales
+        result.save()
+        self.assertScore(self.user, 1, 8, 10)
+
+    def test_update_without_loaded_values(self):
+        """Test una instancia diferida o construida a mano aplica la diferencia con los valores anteriores"""
+        result = self.create_result(correct=5, total=10)
+        deferred = Result.objects.only('id', 'correct_answers').get(pk=result.pk)
+        deferred.correct_answers = 7
+        deferred.save(update_fields=['correct_answers'])
+        self.assertScore(self.user, 1, 7, 10)
+
+        rebuilt = Result(pk=result.pk, user=self.user, assessment=self.assessment,
+                         correct_answers=9, total_questions=10, score=90, created_at=result.created_at)
+        rebuilt.save()
+        self.assertScore(self.user, 1, 9, 10)
+        distribution = ScoreDistribution.for_assessments([self.assessment.id])[self.assessment.id]
+        self.assertEqual((distribution.total, distribution.counts[50], distribution.counts[90]), (1, 0, 1))
+
+    def test_update_moves_result_between_users(self):
+        """Test reasignar un resultado mueve sus totales al nuevo usuario"""
+        result = self.create_result(correct=4, total=10)
+        result.user = self.other
+        result.save()
+        self.assertScore(self.user, 0, 0, 0)
+        self.assertScore(self.other, 1, 4, 10)
+
+    def test_delete_subtracts(self):
+        """Test eliminar un resultado descuenta sus totales"""
+        self.create_result(correct=5, total=10)
+        result = self.create_result(correct=9, total=10)
+        result.delete()
+        self.assertScore(self.user, 1, 5, 10)
+
+    def test_delete_user_with_results(self):
+        """Test eliminar un usuario con resultados no recrea su puntaje"""
+        self.create_result()
+        self.user.delete()
+        self.assertFalse(UserScore.objects.filter(user_id=self.user.id).exists())
+
+    def test_reconcile_repairs_drift(self):
+        """Test el comando de reconciliación corrige puntajes desviados"""
+        self.create_result(correct=5, total=10)
+        self.create_result(user=self.other, correct=2, total=10)
+        UserScore.objects.filter(user=self.user).update(total_correct=0, global_score=0)
+        UserScore.objects.filter(user=self.other).delete()
+
+        out = StringIO()
+        call_command('reconcile_user_scores', stdout=out)
+        self.assertIn('Puntajes corregidos: 2', out.getvalue())
+        self.assertScore(self.user, 1, 5, 10)
+        self.assertScore(self.other, 1, 2, 10)
+
+    def test_reconcile_resets_users_without_results(self):
+        """Test la reconciliación deja en cero a usuarios sin resultados"""
+        UserScore.objects.create(user=self.other, total_assessments=3, total_correct=3,
+                                 total_questions=3, global_score=100)
+        self.assertEqual(UserScore.reconcile(user_ids=[self.other.id]), 1)
+        self.assertScore(self.other, 0, 0, 0)
+
+
+class UserImprovementsAPITest(APITestCase):
+    """Tests para el análisis de mejora por usuario"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='aprendiz', email='aprendiz@test.com',
+                                             password='testpass123', role='aprendiz')
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/results/user/{self.user.id}/improvements/'
+        for index, correct in enumerate([2, 5, 9]):
+            assessment = Assessment.objects.create(title=f'Evaluación {index}', difficulty=index + 1)
+            result = Result(user=self.user, assessment=assessment,
+                            correct_answers=correct, total_questions=10)
+            result.calculate_score()
+            with self.captureOnCommitCallbacks(execute=True):
+                result.save()
+
+    def test_improvements_read_only(self):
+        """Test el GET no escribe y no genera consultas N+1"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['recent_results']), 3)
+        self.assertEqual(
+            [area['score'] for area in response.data['improvement_areas']], [20.0, 50.0]
+        )
+        # Puntaje, recientes, más bajos y distribuciones de las evaluaciones
+        self.assertEqual(len(context.captured_queries), 4)
+        self.assertFalse(any(
+            query['sql'].startswith(('UPDATE', 'INSERT')) for query in context.captured_queries
+        ))
+
+    def test_improvements_cached_until_new_result(self):
+        """Test la respuesta se cachea y se invalida con un nuevo resultado"""
+        self.client.get(self.url)
+        # Solo se leen las distribuciones para el percentil y la posición
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        assessment = Assessment.objects.create(title='Nueva')
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.create(user=self.user, assessment=assessment,
+                                  correct_answers=1, total_questions=10, score=10)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['recent_results']), 4)
+        self.assertEqual(response.data['user_score']['total_assessments'], 4)
+
+    def test_improvements_positions_are_live(self):
+        """Test percentil y posición reflejan resultados de otros usuarios aunque la respuesta esté en caché"""
+        response = self.client.get(self.url)
+        latest = response.data['recent_results'][0]
+        self.assertEqual((latest['rank'], latest['percentile']), (1, 50.0))
+
+        other = User.objects.create_user(username='otro', email='otro@test.com',
+                                         password='testpass123', role='aprendiz')
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.create(user=other, assessment_id=latest['assessment'],
+                                  correct_answers=10, total_questions=10, score=100)
+        response = self.client.get(self.url)
+        latest = response.data['recent_results'][0]
+        self.assertEqual((latest['rank'], latest['percentile']), (2, 25.0))
+        self.assertEqual(response.data['user_score']['total_assessments'], 3)
+
+    def test_improvements_without_score(self):
+        """Test usuario sin puntaje retorna 404"""
+        response = self.client.get('/results/user/999999/improvements/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ScoreDistributionTest(APITestCase):
+    """Tests para los histogramas de puntajes por evaluación"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@test.com',
+                                              password='testpass123', role='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.assessment = Assessment.objects.create(title='Python Básico')
+        self.results = []
+        for index, score in enumerate([20, 50, 50, 80, 100]):
+            user = User.objects.create_user(username=f'aprendiz{index}', email=f'aprendiz{index}@test.com',
+                                            password='testpass123', role='aprendiz')
+            self.results.append(Result.objects.create(
+                user=user, assessment=self.assessment, score=score,
+                correct_answers=score // 10, total_questions=10
+            ))
+
+    def distribution(self):
+        return ScoreDistribution.for_assessments([self.assessment.id])[self.assessment.id]
+
+    def test_histogram_maintained_on_writes(self):
+        """Test el histograma se actualiza al crear, modificar y eliminar"""
+        distribution = self.distribution()
+        self.assertEqual(distribution.total, 5)
+        self.assertEqual(distribution.counts[50], 2)
+
+        result = self.results[0]
+        result.score = 90
+        result.save()
+        result = self.results[1]
+        result.delete()
+
+        distribution = self.distribution()
+        self.assertEqual(distribution.total, 4)
+        self.assertEqual((distribution.counts[20], distribution.counts[50], distribution.counts[90]), (0, 1, 1))
+
+    def test_percentile_and_rank(self):
+        """Test percentil y posición a partir del histograma"""
+        distribution = self.distribution()
+        self.assertEqual(distribution.rank(100), 1)
+        self.assertEqual(distribution.rank(50), 3)
+        self.assertEqual(distribution.percentile(50), 40.0)
+        self.assertEqual(distribution.percentile(20), 10.0)
+
+    def test_result_list_constant_queries(self):
+        """Test el listado carga las distribuciones con una sola consulta"""
+        other = Assessment.objects.create(title='Django')
+        Result.objects.create(user=self.admin, assessment=other, score=70,
+                              correct_answers=7, total_questions=10)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/results/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(len(rows), 6)
+        by_score = {row['score']: row for row in rows}
+        self.assertEqual(by_score[100.0]['rank'], 1)
+        self.assertEqual(by_score[70.0]['percentile'], 50.0)
+        self.assertEqual(sum('results_scorebucket' in query['sql'] for query in context.captured_queries), 1)
+
+    def test_distribution_endpoint(self):
+        """Test el endpoint de distribución"""
+        response = self.client.get(f'/results/assessment/{self.assessment.id}/distribution/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(len(response.data['counts']), 101)
+        self.assertEqual(response.data['median'], 50)
+
+        response = self.client.get('/results/assessment/999999/distribution/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rebuild_command(self):
+        """Test la reconstrucción corrige histogramas desviados"""
+        ScoreBucket.objects.filter(assessment=self.assessment).update(count=0)
+        out = StringIO()
+        call_command('rebuild_score_histograms', stdout=out)
+        self.assertIn('Buckets reconstruidos: 4', out.getvalue())
+        self.assertEqual(self.distribution().total, 5)
+
+
+class LeaderboardTest(APITestCase):
+    """Tests para las clasificaciones materializadas"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@test.com',
+                                              password='testpass123', role='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.assessment = Assessment.objects.create(title='Python Básico')
+        self.users = [
+            User.objects.create_user(username=f'aprendiz{index}', email=f'aprendiz{index}@test.com',
+                                     password='testpass123', role='aprendiz')
+            for index in range(6)
+        ]
+        for user, correct in zip(self.users, [3, 9, 5, 7, 1, 5]):
+            Result.objects.create(user=user, assessment=self.assessment, score=correct * 10,
+                                  correct_answers=correct, total_questions=10)
+
+    def test_top_n(self):
+        """Test top-N ordenado por puntaje, con empates por id de usuario"""
+        response = self.client.get(f'/results/assessment/{self.assessment.id}/leaderboard/?limit=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 6)
+        self.assertEqual(
+            [(entry['rank'], entry['username']) for entry in response.data['entries']],
+            [(1, 'aprendiz1'), (2, 'aprendiz3'), (3, 'aprendiz2')]
+        )
+
+    def test_around_user(self):
+        """Test ventana alrededor de un usuario sin OFFSET"""
+        url = f'/results/assessment/{self.assessment.id}/leaderboard/?around={self.users[5].id}&window=1'
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.data['me']['rank'], 4)
+        self.assertEqual(
+            [(entry['rank'], entry['username']) for entry in response.data['entries']],
+            [(3, 'aprendiz2'), (4, 'aprendiz5'), (5, 'aprendiz0')]
+        )
+        self.assertFalse(any('OFFSET' in query['sql'] for query in context.captured_queries))
+
+        response = self.client.get(f'/results/assessment/{self.assessment.id}/leaderboard/?around=me')
+        self.assertIsNone(response.data['me'])
+        response = self.client.get(f'/results/assessment/{self.assessment.id}/leaderboard/?around=abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_total_is_materialized(self):
+        """Test el total se lee de LeaderboardTotal y la posición cuenta el lado más corto"""
+        url = f'/results/assessment/{self.assessment.id}/leaderboard/'
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.data['total'], 6)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in context.captured_queries))
+
+        # Últimos puestos: se cuentan las entradas de atrás
+        response = self.client.get(f'{url}?around={self.users[0].id}&window=1')
+        self.assertEqual(response.data['me']['rank'], 5)
+        response = self.client.get(f'{url}?around={self.users[4].id}&window=1')
+        self.assertEqual(response.data['me']['rank'], 6)
+        self.assertEqual([entry['rank'] for entry in response.data['entries']], [5, 6])
+
+        self.users[2].delete()
+        Result.objects.create(user=self.admin, assessment=self.assessment, score=100,
+                              correct_answers=10, total_questions=10)
+        response = self.client.get(f'{url}?around={self.users[4].id}')
+        self.assertEqual((response.data['total'], response.data['me']['rank']), (6, 6))
+        self.assertEqual(LeaderboardTotal.objects.get(scope='global').total, 6)
+
+    def test_best_score_kept_and_recomputed(self):
+        """Test la entrada guarda el mejor puntaje y se recalcula al eliminar"""
+        user = self.users[0]
+        worse = Result.objects.create(user=user, assessment=self.assessment, score=10,
+                                      correct_answers=1, total_questions=10)
+        entry = LeaderboardEntry.objects.get(scope='assessment', scope_id=self.assessment.id, user=user)
+        self.assertEqual(entry.score, 30)
+
+        Result.objects.filter(user=user, score=30).get().delete()
+        entry.refresh_from_db()
+        self.assertEqual(entry.score, 10)
+        worse.delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(scope='assessment', user=user).exists())
+        self.assertEqual(LeaderboardEntry.objects.get(scope='global', user=user).score, 0)
+
+    def test_global_follows_user_score(self):
+        """Test la entrada global sigue al puntaje global incremental"""
+        entry = LeaderboardEntry.objects.get(scope='global', user=self.users[1])
+        self.assertAlmostEqual(entry.score, UserScore.objects.get(user=self.users[1]).global_score)
+
+    def test_skill_leaderboard(self):
+        """Test la clasificación por habilidad sigue los niveles"""
+        category = Category.objects.create(name='Programación', slug='programacion')
+        skill = Skill.objects.create(name='Python', slug='python', category=category)
+        SkillLevel.objects.create(user=self.users[0], skill=skill, level=4)
+        level = SkillLevel.objects.create(user=self.users[1], skill=skill, level=7)
+
+        response = self.client.get(f'/skills/skills/{skill.id}/leaderboard/')
+        self.assertEqual([entry['score'] for entry in response.data['entries']], [7, 4])
+
+        level.delete()
+        response = self.client.get(f'/skills/skills/{skill.id}/leaderboard/')
+        self.assertEqual(response.data['total'], 1)
+
+    def test_organization_and_team_leaderboards(self):
+        """Test las clasificaciones de organización y equipo filtran por miembros"""
+        owner = User.objects.create_user(username='empresa', email='empresa@test.com',
+                                         password='testpass123', role='empresa')
+        organization = Organization.objects.create(name='Acme', email='acme@test.com', owner=owner)
+        backend = Team.objects.create(name='Backend', organization=organization)
+        frontend = Team.objects.create(name='Frontend', organization=organization)
+        backend.members.add(self.users[0], self.users[1])
+        frontend.members.add(self.users[1], self.users[2])
+
+        response = self.client.get(f'/organizations/{organization.id}/leaderboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['scope'], response.data['total']), ('organization', 3))
+        self.assertEqual(response.data['entries'][0]['username'], 'aprendiz1')
+
+        response = self.client.get(
+            f'/organizations/{organization.id}/teams/{frontend.id}/leaderboard/?assessment={self.assessment.id}'
+        )
+        self.assertEqual(response.data['scope'], 'assessment')
+        self.assertEqual([entry['username'] for entry in response.data['entries']], ['aprendiz1', 'aprendiz2'])
+
+        with mock.patch('apps.organizations.views.MAX_FILTERED_MEMBERS', 1):
+            response = self.client.get(
+                f'/organizations/{organization.id}/teams/{frontend.id}/leaderboard/?assessment={self.assessment.id}'
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_member_leaderboards_follow_memberships_and_scores(self):
+        """Test las clasificaciones de organización y equipo se mantienen con membresías y resultados"""
+        owner = User.objects.create_user(username='empresa', email='empresa@test.com',
+                                         password='testpass123', role='empresa')
+        organization = Organization.objects.create(name='Acme', email='acme@test.com', owner=owner)
+        backend = Team.objects.create(name='Backend', organization=organization)
+        frontend = Team.objects.create(name='Frontend', organization=organization)
+        backend.members.add(self.users[0], self.users[1])
+        frontend.members.add(self.users[1], self.users[2])
+        team_url = f'/organizations/{organization.id}/teams/{backend.id}/leaderboard/'
+
+        response = self.client.get(team_url)
+        self.assertEqual((response.data['scope'], response.data['total']), ('team', 2))
+        self.assertEqual([entry['username'] for entry in response.data['entries']], ['aprendiz1', 'aprendiz0'])
+
+        # Un resultado nuevo mueve el puntaje en las clasificaciones de sus grupos
+        Result.objects.create(user=self.users[0], assessment=Assessment.objects.create(title='SQL'),
+                              score=100, correct_answers=100, total_questions=100)
+        response = self.client.get(team_url)
+        self.assertEqual([entry['username'] for entry in response.data['entries']], ['aprendiz0', 'aprendiz1'])
+
+        backend.members.remove(self.users[1])
+        self.assertEqual(LeaderboardTotal.for_scope('team', backend.id), 1)
+        self.assertEqual(LeaderboardTotal.for_scope('organization', organization.id), 3)
+
+        frontend.delete()
+        self.assertEqual(LeaderboardTotal.for_scope('organization', organization.id), 1)
+        self.assertFalse(scope_entries('team', frontend.id).exists())
+
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards', stdout=StringIO())
+        self.assertEqual(LeaderboardTotal.for_scope('organization', organization.id), 1)
+        self.assertEqual(LeaderboardTotal.for_scope('team', backend.id), 1)
+
+    def test_rebuild_command(self):
+        """Test la reconstrucción regenera todas las entradas"""
+        LeaderboardEntry.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_leaderboards', stdout=out)
+        self.assertIn('Entradas de clasificación: 12', out.getvalue())
+
+
+class CursorPaginationTest(APITestCase):
+    """Tests para la paginación por cursor opcional"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='aprendiz', email='aprendiz@test.com',
+                                             password='testpass123', role='aprendiz')
+        self.client.force_authenticate(user=self.user)
+        assessment = Assessment.objects.create(title='Python Básico')
+        for index in range(25):
+            Result.objects.create(user=self.user, assessment=assessment, score=index,
+                                  correct_answers=index, total_questions=25)
+
+    def test_page_number_by_default(self):
+        """Test sin el modo cursor se mantiene la paginación por número de página"""
+        response = self.client.get(f'/results/user/{self.user.id}/history/')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_cursor_walks_all_pages_without_count_or_offset(self):
+        """Test el modo cursor recorre todas las páginas sin COUNT ni OFFSET"""
+        url = f'/results/user/{self.user.id}/history/?pagination=cursor&page_size=10'
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            for query in context.captured_queries:
+                self.assertNotIn('COUNT(', query['sql'])
+                self.assertNotIn('OFFSET', query['sql'])
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_cursor_is_stable_with_equal_timestamps(self):
+        """Test los empates en created_at se desempatan por id sin repetir ni omitir filas"""
+        Result.objects.update(created_at=timezone.now())
+        url = f'/results/user/{self.user.id}/history/?pagination=cursor&page_size=10'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted(Result.objects.values_list('id', flat=True), reverse=True))
+
+
+class ResultExportTest(APITestCase):
+    """Tests para la exportación en streaming"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@test.com',
+                                              password='testpass123', role='admin')
+        self.client.force_authenticate(user=self.admin)
+        owner = User.objects.create_user(username='empresa', email='empresa@test.com',
+                                         password='testpass123', role='empresa')
+        organization = Organization.objects.create(name='Acme', email='acme@test.com', owner=owner)
+        self.organization = organization
+        team = Team.objects.create(name='Backend', organization=organization)
+        assessment = Assessment.objects.create(title='Python, "Básico"')
+        self.members = []
+        for index in range(5):
+            user = User.objects.create_user(username=f'aprendiz{index}', email=f'aprendiz{index}@test.com',
+                                            password='testpass123', role='aprendiz')
+            if index < 3:
+                team.members.add(user)
+                self.members.append(user.id)
+            Result.objects.create(user=user, assessment=assessment, score=index * 20,
+                                  correct_answers=index, total_questions=5)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_ndjson_with_organization_filter(self):
+        """Test NDJSON filtrado por organización"""
+        response = self.client.get(f'/results/export/?organization={self.organization.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(sorted(row['user_id'] for row in rows), self.members)
+        self.assertEqual(rows[0]['assessment_title'], 'Python, "Básico"')
+
+    def test_export_csv_in_batches(self):
+        """Test CSV por lotes de ids con el usuario y la evaluación unidos en SQL"""
+        with mock.patch('apps.results.export.EXPORT_BATCH_SIZE', 2):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get('/results/export/?export_format=csv&score_min=20')
+                rows = list(csv.reader(self.read(response).splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'user_id', 'username'])
+        self.assertEqual(len(rows), 5)
+        # Tres lotes con datos y uno vacío que termina el recorrido
+        self.assertEqual(sum('results_result' in query['sql'] for query in context.captured_queries), 3)
+
+    def test_export_invalid_format_and_permissions(self):
+        """Test formato no soportado y acceso de aprendiz"""
+        response = self.client.get('/results/export/?export_format=xml')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(user=User.objects.get(username='aprendiz0'))
+        response = self.client.get('/results/export/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_command(self):
+        """Test el comando export_results"""
+        out = StringIO()
+        call_command('export_results', '--format', 'csv', '--score-min', '60', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+class ResultBulkCreateTest(APITestCase):
+    """Tests para la importación masiva de resultados"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@test.com',
+                                              password='testpass123', role='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.assessment = Assessment.objects.create(title='Python Básico')
+        self.users = [
+            User.objects.create_user(username=f'aprendiz{index}', email=f'aprendiz{index}@test.com',
+                                     password='testpass123', role='aprendiz')
+            for index in range(3)
+        ]
+        # Un resultado previo registrado por la vía normal
+        Result.objects.create(user=self.users[0], assessment=self.assessment, score=50,
+                              correct_answers=5, total_questions=10)
+
+    def rows(self, count=30):
+        return [
+            {
+                'external_id': f'lms-{index}',
+                'user': self.users[index % 3].id,
+                'assessment': self.assessment.id,
+                'correct_answers': index % 11,
+                'total_questions': 10,
+                'time_taken': 300,
+            }
+            for index in range(count)
+        ]
+
+    def test_bulk_create_updates_aggregates(self):
+        """Test el lote se inserta y los agregados quedan consistentes"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/results/bulk/', {'results': self.rows()}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 30, 'skipped': 0})
+        self.assertLess(len(context.captured_queries), 40)
+        self.assertEqual(Result.objects.get(external_id='lms-7').score, 70.0)
+
+        expected = {user_score.user_id: user_score for user_score in UserScore.objects.all()}
+        UserScore.reconcile()
+        for user_score in UserScore.objects.all():
+            self.assertEqual(user_score.total_assessments, expected[user_score.user_id].total_assessments)
+            self.assertAlmostEqual(user_score.global_score, expected[user_score.user_id].global_score)
+
+        distribution = ScoreDistribution.for_assessments([self.assessment.id])[self.assessment.id]
+        self.assertEqual(distribution.total, 31)
+        entry = LeaderboardEntry.objects.get(scope='assessment', scope_id=self.assessment.id, user=self.users[0])
+        self.assertEqual(entry.score, 100.0)
+        self.assertEqual(LeaderboardEntry.objects.filter(scope='global').count(), 3)
+
+    def test_retry_is_idempotent(self):
+        """Test reintentar el lote no duplica resultados"""
+        self.client.post('/results/bulk/', {'results': self.rows(10)}, format='json')
+        response = self.client.post('/results/bulk/', {'results': self.rows(20)}, format='json')
+        self.assertEqual(response.data, {'created': 10, 'skipped': 10})
+        self.assertEqual(Result.objects.count(), 21)
+        self.assertEqual(UserScore.objects.get(user=self.users[1]).total_assessments, 7)
+
+    def test_invalid_batch_rejected(self):
+        """Test un lote con errores se rechaza completo"""
+        rows = self.rows(5)
+        rows[1]['user'] = 999999
+        rows[2]['correct_answers'] = 11
+        rows[3]['external_id'] = 'lms-0'
+        response = self.client.post('/results/bulk/', {'results': rows}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted({error['index'] for error in response.data['results']}), [0, 1, 2, 3])
+        self.assertEqual(Result.objects.count(), 1)
 
-# Create your tests here.
+    def test_bulk_requires_admin_or_empresa(self):
+        """Test aprendiz no puede importar"""
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post('/results/bulk/', {'results': self.rows(1)}, format='json')
+        self.assertEqual(response.status_code, 403)
@@ -2,18 +2,32 @@ from django.urls import path
 from .views import (
     ResultListCreateView,
     ResultDetailView,
+    ResultExportView,
+    ResultBulkCreateView,
     UserResultHistoryView, 
     UserImprovementsView,
-    UserStatsView
+    UserStatsView,
+    AssessmentScoreDistributionView,
+    GlobalLeaderboardView,
+    AssessmentLeaderboardView
 )
 
 urlpatterns = [
     # CRUD de Results
     path('', ResultListCreateView.as_view(), name='result-list-create'),
     path('<int:pk>/', ResultDetailView.as_view(), name='result-detail'),
+    path('bulk/', ResultBulkCreateView.as_view(), name='result-bulk-create'),
+    path('export/', ResultExportView.as_view(), name='result-export'),
     
     # Endpoints por usuario
     path('user/<int:id>/history/', UserResultHistoryView.as_view(), name='user-history'),
     path('user/<int:id>/improvements/', UserImprovementsView.as_view(), name='user-improvements'),
     path('user/<int:id>/stats/', UserStatsView.as_view(), name='user-stats'),
+    
+    # Endpoints por evaluación
+    path('assessment/<int:id>/distribution/', AssessmentScoreDistributionView.as_view(), name='assessment-distribution'),
+    path('assessment/<int:id>/leaderboard/', AssessmentLeaderboardView.as_view(), name='assessment-leaderboard'),
+    
+    # Clasificación global
+    path('leaderboard/', GlobalLeaderboardView.as_view(), name='global-leaderboard'),
 ]
@@ -4,18 +4,29 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.db.models import Avg, Max, Min, Sum
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Result, UserScore
+from .models import LeaderboardTotal, Result, ScoreDistribution, UserScore
 from .serializers import (
     ResultSerializer, 
     ResultCreateSerializer,
+    ScoreDistributionSerializer,
+    BulkResultSerializer,
+    LeaderboardSerializer,
     UserScoreSerializer,
     UserStatsSerializer
 )
 from .filters import ResultFilter
-from apps.users.permissions import IsAdminOrEmpresaOrReadOnly, CanManageResults
+from .leaderboards import leaderboard_response, scope_entries
+from .export import EXPORT_FORMATS, export_lines
+from .ingest import ingest_results, validate_rows
+from .cache import improvements_cache_key, IMPROVEMENTS_CACHE_TIMEOUT, LIVE_RESULT_FIELDS
+from apps.users.permissions import IsAdminOrEmpresa, IsAdminOrEmpresaOrReadOnly, CanManageResults
 
 # ==================== CRUD DE RESULTS ====================
 
@@ -30,6 +41,8 @@ class ResultListCreateView(generics.ListCreateAPIView):
     search_fields = ['user__username', 'assessment__title']
     ordering_fields = ['id', 'score', 'correct_answers', 'time_taken', 'created_at']
     ordering = ['-created_at']
+    # Modo cursor (?pagination=cursor), alineado con los índices (-created_at, -id) y (user, -created_at)
+    cursor_ordering = ['-created_at', '-id']
     permission_classes = [CanManageResults]
     
     def get_queryset(self):
@@ -140,10 +153,112 @@ class ResultDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
+# ==================== IMPORTACIÓN MASIVA ====================
+
+class ResultBulkCreateView(APIView):
+    """
+    Import results in bulk from an external LMS.
+    - Admin/Empresa only
+    """
+    permission_classes = [IsAdminOrEmpresa]
+    
+    @swagger_auto_schema(
+        operation_description="""Importar resultados en lote (hasta 5000 por petición).
+        
+        El lote se valida completo y se rechaza si alguna fila tiene errores.
+        El puntaje se calcula en el servidor. Cada fila debe tener un `external_id`
+        único: las filas ya importadas se omiten, así que un lote se puede reintentar.
+        """,
+        request_body=BulkResultSerializer,
+        responses={
+            201: openapi.Response(
+                description="Lote importado",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'skipped': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    }
+                )
+            ),
+            400: openapi.Response(description="Errores de validación por fila"),
+            409: openapi.Response(description="El lote se está importando en otra petición")
+        }
+    )
+    def post(self, request):
+        serializer = BulkResultSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows = serializer.validated_data['results']
+        errors = validate_rows(rows)
+        if errors:
+            return Response({"results": errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            created, skipped = ingest_results(rows)
+        except IntegrityError:
+            return Response(
+                {"error": "Algunos resultados del lote se importaron al mismo tiempo en otra petición; reintente"},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response({'created': len(created), 'skipped': skipped}, status=status.HTTP_201_CREATED)
+
+
+# ==================== EXPORTACIÓN ====================
+
+class ResultExportView(generics.GenericAPIView):
+    """
+    Stream all results matching ResultFilter as NDJSON or CSV.
+    - Admin/Empresa only
+    """
+    queryset = Result.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ResultFilter
+    permission_classes = [IsAdminOrEmpresa]
+    pagination_class = None
+    
+    @swagger_auto_schema(
+        operation_description="""Exportar resultados en streaming, con memoria constante.
+        
+        Acepta los mismos filtros que el listado de resultados (user, assessment,
+        organization, score_min, score_max, created_after, created_before, ...).
+        
+        **Formatos (export_format):** ndjson (por defecto) o csv.
+        """,
+        manual_parameters=[
+            openapi.Parameter('export_format', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(EXPORT_FORMATS), description="Formato de exportación"),
+        ],
+        responses={
+            200: openapi.Response(description="Archivo NDJSON o CSV"),
+            400: openapi.Response(description="Formato no soportado")
+        }
+    )
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Formato no soportado. Opciones: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_lines(queryset, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        filename = f"results-{timezone.now():%Y%m%d%H%M%S}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 # ==================== HISTORIAL Y ESTADÍSTICAS POR USUARIO ====================
 
 class UserResultHistoryView(generics.ListAPIView):
     serializer_class = ResultSerializer
+    cursor_ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         user_id = self.kwargs['id']
@@ -183,32 +298,57 @@ class UserImprovementsView(APIView):
         }
     )
     def get(self, request, id):
-        # Obtener o crear UserScore
-        try:
-            user_score = UserScore.objects.get(user_id=id)
-        except UserScore.DoesNotExist:
+        cache_key = improvements_cache_key(id)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(self.with_positions(data))
+        
+        data = self.build_improvements(id)
+        if data is None:
             return Response(
                 {"error": "No se encontraron datos para este usuario"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        # Se cachean solo los datos del usuario: percentil y posición cambian con los resultados de otros
+        cached = dict(data, recent_results=[
+            dict(row, **{field: None for field in LIVE_RESULT_FIELDS}) for row in data['recent_results']
+        ])
+        cache.set(cache_key, cached, IMPROVEMENTS_CACHE_TIMEOUT)
+        return Response(data)
+    
+    def with_positions(self, data):
+        """Completa percentil y posición de los resultados recientes con las distribuciones actuales"""
+        distributions = ScoreDistribution.for_assessments({row['assessment'] for row in data['recent_results']})
+        recent_results = []
+        for row in data['recent_results']:
+            distribution = distributions[row['assessment']]
+            recent_results.append(dict(
+                row, percentile=distribution.percentile(row['score']), rank=distribution.rank(row['score'])
+            ))
+        return dict(data, recent_results=recent_results)
+    
+    def build_improvements(self, user_id):
+        """Arma el análisis de solo lectura; el UserScore ya se mantiene de forma incremental"""
+        user_score = UserScore.objects.select_related('user').filter(user_id=user_id).first()
+        if user_score is None:
+            return None
         
-        # Actualizar datos
-        user_score.update_global_score()
+        results = Result.objects.filter(user_id=user_id).select_related('assessment', 'user')
         
-        # Obtener últimos 5 resultados
-        recent_results = Result.objects.filter(user_id=id).order_by('-created_at')[:5]
+        # Últimos 5 resultados
+        recent_results = results.order_by('-created_at')[:5]
         
         # Analizar áreas de mejora
-        low_scores = Result.objects.filter(user_id=id, score__lt=60).order_by('score')[:3]
-        improvement_areas = []
-        
-        for result in low_scores:
-            improvement_areas.append({
+        low_scores = results.filter(score__lt=60).order_by('score')[:3]
+        improvement_areas = [
+            {
                 'assessment': result.assessment.title,
                 'score': result.score,
                 'difficulty': result.assessment.difficulty,
                 'date': result.created_at
-            })
+            }
+            for result in low_scores
+        ]
         
         # Generar recomendaciones
         if user_score.global_score < 50:
@@ -218,12 +358,12 @@ class UserImprovementsView(APIView):
         else:
             recommendations = "¡Excelente trabajo! Intenta evaluaciones de mayor dificultad para seguir mejorando."
         
-        return Response({
+        return {
             'user_score': UserScoreSerializer(user_score).data,
             'recent_results': ResultSerializer(recent_results, many=True).data,
             'improvement_areas': improvement_areas,
             'recommendations': recommendations
-        })
+        }
 
 
 class UserStatsView(APIView):
@@ -262,3 +402,84 @@ class UserStatsView(APIView):
         }
         
         return Response(data)
+
+
+# ==================== DISTRIBUCIÓN POR EVALUACIÓN ====================
+
+class AssessmentScoreDistributionView(APIView):
+    @swagger_auto_schema(
+        operation_description="""Obtener la distribución de puntajes de una evaluación.
+        
+        `counts` tiene 101 posiciones: la cantidad de resultados por punto entero de puntaje (0-100).
+        """,
+        responses={
+            200: ScoreDistributionSerializer,
+            404: openapi.Response(description="Evaluación no encontrada")
+        }
+    )
+    def get(self, request, id):
+        from apps.assessments.models import Assessment
+        
+        if not Assessment.objects.filter(pk=id).exists():
+            return Response(
+                {"error": "Evaluación no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        distribution = ScoreDistribution.for_assessments([id])[id]
+        return Response(ScoreDistributionSerializer(distribution).data)
+
+
+# ==================== CLASIFICACIONES ====================
+
+LEADERBOARD_PARAMETERS = [
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description="Tamaño del top-N (por defecto 10, máximo 100)"),
+    openapi.Parameter('around', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Id del usuario, o "me", para obtener su posición y su ventana'),
+    openapi.Parameter('window', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description="Posiciones antes y después del usuario (por defecto 5, máximo 50)"),
+]
+
+
+def leaderboard(request, entries, scope, scope_id=0, total=None):
+    """Respuesta de una clasificación; sin `total`, se toma el materializado del ámbito"""
+    if total is None:
+        total = LeaderboardTotal.for_scope(scope, scope_id)
+    data = leaderboard_response(request, entries, total=total, scope=scope, scope_id=scope_id)
+    if data is None:
+        return Response(
+            {"error": 'El parámetro around debe ser un id de usuario o "me"'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(data)
+
+
+class GlobalLeaderboardView(APIView):
+    @swagger_auto_schema(
+        operation_description="Clasificación por puntaje global",
+        manual_parameters=LEADERBOARD_PARAMETERS,
+        responses={200: LeaderboardSerializer}
+    )
+    def get(self, request):
+        return leaderboard(request, scope_entries('global'), 'global')
+
+
+class AssessmentLeaderboardView(APIView):
+    @swagger_auto_schema(
+        operation_description="Clasificación de una evaluación por el mejor puntaje de cada usuario",
+        manual_parameters=LEADERBOARD_PARAMETERS,
+        responses={
+            200: LeaderboardSerializer,
+            404: openapi.Response(description="Evaluación no encontrada")
+        }
+    )
+    def get(self, request, id):
+        from apps.assessments.models import Assessment
+        
+        if not Assessment.objects.filter(pk=id).exists():
+            return Response(
+                {"error": "Evaluación no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return leaderboard(request, scope_entries('assessment', id), 'assessment', id)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Skill, SkillLevel
+from .models import Category, Skill, SkillLevel, JobProfile, JobProfileSkill
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -13,4 +13,14 @@ class SkillAdmin(admin.ModelAdmin):
 @admin.register(SkillLevel)
 class SkillLevelAdmin(admin.ModelAdmin):
     list_display = ("user","skill","level","updated_at")
-    list_filter = ("level",)
\ No newline at end of file
+    list_filter = ("level",)
+
+class JobProfileSkillInline(admin.TabularInline):
+    model = JobProfileSkill
+    extra = 1
+
+@admin.register(JobProfile)
+class JobProfileAdmin(admin.ModelAdmin):
+    list_display = ("name","created_by","created_at")
+    search_fields = ("name","description")
+    inlines = [JobProfileSkillInline]
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SkillsConfig(AppConfig):
     name = 'apps.skills'
+
+    def ready(self):
+        from . import signals  # noqa: F401
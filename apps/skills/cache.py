@@ -0,0 +1,122 @@
+"""
+Caché de las habilidades de cada usuario (GET /users/<id>/skills/).
+
+La entrada de un usuario se arma con una sola consulta (SkillLevel con su
+habilidad, categoría y usuario) y se invalida desde las señales, una vez
+confirmada la transacción: al guardar o eliminar un nivel del usuario o al
+modificar el usuario. Los cambios de habilidades o categorías, que afectan a
+muchos usuarios, cambian la versión del catálogo incluida en la clave.
+La versión tiene el mismo tiempo de vida que las entradas, así que la
+frescura nunca depende de una clave sin expiración.
+"""
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import SkillLevel
+
+User = get_user_model()
+
+# Tiempo de vida de las habilidades de un usuario en la caché (segundos)
+USER_SKILLS_CACHE_TIMEOUT = 60 * 60
+
+CATALOG_VERSION_KEY = "skills:catalog:version"
+
+# Tiempo de vida de la versión del catálogo (segundos)
+CATALOG_VERSION_TIMEOUT = USER_SKILLS_CACHE_TIMEOUT
+
+
+def catalog_version():
+    """Versión vigente del catálogo (se crea si la caché no la tiene)"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(CATALOG_VERSION_KEY, version, CATALOG_VERSION_TIMEOUT):
+            version = cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def user_skills_cache_key(user_id, version=None):
+    return f"skills:user:{version or catalog_version()}:{user_id}"
+
+
+def invalidate_user_skills(*user_ids):
+    """Descarta las habilidades en caché de los usuarios al confirmar la transacción"""
+    def delete():
+        version = catalog_version()
+        cache.delete_many([user_skills_cache_key(user_id, version) for user_id in user_ids])
+    transaction.on_commit(delete)
+
+
+def invalidate_catalog():
+    """Invalida las habilidades en caché de todos los usuarios al confirmar la transacción"""
+    transaction.on_commit(lambda: cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, CATALOG_VERSION_TIMEOUT))
+
+
+def user_skills_data(user_id, user=None):
+    """
+    Habilidades del usuario con estadísticas derivadas, o None si el usuario no existe.
+    `user` evita consultar el usuario cuando ya está cargado y no tiene niveles.
+    """
+    levels = list(
+        SkillLevel.objects.filter(user_id=user_id)
+        .select_related("user", "skill__category")
+        .order_by("-level", "skill__name")
+    )
+    if levels:
+        user = levels[0].user
+    elif user is None:
+        user = User.objects.filter(pk=user_id).only("id", "username").first()
+        if user is None:
+            return None
+
+    categories = {}
+    for skill_level in levels:
+        category = skill_level.skill.category
+        entry = categories.setdefault(category.id, {"id": category.id, "name": category.name, "levels": []})
+        entry["levels"].append(skill_level.level)
+
+    values = [skill_level.level for skill_level in levels]
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "skills": [
+            {
+                "id": skill_level.id,
+                "skill_id": skill_level.skill_id,
+                "skill": skill_level.skill.name,
+                "slug": skill_level.skill.slug,
+                "category": {"id": skill_level.skill.category_id, "name": skill_level.skill.category.name},
+                "level": skill_level.level,
+                "updated_at": skill_level.updated_at,
+            }
+            for skill_level in levels
+        ],
+        "stats": {
+            "total_skills": len(values),
+            "average_level": round(sum(values) / len(values), 2) if values else 0,
+            "highest_level": max(values, default=0),
+            "categories": [
+                {
+                    "id": entry["id"],
+                    "name": entry["name"],
+                    "total_skills": len(entry["levels"]),
+                    "average_level": round(sum(entry["levels"]) / len(entry["levels"]), 2),
+                }
+                for entry in sorted(categories.values(), key=lambda entry: entry["name"])
+            ],
+        },
+    }
+
+
+def get_user_skills(user_id, user=None):
+    """Habilidades del usuario desde la caché; sin consultas cuando la entrada existe"""
+    key = user_skills_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = user_skills_data(user_id, user=user)
+        if data is not None:
+            cache.set(key, data, USER_SKILLS_CACHE_TIMEOUT)
+    return data
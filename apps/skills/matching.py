@@ -0,0 +1,244 @@
+"""
+Coincidencia de usuarios con perfiles de cargo (JobProfile).
+
+El ajuste de un usuario a un perfil es el promedio ponderado, sobre las
+habilidades del perfil, de min(nivel / nivel objetivo, 1). Se calcula con
+NumPy sobre una matriz dispersa usuario x habilidad guardada por columnas:
+por cada habilidad, las filas de usuario ordenadas y sus niveles. Evaluar un
+perfil suma sus columnas sobre un vector con todos los usuarios, sin
+recorrerlos en Python, y selecciona los mejores con np.partition.
+
+El puntaje final puede combinar el ajuste con el puntaje global (UserScore,
+0-100) y el nivel más alto de certificación activa (CertificationSummary,
+0-5). Esos vectores se cargan con la matriz y se actualizan por updated_at
+como máximo cada BLEND_SYNC_INTERVAL segundos.
+
+La matriz se construye al primer uso en cada proceso y se mantiene igual que
+el índice de búsqueda (apps.skills.search): las señales de SkillLevel la
+actualizan al confirmar, la versión y las lápidas en la caché propagan los cambios y,
+aunque no cambien, se resincroniza cada MAX_SYNC_AGE segundos y se
+reconstruye cada MAX_REBUILD_AGE segundos.
+"""
+import time
+
+import numpy as np
+
+from apps.certifications.models import CertificationSummary
+from apps.results.models import UserScore
+
+from .search import SYNC_OVERLAP, VersionedIndex
+
+MAX_MATCH_RESULTS = 100
+
+# Segundos entre sincronizaciones del puntaje global y del nivel de certificación
+BLEND_SYNC_INTERVAL = 10
+
+MAX_GLOBAL_SCORE = 100.0
+MAX_CERTIFICATION_LEVEL = 5.0
+
+EMPTY_ROWS = np.empty(0, dtype=np.int32)
+EMPTY_LEVELS = np.empty(0, dtype=np.float32)
+
+
+def _grow(array, capacity):
+    grown = np.zeros(capacity, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class SkillMatrix(VersionedIndex):
+    """Matriz dispersa usuario x habilidad por columnas: skill_id -> (filas, niveles)"""
+
+    def __init__(self):
+        super().__init__()
+        self.size = 0
+        self.rows = {}
+        self.columns = {}
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.global_scores = np.empty(0, dtype=np.float32)
+        self.certification_levels = np.empty(0, dtype=np.float32)
+        self.pending_blend = set()
+        self.blend_watermarks = (None, None)
+        self.blend_synced_at = None
+
+    # ---------- mantenimiento ----------
+
+    def load(self, rows):
+        data = np.array([row[:3] for row in rows], dtype=np.int64).reshape(-1, 3)
+        skills, users, levels = data[:, 0], data[:, 1], data[:, 2]
+        user_ids = np.unique(users)
+        user_rows = np.searchsorted(user_ids, users).astype(np.int32)
+
+        order = np.lexsort((user_rows, skills))
+        skills, user_rows, levels = skills[order], user_rows[order], levels[order].astype(np.float32)
+        skill_ids, starts = np.unique(skills, return_index=True)
+        ends = np.append(starts[1:], len(skills))
+        self.columns = {
+            int(skill_id): (user_rows[start:end].copy(), levels[start:end].copy())
+            for skill_id, start, end in zip(skill_ids, starts, ends)
+        }
+
+        self.size = len(user_ids)
+        self.user_ids = user_ids
+        self.rows = {user_id: row for row, user_id in enumerate(user_ids.tolist())}
+        self.global_scores = np.zeros(self.size, dtype=np.float32)
+        self.certification_levels = np.zeros(self.size, dtype=np.float32)
+        self.pending_blend = set()
+        self.blend_synced_at = time.monotonic()
+        self.blend_watermarks = (
+            self._fill(self.global_scores, UserScore.objects.all(), "global_score"),
+            self._fill(self.certification_levels, CertificationSummary.objects.all(), "highest_level"),
+        )
+
+    def _row(self, user_id):
+        """Fila del usuario; los usuarios nuevos se agregan al final"""
+        row = self.rows.get(user_id)
+        if row is None:
+            row = self.size
+            if row == len(self.user_ids):
+                capacity = max(2 * row, 64)
+                self.user_ids = _grow(self.user_ids, capacity)
+                self.global_scores = _grow(self.global_scores, capacity)
+                self.certification_levels = _grow(self.certification_levels, capacity)
+            self.user_ids[row] = user_id
+            self.rows[user_id] = row
+            self.size += 1
+            self.pending_blend.add(user_id)
+        return row
+
+    def set_level(self, skill_id, user_id, level):
+        with self.lock:
+            row = self._row(user_id)
+            rows, levels = self.columns.get(skill_id, (EMPTY_ROWS, EMPTY_LEVELS))
+            position = int(np.searchsorted(rows, row))
+            if position < len(rows) and rows[position] == row:
+                levels[position] = level
+            else:
+                self.columns[skill_id] = (np.insert(rows, position, row), np.insert(levels, position, level))
+
+    def remove(self, skill_id, user_id):
+        with self.lock:
+            row = self.rows.get(user_id)
+            if row is None or skill_id not in self.columns:
+                return
+            rows, levels = self.columns[skill_id]
+            position = int(np.searchsorted(rows, row))
+            if position < len(rows) and rows[position] == row:
+                self.columns[skill_id] = (np.delete(rows, position), np.delete(levels, position))
+
+    def _fill(self, target, queryset, field):
+        """Copia el valor de los usuarios de la matriz; retorna el updated_at más reciente"""
+        watermark = None
+        rows = queryset.order_by().values_list("user_id", field, "updated_at")
+        for user_id, value, updated_at in rows.iterator(chunk_size=5000):
+            row = self.rows.get(user_id)
+            if row is not None:
+                target[row] = value
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        return watermark
+
+    def sync_blend(self):
+        """Actualiza el puntaje global y el nivel de certificación cambiados desde la última sincronización"""
+        if self.pending_blend:
+            pending = list(self.pending_blend)
+            self.pending_blend = set()
+            self._fill(self.global_scores, UserScore.objects.filter(user_id__in=pending), "global_score")
+            self._fill(
+                self.certification_levels,
+                CertificationSummary.objects.filter(user_id__in=pending),
+                "highest_level",
+            )
+        if time.monotonic() - self.blend_synced_at < BLEND_SYNC_INTERVAL:
+            return
+
+        watermarks = []
+        sources = (
+            (self.global_scores, UserScore.objects.all(), "global_score"),
+            (self.certification_levels, CertificationSummary.objects.all(), "highest_level"),
+        )
+        for (target, queryset, field), watermark in zip(sources, self.blend_watermarks):
+            if watermark is not None:
+                queryset = queryset.filter(updated_at__gte=watermark - SYNC_OVERLAP)
+            latest = self._fill(target, queryset, field)
+            watermarks.append(max(watermark, latest) if watermark and latest else watermark or latest)
+        self.blend_watermarks = tuple(watermarks)
+        self.blend_synced_at = time.monotonic()
+
+    # ---------- consultas ----------
+
+    def match(self, requirements, global_score_weight=0.0, certification_weight=0.0, limit=20):
+        """
+        requirements: [(skill_id, nivel objetivo, peso), ...].
+        Retorna los `limit` usuarios con mayor puntaje, entre los que tienen alguna
+        de las habilidades del perfil, ordenados por puntaje y luego por user_id.
+        """
+        self.sync()
+        with self.lock:
+            self.sync_blend()
+            total_weight = sum(weight for _, _, weight in requirements)
+            if not requirements or total_weight <= 0 or not self.size:
+                return []
+
+            fit = np.zeros(self.size, dtype=np.float32)
+            matched = np.zeros(self.size, dtype=bool)
+            columns = []
+            for skill_id, target_level, weight in requirements:
+                rows, levels = self.columns.get(skill_id, (EMPTY_ROWS, EMPTY_LEVELS))
+                fit[rows] += (weight / total_weight) * np.minimum(levels / max(target_level, 1), 1.0)
+                matched[rows] = True
+                columns.append((skill_id, rows, levels))
+
+            skill_weight = max(1.0 - global_score_weight - certification_weight, 0.0)
+            score = skill_weight * fit
+            if global_score_weight:
+                score += global_score_weight * (self.global_scores[:self.size] / MAX_GLOBAL_SCORE)
+            if certification_weight:
+                score += certification_weight * (self.certification_levels[:self.size] / MAX_CERTIFICATION_LEVEL)
+
+            candidates = np.flatnonzero(matched)
+            if len(candidates) > limit:
+                # Umbral del puesto `limit`; los empates en el umbral se resuelven por user_id
+                kth = len(candidates) - limit
+                threshold = np.partition(score[candidates], kth)[kth]
+                candidates = candidates[score[candidates] >= threshold]
+            order = np.lexsort((self.user_ids[candidates], -score[candidates]))
+            candidates = candidates[order][:limit]
+
+            levels_by_skill = []
+            for skill_id, rows, levels in columns:
+                positions = np.minimum(np.searchsorted(rows, candidates), max(len(rows) - 1, 0))
+                found = rows[positions] == candidates if len(rows) else np.zeros(len(candidates), dtype=bool)
+                levels_by_skill.append((str(skill_id), found, levels[positions] if len(rows) else None))
+
+            return [
+                {
+                    "user_id": int(self.user_ids[row]),
+                    "score": round(float(score[row]), 4),
+                    "fit": round(float(fit[row]), 4),
+                    "levels": {
+                        skill_id: int(levels[index])
+                        for skill_id, found, levels in levels_by_skill if found[index]
+                    },
+                    "global_score": round(float(self.global_scores[row]), 2),
+                    "certification_level": int(self.certification_levels[row]),
+                }
+                for index, row in enumerate(candidates.tolist())
+            ]
+
+
+matrix = SkillMatrix()
+
+
+def match_profile(profile, limit=20):
+    """Usuarios con mayor ajuste al perfil (requiere los requisitos precargados)"""
+    requirements = [
+        (requirement.skill_id, requirement.target_level, requirement.weight)
+        for requirement in profile.requirements.all()
+    ]
+    return matrix.match(
+        requirements,
+        global_score_weight=profile.global_score_weight,
+        certification_weight=profile.certification_weight,
+        limit=limit,
+    )
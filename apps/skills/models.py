@@ -34,4 +34,55 @@ class SkillLevel(models.Model):
         ordering = ["-level", "-updated_at"]
 
     def __str__(self):
-        return f"{self.user} - {self.skill} ({self.level})"
\ No newline at end of file
+        return f"{self.user} - {self.skill} ({self.level})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Habilidad y nivel cargados, para actualizar los inventarios de las organizaciones al guardar
+        loaded = dict(zip(field_names, values))
+        instance._loaded_skill_level = (loaded.get('skill_id'), loaded.get('level'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Una vez atendidas las señales post_save, lo guardado pasa a ser lo cargado
+        self._loaded_skill_level = (self.skill_id, self.level)
+
+
+class JobProfile(models.Model):
+    """Perfil de cargo: habilidades requeridas con nivel objetivo y peso"""
+    name = models.CharField(max_length=140)
+    description = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        User, related_name="job_profiles", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    # Peso del puntaje global (UserScore) y del nivel de certificación activa en el puntaje final;
+    # el resto del peso corresponde al ajuste de habilidades
+    global_score_weight = models.FloatField(default=0)
+    certification_weight = models.FloatField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def skill_weight(self):
+        return max(1.0 - self.global_score_weight - self.certification_weight, 0.0)
+
+
+class JobProfileSkill(models.Model):
+    profile = models.ForeignKey(JobProfile, related_name="requirements", on_delete=models.CASCADE)
+    skill = models.ForeignKey(Skill, related_name="job_requirements", on_delete=models.CASCADE)
+    target_level = models.PositiveSmallIntegerField(default=5)
+    weight = models.FloatField(default=1)
+
+    class Meta:
+        unique_together = ("profile", "skill")
+
+    def __str__(self):
+        return f"{self.profile} - {self.skill} ({self.target_level})"
@@ -0,0 +1,268 @@
+"""
+Búsqueda de talento con un índice invertido de habilidades en memoria.
+
+Por cada habilidad el índice guarda una lista de postings (level, user_id)
+ordenada, más el nivel de cada usuario. Una condición "habilidad >= nivel"
+es un corte de la lista con bisect; varias condiciones se resuelven
+intersectando desde la lista más corta y consultando el nivel del usuario
+en las demás. El resultado se ordena por la suma de los niveles pedidos.
+
+Cada proceso construye su índice al primer uso y lo actualiza con las
+señales de SkillLevel al confirmar la transacción (igual que la matriz de
+apps.skills.matching). Los cambios de otros
+procesos se detectan con una versión en la caché compartida: cada cambio la
+incrementa y deja una entrada con su número, vacía para un nivel guardado
+(se sincronizan las filas con updated_at reciente) o con la lápida
+(skill_id, user_id) de un nivel eliminado, que se quita sin reconstruir.
+Solo se reconstruye si falta alguna entrada del rango pendiente (expirada o
+desalojada) o si el rango supera MAX_PENDING_CHANGES.
+
+La versión y las entradas tienen un tiempo de vida y la frescura no depende
+solo de ellas: aunque no cambien (caché local a cada proceso, o versiones
+expiradas o desalojadas), el índice se sincroniza por updated_at cada
+MAX_SYNC_AGE segundos y se reconstruye cada MAX_REBUILD_AGE segundos.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from .models import SkillLevel
+
+VERSION_KEY = "skills:index:version"
+CHANGE_KEY = "skills:index:change:{}"
+
+# Margen al sincronizar por updated_at, para no perder filas de transacciones más largas
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# Segundos máximos sin sincronizar por updated_at ni reconstruir, aunque las versiones no cambien
+MAX_SYNC_AGE = 60
+MAX_REBUILD_AGE = 60 * 15
+
+# Tiempo de vida de la versión y de las entradas de cambios en la caché (segundos)
+VERSION_TIMEOUT = 60 * 60 * 24
+
+# Cambios pendientes a partir de los cuales conviene reconstruir en lugar de aplicarlos
+MAX_PENDING_CHANGES = 1000
+
+
+class VersionedIndex:
+    """
+    Estructura en memoria derivada de SkillLevel, sincronizada entre procesos
+    con la versión y los cambios publicados en la caché. Las subclases
+    implementan load, set_level y remove.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.version = None
+        self.watermark = None
+        self.synced_at = None
+        self.rebuilt_at = None
+
+    def rebuild(self):
+        with self.lock:
+            version = current_version()
+            rows = list(
+                SkillLevel.objects.order_by()
+                .values_list("skill_id", "user_id", "level", "updated_at")
+                .iterator(chunk_size=5000)
+            )
+            self.replace(rows, version)
+
+    def replace(self, rows, version):
+        """Carga las filas (skill_id, user_id, level, updated_at) como estado sincronizado con `version`"""
+        with self.lock:
+            self.load(rows)
+            self.watermark = max((row[3] for row in rows if row[3] is not None), default=None)
+            self.version = version
+            self.loaded = True
+            self.synced_at = self.rebuilt_at = time.monotonic()
+
+    def sync(self):
+        """Alinea la estructura con los cambios hechos por otros procesos"""
+        if not self.loaded:
+            self.rebuild()
+            return
+        version = current_version()
+        now = time.monotonic()
+        if version == self.version and now - self.synced_at < MAX_SYNC_AGE:
+            return
+        with self.lock:
+            # Versión perdida o reiniciada en la caché, o una reconstrucción vencida
+            # (las eliminaciones sin señales no se detectan por updated_at)
+            lost = version != self.version and (
+                version is None or (self.version is not None and version < self.version)
+            )
+            expired = now - self.rebuilt_at >= MAX_REBUILD_AGE
+            tombstones = None if lost else pending_tombstones(self.version, version)
+            if tombstones is None or expired or self.watermark is None:
+                self.rebuild()
+                return
+            for skill_id, user_id in tombstones:
+                self.remove(skill_id, user_id)
+            rows = SkillLevel.objects.filter(updated_at__gte=self.watermark - SYNC_OVERLAP)
+            for skill_id, user_id, level in rows.values_list("skill_id", "user_id", "level"):
+                self.set_level(skill_id, user_id, level)
+            latest = rows.aggregate(latest=Max("updated_at"))["latest"]
+            self.watermark = max(self.watermark, latest) if latest else self.watermark
+            self.version = version
+            self.synced_at = now
+
+    def published(self, version):
+        """
+        Registra un cambio propio ya aplicado y publicado. Si ningún otro proceso
+        cambió la versión mientras tanto, la estructura queda al día sin sincronizar.
+        """
+        with self.lock:
+            if self.loaded and self.version is not None and version == self.version + 1:
+                self.version = version
+
+
+class SkillIndex(VersionedIndex):
+    """Índice invertido skill_id -> postings (level, user_id) ordenados"""
+
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+        self.levels = {}
+
+    # ---------- mantenimiento ----------
+
+    def load(self, rows):
+        self.postings, self.levels = {}, {}
+        for skill_id, user_id, level, _ in rows:
+            self.levels.setdefault(skill_id, {})[user_id] = level
+            self.postings.setdefault(skill_id, []).append((level, user_id))
+        for postings in self.postings.values():
+            postings.sort()
+
+    def set_level(self, skill_id, user_id, level):
+        with self.lock:
+            levels = self.levels.setdefault(skill_id, {})
+            postings = self.postings.setdefault(skill_id, [])
+            previous = levels.get(user_id)
+            if previous == level:
+                return
+            if previous is not None:
+                del postings[bisect_left(postings, (previous, user_id))]
+            levels[user_id] = level
+            insort(postings, (level, user_id))
+
+    def remove(self, skill_id, user_id):
+        with self.lock:
+            previous = self.levels.get(skill_id, {}).pop(user_id, None)
+            if previous is not None:
+                postings = self.postings[skill_id]
+                del postings[bisect_left(postings, (previous, user_id))]
+
+    # ---------- consultas ----------
+
+    def matching(self, skill_id, min_level):
+        """Postings de la habilidad con nivel >= min_level"""
+        postings = self.postings.get(skill_id, [])
+        return postings[bisect_left(postings, (min_level, 0)):]
+
+    def count_matching(self, skill_id, min_level):
+        postings = self.postings.get(skill_id, [])
+        return len(postings) - bisect_left(postings, (min_level, 0))
+
+    def search(self, requirements):
+        """
+        requirements: [(skill_id, min_level), ...].
+        Retorna [(user_id, puntaje combinado, {skill_id: nivel})] ordenado por puntaje.
+        """
+        self.sync()
+        with self.lock:
+            if not requirements:
+                return []
+            # Se parte de la lista más corta y se verifica al usuario en las demás
+            ordered = sorted(requirements, key=lambda item: self.count_matching(*item))
+            first_skill, first_min = ordered[0]
+            candidates = {user_id: {first_skill: level} for level, user_id in self.matching(first_skill, first_min)}
+            for skill_id, min_level in ordered[1:]:
+                levels = self.levels.get(skill_id, {})
+                for user_id in list(candidates):
+                    level = levels.get(user_id)
+                    if level is None or level < min_level:
+                        del candidates[user_id]
+                    else:
+                        candidates[user_id][skill_id] = level
+                if not candidates:
+                    break
+        ranked = [(user_id, sum(levels.values()), levels) for user_id, levels in candidates.items()]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+def current_version():
+    return cache.get(VERSION_KEY)
+
+
+def pending_tombstones(since, version):
+    """
+    Lápidas (skill_id, user_id) publicadas después de la versión `since` hasta
+    `version`, en orden. None si falta alguna entrada o son demasiadas.
+    """
+    if version is None or version == since:
+        return []
+    since = since or 0
+    if version - since > MAX_PENDING_CHANGES:
+        return None
+    keys = [CHANGE_KEY.format(number) for number in range(since + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys):
+        return None
+    return [tuple(changes[key]) for key in keys if changes[key]]
+
+
+def _bump(key):
+    """Incrementa una versión y retorna el nuevo valor"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, VERSION_TIMEOUT):
+            return 1
+        return cache.incr(key)
+
+
+def _publish(tombstone=()):
+    """Publica un cambio ya aplicado a las estructuras locales, con la lápida si es una eliminación"""
+    version = _bump(VERSION_KEY)
+    cache.set(CHANGE_KEY.format(version), tombstone, VERSION_TIMEOUT)
+    for local in local_indexes():
+        local.published(version)
+
+
+index = SkillIndex()
+
+
+def local_indexes():
+    """Estructuras de este proceso que se mantienen con los cambios de SkillLevel"""
+    from . import matching
+    return [index, matching.matrix]
+
+
+def level_saved(skill_id, user_id, level):
+    """Aplica un nivel guardado a las estructuras locales y publica el cambio al confirmar"""
+    def apply():
+        for local in local_indexes():
+            if local.loaded:
+                local.set_level(skill_id, user_id, level)
+        _publish()
+    transaction.on_commit(apply)
+
+
+def level_deleted(skill_id, user_id):
+    """Quita un nivel de las estructuras locales y publica la lápida al confirmar"""
+    def apply():
+        for local in local_indexes():
+            if local.loaded:
+                local.remove(skill_id, user_id)
+        _publish((skill_id, user_id))
+    transaction.on_commit(apply)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Category, Skill, SkillLevel
+from django.db import transaction
+from .models import Category, Skill, SkillLevel, JobProfile, JobProfileSkill
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -23,4 +24,65 @@ class SkillLevelSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SkillLevel
-        fields = ["id","user","skill","level","updated_at"]
\ No newline at end of file
+        fields = ["id","user","skill","level","updated_at"]
+
+class JobProfileSkillSerializer(serializers.ModelSerializer):
+    skill = serializers.PrimaryKeyRelatedField(queryset=Skill.objects.all())
+    skill_name = serializers.CharField(source="skill.name", read_only=True)
+    target_level = serializers.IntegerField(min_value=1, max_value=10)
+    weight = serializers.FloatField(min_value=0, default=1)
+
+    class Meta:
+        model = JobProfileSkill
+        fields = ["skill","skill_name","target_level","weight"]
+
+class JobProfileSerializer(serializers.ModelSerializer):
+    requirements = JobProfileSkillSerializer(many=True)
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    global_score_weight = serializers.FloatField(min_value=0, max_value=1, default=0)
+    certification_weight = serializers.FloatField(min_value=0, max_value=1, default=0)
+
+    class Meta:
+        model = JobProfile
+        fields = ["id","name","description","requirements","global_score_weight","certification_weight",
+                  "created_by","created_at","updated_at"]
+
+    def validate_requirements(self, value):
+        if not value:
+            raise serializers.ValidationError("El perfil debe tener al menos una habilidad.")
+        skills = [item["skill"].id for item in value]
+        if len(skills) != len(set(skills)):
+            raise serializers.ValidationError("Cada habilidad puede aparecer una sola vez.")
+        if not sum(item["weight"] for item in value):
+            raise serializers.ValidationError("La suma de los pesos debe ser mayor que cero.")
+        return value
+
+    def validate(self, attrs):
+        global_weight = attrs.get("global_score_weight", getattr(self.instance, "global_score_weight", 0))
+        certification_weight = attrs.get("certification_weight", getattr(self.instance, "certification_weight", 0))
+        if global_weight + certification_weight > 1:
+            raise serializers.ValidationError(
+                "global_score_weight + certification_weight no puede ser mayor que 1."
+            )
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        requirements = validated_data.pop("requirements")
+        profile = JobProfile.objects.create(**validated_data)
+        self._save_requirements(profile, requirements)
+        return profile
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        requirements = validated_data.pop("requirements", None)
+        profile = super().update(instance, validated_data)
+        if requirements is not None:
+            profile.requirements.all().delete()
+            self._save_requirements(profile, requirements)
+        return profile
+
+    def _save_requirements(self, profile, requirements):
+        JobProfileSkill.objects.bulk_create([JobProfileSkill(profile=profile, **item) for item in requirements])
+        # Descarta requisitos precargados para que la respuesta muestre los nuevos
+        getattr(profile, "_prefetched_objects_cache", {}).pop("requirements", None)
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .cache import invalidate_catalog, invalidate_user_skills
+from .models import Category, Skill, SkillLevel
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=SkillLevel)
+def skill_level_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_loaded_skill_level", None)
+    if previous is not None and previous[0] != instance.skill_id:
+        search.level_deleted(previous[0], instance.user_id)
+    search.level_saved(instance.skill_id, instance.user_id, instance.level)
+    invalidate_user_skills(instance.user_id)
+
+
+@receiver(post_delete, sender=SkillLevel)
+def skill_level_deleted(sender, instance, **kwargs):
+    search.level_deleted(instance.skill_id, instance.user_id)
+    invalidate_user_skills(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Los inicios de sesión solo actualizan last_login, que no forma parte de la entrada
+    if not created and set(update_fields or ()) != {"last_login"}:
+        invalidate_user_skills(instance.pk)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
@@ -1,3 +1,275 @@
-from django.test import TestCase
+"""
+Tests for skills app.
+"""
+import random
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import matching, search
+from .matching import SkillMatrix
+from .models import Category, JobProfile, Skill, SkillLevel
+from .search import SkillIndex
+from apps.certifications.models import Certification
+from apps.results.models import UserScore
+from apps.users.models import User
+
+
+class TalentSearchTest(APITestCase):
+    """Tests for the talent search backed by the inverted skill index."""
+
+    def setUp(self):
+        cache.clear()
+        search.index = SkillIndex()
+        self.empresa = User.objects.create_user(
+            username="searchempresa", email="searchempresa@example.com", password="pass123", role="empresa"
+        )
+        category = Category.objects.create(name="Programación", slug="programacion")
+        self.django = Skill.objects.create(name="Django", slug="django", category=category)
+        self.sql = Skill.objects.create(name="SQL", slug="sql", category=category)
+        self.users = [
+            User.objects.create_user(username=f"talent{i}", email=f"talent{i}@example.com", password="pass123")
+            for i in range(4)
+        ]
+        levels = {0: (8, 5), 1: (6, 9), 2: (9, 3), 3: (5, 7)}
+        for i, (django_level, sql_level) in levels.items():
+            SkillLevel.objects.create(user=self.users[i], skill=self.django, level=django_level)
+            SkillLevel.objects.create(user=self.users[i], skill=self.sql, level=sql_level)
+        self.client.force_authenticate(user=self.empresa)
+
+    def search_usernames(self, params):
+        response = self.client.get("/skills/search/", params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row["username"] for row in response.data["results"]]
+
+    def test_search_intersects_and_ranks_by_combined_level(self):
+        """Test users must meet every requirement and rank by level sum."""
+        response = self.client.get("/skills/search/", {"requirements": f"django:6,{self.sql.id}:5"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        first, second = response.data["results"]
+        self.assertEqual((first["username"], first["score"]), ("talent1", 15))
+        self.assertEqual(first["levels"], {str(self.django.id): 6, str(self.sql.id): 9})
+        self.assertEqual((second["username"], second["score"]), ("talent0", 13))
+
+    def test_search_filters_by_active_certification_level(self):
+        """Test the certification criterion uses active certifications only."""
+        Certification.objects.create(user=self.users[0], title="Django", total_score=80, level=4, status="active")
+        Certification.objects.create(user=self.users[1], title="Django", total_score=95, level=5, status="revoked")
+        usernames = self.search_usernames({"requirements": "django:6,sql:5", "min_certification_level": 3})
+        self.assertEqual(usernames, ["talent0"])
+
+    def test_search_is_paginated(self):
+        """Test ranked results are paginated."""
+        for i in range(12):
+            user = User.objects.create_user(username=f"bulk{i}", email=f"bulk{i}@example.com", password="pass123")
+            SkillLevel.objects.create(user=user, skill=self.django, level=2)
+        response = self.client.get("/skills/search/", {"requirements": "django:1"})
+        self.assertEqual(response.data["count"], 16)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["username"], "talent2")
+        response = self.client.get("/skills/search/", {"requirements": "django:1", "page": 2})
+        self.assertEqual(len(response.data["results"]), 6)
+
+    def test_signals_update_the_index(self):
+        """Test saved, moved and deleted levels are applied after commit."""
+        self.assertEqual(self.search_usernames({"requirements": "sql:7"}), ["talent1", "talent3"])
+        level = SkillLevel.objects.get(user=self.users[2], skill=self.sql)
+        with self.captureOnCommitCallbacks(execute=True):
+            level.level = 10
+            level.save()
+        self.assertEqual(self.search_usernames({"requirements": "sql:7"}), ["talent2", "talent1", "talent3"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillLevel.objects.filter(user=self.users[1], skill=self.sql).delete()
+            moved = SkillLevel.objects.get(user=self.users[3], skill=self.sql)
+            moved.skill = Skill.objects.create(name="Go", slug="go", category=self.sql.category)
+            moved.save()
+        self.assertEqual(self.search_usernames({"requirements": "sql:7"}), ["talent2"])
+        self.assertEqual(self.search_usernames({"requirements": "go:7"}), ["talent3"])
+
+    def test_other_processes_sync_through_cache_versions(self):
+        """Test an index built elsewhere picks up changes published by signals."""
+        other = SkillIndex()
+        self.assertEqual([row[0] for row in other.search([(self.sql.id, 9)])], [self.users[1].id])
+
+        level = SkillLevel.objects.get(user=self.users[0], skill=self.sql)
+        with self.captureOnCommitCallbacks(execute=True):
+            level.level = 10
+            level.save()
+        self.assertEqual([row[0] for row in other.search([(self.sql.id, 9)])], [self.users[0].id, self.users[1].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            level.delete()
+        self.assertEqual([row[0] for row in other.search([(self.sql.id, 9)])], [self.users[1].id])
+
+    def test_deletions_are_applied_from_tombstones(self):
+        """Test other processes remove deleted levels without rebuilding, unless a change entry is missing."""
+        other = SkillIndex()
+        other.search([(self.sql.id, 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillLevel.objects.filter(user=self.users[1], skill=self.sql).delete()
+        with mock.patch.object(other, "rebuild", wraps=other.rebuild) as rebuild:
+            self.assertEqual([row[0] for row in other.search([(self.sql.id, 7)])], [self.users[3].id])
+        rebuild.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillLevel.objects.filter(user=self.users[3], skill=self.sql).delete()
+        cache.delete(search.CHANGE_KEY.format(search.current_version()))
+        with mock.patch.object(other, "rebuild", wraps=other.rebuild) as rebuild:
+            self.assertEqual(other.search([(self.sql.id, 7)]), [])
+        rebuild.assert_called_once()
+
+    def test_resync_is_time_bounded_without_versions(self):
+        """Test changes that never reach the cache versions are picked up after MAX_SYNC_AGE / MAX_REBUILD_AGE."""
+        other = SkillIndex()
+        self.assertEqual([row[0] for row in other.search([(self.sql.id, 9)])], [self.users[1].id])
+        # Escrituras sin señales, como las de otro proceso con una caché local
+        SkillLevel.objects.filter(user=self.users[0], skill=self.sql).update(level=10, updated_at=timezone.now())
+        SkillLevel.objects.filter(user=self.users[1], skill=self.sql).delete()
+        self.assertEqual([row[0] for row in other.search([(self.sql.id, 9)])], [self.users[1].id])
+
+        now = time.monotonic()
+        with mock.patch.object(search.time, "monotonic", return_value=now + search.MAX_SYNC_AGE):
+            self.assertEqual(
+                [row[0] for row in other.search([(self.sql.id, 9)])], [self.users[0].id, self.users[1].id]
+            )
+        with mock.patch.object(search.time, "monotonic", return_value=now + search.MAX_REBUILD_AGE):
+            self.assertEqual([row[0] for row in other.search([(self.sql.id, 9)])], [self.users[0].id])
+
+    def test_search_validates_requirements_and_permissions(self):
+        """Test invalid requirements return 400 and aprendiz users are rejected."""
+        for requirements in ("", "django", "django:x", "unknown:3"):
+            response = self.client.get("/skills/search/", {"requirements": requirements})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", response.data)
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.get("/skills/search/", {"requirements": "django:1"})
+        self.assertEqual(response.status_code, 403)
+
+
+class JobProfileMatchingTest(APITestCase):
+    """Tests for job profiles and the vectorized matching engine."""
+
+    def setUp(self):
+        cache.clear()
+        matching.matrix = SkillMatrix()
+        self.empresa = User.objects.create_user(
+            username="matchempresa", email="matchempresa@example.com", password="pass123", role="empresa"
+        )
+        category = Category.objects.create(name="Datos", slug="datos")
+        self.python = Skill.objects.create(name="Python", slug="python", category=category)
+        self.sql = Skill.objects.create(name="SQL", slug="sql", category=category)
+        self.users = [
+            User.objects.create_user(username=f"match{i}", email=f"match{i}@example.com", password="pass123")
+            for i in range(4)
+        ]
+        levels = ((8, 4), (10, None), (4, 8), (None, 9))
+        for user, user_levels in zip(self.users, levels):
+            for skill, level in zip((self.python, self.sql), user_levels):
+                if level:
+                    SkillLevel.objects.create(user=user, skill=skill, level=level)
+        self.profile = JobProfile.objects.create(name="Data Engineer", created_by=self.empresa)
+        self.profile.requirements.create(skill=self.python, target_level=8, weight=3)
+        self.profile.requirements.create(skill=self.sql, target_level=8, weight=1)
+        self.client.force_authenticate(user=self.empresa)
+
+    def matches(self, **params):
+        response = self.client.get(f"/skills/job-profiles/{self.profile.id}/matches/", params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["results"]
+
+    def test_matches_rank_by_weighted_fit(self):
+        """Test the fit is the weighted average of min(level / target, 1)."""
+        results = self.matches()
+        self.assertEqual(
+            [(row["username"], row["score"]) for row in results],
+            [("match0", 0.875), ("match1", 0.75), ("match2", 0.625), ("match3", 0.25)],
+        )
+        self.assertEqual(results[0]["levels"], {str(self.python.id): 8, str(self.sql.id): 4})
+        self.assertEqual([row["username"] for row in self.matches(limit=2)], ["match0", "match1"])
+
+    def test_matches_blend_global_score_and_certification(self):
+        """Test the score blends UserScore and the highest active certification level."""
+        UserScore.objects.create(user=self.users[3], global_score=100)
+        Certification.objects.create(user=self.users[3], title="SQL", total_score=95, level=5, status="active")
+        self.profile.global_score_weight = 0.3
+        self.profile.certification_weight = 0.3
+        self.profile.save()
+        first = self.matches()[0]
+        self.assertEqual(first["username"], "match3")
+        self.assertEqual((first["score"], first["fit"]), (0.7, 0.25))
+        self.assertEqual((first["global_score"], first["certification_level"]), (100, 5))
+
+    def test_matrix_is_patched_by_skill_level_signals(self):
+        """Test writes patch the loaded matrix instead of rebuilding it."""
+        self.matches()
+        loaded_columns = matching.matrix.columns
+        newcomer = User.objects.create_user(username="newcomer", email="newcomer@example.com", password="pass123")
+        UserScore.objects.create(user=newcomer, global_score=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillLevel.objects.create(user=newcomer, skill=self.python, level=9)
+            SkillLevel.objects.create(user=newcomer, skill=self.sql, level=9)
+            SkillLevel.objects.filter(user=self.users[0], skill=self.python).delete()
+        self.assertIs(matching.matrix.columns, loaded_columns)
+
+        results = self.matches()
+        self.assertEqual(results[0]["username"], "newcomer")
+        self.assertEqual((results[0]["score"], results[0]["global_score"]), (1.0, 50))
+        self.assertEqual(next(row for row in results if row["username"] == "match0")["score"], 0.125)
+
+    def test_vectorized_match_agrees_with_per_user_loop(self):
+        """Test the NumPy ranking matches a plain Python computation."""
+        rng = random.Random(7)
+        skills = [self.python.id, self.sql.id, 1001, 1002]
+        rows = [
+            (skill_id, user_id, rng.randint(1, 10), None)
+            for user_id in range(1, 400) for skill_id in skills if rng.random() < 0.5
+        ]
+        matrix = SkillMatrix()
+        matrix.replace(rows, search.current_version())
+        requirements = [(skills[0], 7, 2.0), (skills[2], 5, 1.0), (skills[3], 10, 0.5)]
+
+        levels = {(skill_id, user_id): level for skill_id, user_id, level, _ in rows}
+        expected = []
+        for user_id in {user_id for _, user_id, _, _ in rows}:
+            parts = [
+                (weight, min(levels[(skill_id, user_id)] / target, 1))
+                for skill_id, target, weight in requirements if (skill_id, user_id) in levels
+            ]
+            if parts:
+                expected.append((round(sum(weight * fit for weight, fit in parts) / 3.5, 4), user_id))
+        expected.sort(key=lambda item: (-item[0], item[1]))
+
+        results = matrix.match(requirements, limit=25)
+        self.assertEqual([(row["score"], row["user_id"]) for row in results], expected[:25])
+
+    def test_profile_crud_and_validation(self):
+        """Test profiles are created with requirements and validated."""
+        payload = {
+            "name": "Analyst",
+            "requirements": [{"skill": self.sql.id, "target_level": 6}],
+            "global_score_weight": 0.2,
+        }
+        response = self.client.post("/skills/job-profiles/", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["created_by"], self.empresa.id)
+        self.assertEqual(response.data["requirements"][0]["weight"], 1)
+
+        invalid = [
+            dict(payload, requirements=[]),
+            dict(payload, requirements=[{"skill": self.sql.id, "target_level": 6}] * 2),
+            dict(payload, certification_weight=0.9),
+        ]
+        for data in invalid:
+            response = self.client.post("/skills/job-profiles/", data, format="json")
+            self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f"/skills/job-profiles/{self.profile.id}/matches/", {"limit": 0})
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.get(f"/skills/job-profiles/{self.profile.id}/matches/")
+        self.assertEqual(response.status_code, 403)
@@ -1,9 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, SkillViewSet, SkillLevelViewSet
+from .views import CategoryViewSet, SkillViewSet, SkillLevelViewSet, JobProfileViewSet, TalentSearchView
 
 router = DefaultRouter()
 router.register("categories", CategoryViewSet, basename="category")
 router.register("skills", SkillViewSet, basename="skill")
 router.register("skill-levels", SkillLevelViewSet, basename="skilllevel")
+router.register("job-profiles", JobProfileViewSet, basename="jobprofile")
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path("search/", TalentSearchView.as_view(), name="talent-search"),
+] + router.urls
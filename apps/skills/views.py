@@ -1,15 +1,19 @@
-from rest_framework import viewsets, permissions
+from rest_framework import generics, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.db import models, transaction
 
-from .models import Category, Skill, SkillLevel
-from .serializers import CategorySerializer, SkillSerializer, SkillLevelSerializer
+from . import search
+from .matching import MAX_MATCH_RESULTS, match_profile
+from .models import Category, Skill, SkillLevel, JobProfile
+from .serializers import CategorySerializer, SkillSerializer, SkillLevelSerializer, JobProfileSerializer
 from django.contrib.auth import get_user_model
-from apps.users.permissions import IsAdminOrReadOnly, IsAdminOrEmpresaOrReadOnly
+from apps.users.permissions import IsAdminOrEmpresa, IsAdminOrReadOnly, IsAdminOrEmpresaOrReadOnly
+from apps.results.leaderboards import scope_entries
+from apps.results.views import leaderboard
 
 User = get_user_model()
 
@@ -52,6 +56,11 @@ class SkillViewSet(viewsets.ModelViewSet):
         ]
         return Response(data)
 
+    @action(detail=True, methods=["get"], url_path="leaderboard")
+    def leaderboard(self, request, pk=None):
+        skill = self.get_object()
+        return leaderboard(request, scope_entries("skill", skill.id), "skill", skill.id)
+
     @action(detail=True, methods=["get"], url_path="levels")
     def levels(self, request, pk=None):
         skill = self.get_object()
@@ -67,4 +76,114 @@ class SkillLevelViewSet(viewsets.ModelViewSet):
     serializer_class = SkillLevelSerializer
     permission_classes = [IsAdminOrEmpresaOrReadOnly]
     filter_backends = (DjangoFilterBackend, SearchFilter)
-    filterset_fields = {"user__id":["exact"], "skill__id":["exact"], "level":["gte","lte"]}
\ No newline at end of file
+    filterset_fields = {"user__id":["exact"], "skill__id":["exact"], "level":["gte","lte"]}
+
+
+class JobProfileViewSet(viewsets.ModelViewSet):
+    """
+    Job profiles - Admin and Empresa can CRUD and match users against a profile.
+    """
+    queryset = JobProfile.objects.select_related("created_by").prefetch_related("requirements__skill")
+    serializer_class = JobProfileSerializer
+    permission_classes = [IsAdminOrEmpresa]
+    filter_backends = (SearchFilter, OrderingFilter)
+    search_fields = ["name","description"]
+    ordering_fields = ["name","created_at"]
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=["get"], url_path="matches")
+    def matches(self, request, pk=None):
+        """Top-K usuarios por ajuste al perfil: GET /skills/job-profiles/<id>/matches/?limit=20"""
+        profile = self.get_object()
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return Response({"error": "limit debe ser un entero"}, status=400)
+        if not 1 <= limit <= MAX_MATCH_RESULTS:
+            return Response({"error": f"limit debe estar entre 1 y {MAX_MATCH_RESULTS}"}, status=400)
+
+        results = match_profile(profile, limit=limit)
+        usernames = dict(User.objects.filter(id__in=[row["user_id"] for row in results]).values_list("id", "username"))
+        # Se omiten usuarios eliminados después de la última actualización de la matriz
+        results = [dict(row, username=usernames[row["user_id"]]) for row in results if row["user_id"] in usernames]
+        return Response({"profile": profile.id, "name": profile.name, "results": results})
+
+
+def parse_requirements(value):
+    """
+    "django:6,sql:5" -> {skill_id: nivel mínimo}. Cada habilidad se indica por id o slug.
+    Lanza ValueError si el formato es inválido o alguna habilidad no existe.
+    """
+    parsed = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        key, separator, min_level = item.partition(":")
+        if not separator or not key.strip() or not min_level.strip().isdigit():
+            raise ValueError(f"Requisito inválido: '{item}'. Formato: <habilidad>:<nivel mínimo>")
+        parsed.append((key.strip(), int(min_level)))
+    if not parsed:
+        raise ValueError("Indique al menos un requisito: requirements=<habilidad>:<nivel mínimo>,...")
+
+    ids = {int(key) for key, _ in parsed if key.isdigit()}
+    slugs = {key for key, _ in parsed if not key.isdigit()}
+    found = Skill.objects.filter(models.Q(id__in=ids) | models.Q(slug__in=slugs)).values_list("id", "slug")
+    by_key = {}
+    for skill_id, slug in found:
+        by_key[str(skill_id)] = by_key[slug] = skill_id
+
+    requirements = {}
+    for key, min_level in parsed:
+        if key not in by_key:
+            raise ValueError(f"Habilidad '{key}' no encontrada")
+        skill_id = by_key[key]
+        requirements[skill_id] = max(min_level, requirements.get(skill_id, 0))
+    return requirements
+
+
+class TalentSearchView(generics.GenericAPIView):
+    """
+    Búsqueda de talento: usuarios que cumplen todos los niveles mínimos pedidos,
+    ordenados por la suma de esos niveles.
+
+    GET /skills/search/?requirements=django:6,sql:5&min_certification_level=3
+
+    Se resuelve con el índice invertido en memoria (apps.skills.search); el
+    nivel de certificación se consulta en el resumen por usuario
+    (CertificationSummary) solo para los candidatos del índice.
+    """
+    permission_classes = [IsAdminOrEmpresa]
+
+    def get(self, request):
+        from apps.certifications.models import CertificationSummary
+
+        try:
+            requirements = parse_requirements(request.query_params.get("requirements", ""))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        min_certification = request.query_params.get("min_certification_level")
+        if min_certification is not None and not min_certification.isdigit():
+            return Response({"error": "min_certification_level debe ser un entero positivo"}, status=400)
+
+        ranked = search.index.search(list(requirements.items()))
+        if min_certification is not None and ranked:
+            certified = set(
+                CertificationSummary.objects.filter(
+                    user_id__in=[row[0] for row in ranked], highest_level__gte=int(min_certification)
+                ).values_list("user_id", flat=True)
+            )
+            ranked = [row for row in ranked if row[0] in certified]
+
+        page = self.paginate_queryset(ranked)
+        usernames = dict(User.objects.filter(id__in=[row[0] for row in page]).values_list("id", "username"))
+        data = [
+            {
+                "user_id": user_id,
+                "username": usernames.get(user_id),
+                "score": score,
+                "levels": {str(skill_id): level for skill_id, level in levels.items()},
+            }
+            for user_id, score, levels in page
+        ]
+        return self.get_paginated_response(data)
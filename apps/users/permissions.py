@@ -83,6 +83,19 @@ class IsOwnerOrAdminOrEmpresa(BasePermission):
         return obj == request.user
 
 
+class IsSelfOrAdminOrEmpresa(BasePermission):
+    """
+    Admin and empresa can access any user; others only themselves.
+    Checks the URL pk, so the user does not need to be loaded.
+    """
+    def has_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        if request.user.role in ["admin", "empresa"]:
+            return True
+        return str(view.kwargs.get("pk")) == str(request.user.pk)
+
+
 class CanManageAssessments(BasePermission):
     """
     Admin and empresa can create/edit/delete assessments.
@@ -1,11 +1,13 @@
 """
 Tests for users app.
 """
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from .models import User, Profile
+from apps.skills.models import Category, Skill, SkillLevel
 
 
 class UserModelTest(TestCase):
@@ -195,4 +197,93 @@ class UserPermissionsTest(APITestCase):
         url = reverse('user-detail', kwargs={'pk': self.user1.id})
         data = {'first_name': 'Admin Updated'}
         response = self.client.patch(url, data)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class UserSkillsTest(APITestCase):
+    """Tests for the cached /users/{id}/skills/ endpoint."""
+    
+    def setUp(self):
+        """Set up a user with skill levels in two categories."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='skilled',
+            email='skilled@example.com',
+            password='pass123',
+            role='aprendiz'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='pass123',
+            role='aprendiz'
+        )
+        self.empresa = User.objects.create_user(
+            username='recruiter',
+            email='recruiter@example.com',
+            password='pass123',
+            role='empresa'
+        )
+        backend = Category.objects.create(name='Backend', slug='backend')
+        data = Category.objects.create(name='Datos', slug='datos')
+        self.python = Skill.objects.create(name='Python', slug='python', category=backend)
+        self.django = Skill.objects.create(name='Django', slug='django', category=backend)
+        self.sql = Skill.objects.create(name='SQL', slug='sql', category=data)
+        SkillLevel.objects.create(user=self.user, skill=self.python, level=8)
+        SkillLevel.objects.create(user=self.user, skill=self.django, level=5)
+        SkillLevel.objects.create(user=self.user, skill=self.sql, level=6)
+        self.url = f'/users/{self.user.id}/skills/'
+    
+    def test_returns_skill_levels_with_stats(self):
+        """Test the endpoint returns real skill levels and derived stats."""
+        self.client.force_authenticate(user=self.empresa)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'skilled')
+        self.assertEqual([row['skill'] for row in response.data['skills']], ['Python', 'SQL', 'Django'])
+        self.assertEqual(response.data['skills'][1]['category'], {'id': self.sql.category_id, 'name': 'Datos'})
+        stats = response.data['stats']
+        self.assertEqual((stats['total_skills'], stats['average_level'], stats['highest_level']), (3, 6.33, 8))
+        self.assertEqual(
+            [(row['name'], row['total_skills'], row['average_level']) for row in stats['categories']],
+            [('Backend', 2, 6.5), ('Datos', 1, 6.0)]
+        )
+    
+    def test_one_query_cold_and_none_warm(self):
+        """Test the endpoint is served from the cache after the first request."""
+        self.client.force_authenticate(user=self.empresa)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['stats']['total_skills'], 3)
+    
+    def test_cache_is_invalidated_by_skill_changes(self):
+        """Test saving or deleting levels and renaming skills refresh the entry."""
+        self.client.force_authenticate(user=self.user)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            level = SkillLevel.objects.get(user=self.user, skill=self.django)
+            level.level = 10
+            level.save()
+            SkillLevel.objects.filter(user=self.user, skill=self.sql).delete()
+        response = self.client.get(self.url)
+        self.assertEqual([(row['skill'], row['level']) for row in response.data['skills']],
+                         [('Django', 10), ('Python', 8)])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python.name = 'Python 3'
+            self.python.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['skills'][1]['skill'], 'Python 3')
+    
+    def test_permissions(self):
+        """Test users only see their own skills; admin and empresa see anyone's."""
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(f'/users/{self.other.id}/skills/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['skills'], [])
+        self.client.force_authenticate(user=self.empresa)
+        response = self.client.get('/users/999999/skills/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
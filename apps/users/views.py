@@ -12,7 +12,8 @@ from .serializers import (
 )
 from .models import User, Profile
 from .filters import UserFilter
-from .permissions import IsAdmin, IsAdminOrEmpresa
+from .permissions import IsAdmin, IsAdminOrEmpresa, IsSelfOrAdminOrEmpresa
+from apps.skills.cache import get_user_skills
 
 
 @extend_schema(
@@ -140,6 +141,8 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering_fields = ['created_at', 'username', 'email']
     ordering = ['-created_at']
+    # Cursor mode (?pagination=cursor) walks the primary key index
+    cursor_ordering = ['-id']
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -151,6 +154,8 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [IsAdminOrEmpresa()]
+        if self.action == 'skills':
+            return [IsSelfOrAdminOrEmpresa()]
         return [IsAdmin()]
     
     def get_queryset(self):
@@ -214,18 +219,20 @@ class UserViewSet(viewsets.ModelViewSet):
     @extend_schema(
         operation_id='users_skills_read',
         summary='Obtener habilidades',
-        description='Retorna las habilidades y niveles de competencia del usuario'
+        description='Retorna las habilidades y niveles de competencia del usuario, con estadísticas por categoría'
     )
     @action(detail=True, methods=['get'])
     def skills(self, request, pk=None):
-        """Obtener habilidades de un usuario"""
-        user = self.get_object()
-        # TODO: Implementar modelo de Skills
-        return Response({
-            "user_id": user.id,
-            "username": user.username,
-            "skills": [
-                {"skill": "Python", "level": "Avanzado"},
-                {"skill": "Django", "level": "Intermedio"},
-            ]
-        })
+        """
+        Obtener habilidades de un usuario con estadísticas derivadas.
+        Una consulta sin caché y ninguna con la entrada en caché (ver apps.skills.cache).
+        """
+        try:
+            user_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({'error': 'Usuario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        known_user = request.user if request.user.pk == user_id else None
+        data = get_user_skills(user_id, user=known_user)
+        if data is None:
+            return Response({'error': 'Usuario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
@@ -0,0 +1,42 @@
+"""
+Utilidades de la caché.
+
+Las versiones de contenido, la lista de revocación, los índices de
+habilidades y los intentos en curso se coordinan entre procesos a través de
+la caché por defecto. Con más de un proceso debe ser compartida (Redis): la
+caché en memoria (LocMemCache) es propia de cada proceso.
+
+Con REQUIRE_SHARED_CACHE, `manage.py check --deploy` falla si la caché es
+local; los intentos de evaluación además se rechazan en tiempo de ejecución.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias='default'):
+    """Indica si la caché es visible para todos los procesos"""
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_BACKENDS
+
+
+def shared_cache_missing():
+    """True si la configuración exige una caché compartida y no la hay"""
+    return getattr(settings, 'REQUIRE_SHARED_CACHE', False) and not is_shared_cache()
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Chequeo de despliegue: la caché debe ser compartida si la configuración lo exige"""
+    if not shared_cache_missing():
+        return []
+    return [
+        Error(
+            'La caché por defecto es local a cada proceso y REQUIRE_SHARED_CACHE está activo.',
+            hint='Configure REDIS_URL para usar una caché compartida entre procesos.',
+            id='config.E001',
+        )
+    ]
@@ -0,0 +1,82 @@
+"""
+Paginación de la API.
+
+Por defecto se pagina por número de página. Las vistas que declaran
+`cursor_ordering` admiten además un modo por cursor (keyset), que se activa
+con `?pagination=cursor`: no ejecuta COUNT(*) ni OFFSET, por lo que el costo
+por página es constante y permite recorrer tablas grandes. El orden del modo
+cursor es fijo, debe coincidir con un índice de la tabla y terminar en un
+campo único (p. ej. '-id') para que los empates tengan un orden estable.
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class IndexedCursorPagination(CursorPagination):
+    """Paginación por cursor con un orden fijo, alineado con un índice"""
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    def get_ordering(self, request, queryset, view):
+        # Se ignora ?ordering: un orden arbitrario no tendría índice que lo respalde
+        return self.ordering
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Paginación por número de página, con modo cursor opcional.
+
+    Modo cursor: `?pagination=cursor` en la primera petición; las siguientes
+    siguen los enlaces `next`/`previous`, que llevan el parámetro `cursor`.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+
+    cursor_paginator = None
+
+    def use_cursor(self, request, view):
+        if not getattr(view, 'cursor_ordering', None):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            self.cursor_paginator = IndexedCursorPagination(tuple(view.cursor_ordering))
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        if getattr(view, 'cursor_ordering', None):
+            parameters += [
+                {
+                    'name': self.mode_query_param,
+                    'required': False,
+                    'in': 'query',
+                    'description': 'Usar "cursor" para paginar por cursor (sin COUNT ni OFFSET).',
+                    'schema': {'type': 'string', 'enum': ['cursor']},
+                },
+                {
+                    'name': self.cursor_query_param,
+                    'required': False,
+                    'in': 'query',
+                    'description': 'Cursor de la página, tomado de los enlaces next/previous.',
+                    'schema': {'type': 'string'},
+                },
+            ]
+        return parameters
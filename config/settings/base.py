@@ -96,6 +96,28 @@ DATABASES = {
     }
 }
 
+# Cache compartida entre procesos (Redis) si se configura REDIS_URL;
+# en desarrollo se usa la caché en memoria del proceso
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Exige una caché compartida para las funciones que coordinan procesos por la
+# caché (ver config.cache); producción lo activa y `check --deploy` exige REDIS_URL
+REQUIRE_SHARED_CACHE = config('REQUIRE_SHARED_CACHE', default=False, cast=bool)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -127,7 +149,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -151,6 +173,13 @@ SPECTACULAR_SETTINGS = {
 
 AUTH_USER_MODEL = 'users.User'
 
+# Clave HMAC para firmar los tokens de certificados (por defecto SECRET_KEY)
+CERTIFICATE_SIGNING_KEY = config('CERTIFICATE_SIGNING_KEY', default='')
+
+# Los lotes de certificación se procesan en un hilo en segundo plano;
+# en False se procesan dentro de la misma petición
+CERTIFICATION_BATCHES_ASYNC = config('CERTIFICATION_BATCHES_ASYNC', default=True, cast=bool)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -164,5 +193,9 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'INFO',
         },
+        'apps': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }
\ No newline at end of file
@@ -8,3 +8,8 @@ SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 # Email para producción
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+# Con varios procesos, versiones de contenido, revocaciones e intentos se
+# coordinan por la caché: la caché en memoria de cada proceso no sirve.
+# Sin REDIS_URL, `manage.py check --deploy` falla (config.cache.check_shared_cache)
+REQUIRE_SHARED_CACHE = True
@@ -0,0 +1,96 @@
+"""
+Benchmark de la coincidencia con perfiles de cargo: matriz NumPy
+(apps.skills.matching) frente a un recorrido por usuario en Python.
+
+Carga la matriz con niveles sintéticos, sin escribir en la base de datos.
+Ejecutar con: python scripts/benchmark_job_matching.py --users 200000 --skills 300
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
+
+import django
+django.setup()
+
+from apps.skills.matching import SkillMatrix
+from apps.skills.search import current_versions
+
+
+def synthetic_rows(users, skills, skills_per_user):
+    rng = random.Random(42)
+    rows = []
+    for user_id in range(1, users + 1):
+        for skill_id in rng.sample(range(1, skills + 1), skills_per_user):
+            rows.append((skill_id, user_id, rng.randint(1, 10), None))
+    return rows
+
+
+def python_match(levels_by_user, requirements, limit):
+    total_weight = sum(weight for _, _, weight in requirements)
+    scores = []
+    for user_id, levels in levels_by_user.items():
+        fit, matched = 0.0, False
+        for skill_id, target, weight in requirements:
+            level = levels.get(skill_id)
+            if level is not None:
+                fit += weight / total_weight * min(level / target, 1)
+                matched = True
+        if matched:
+            scores.append((-fit, user_id))
+    scores.sort()
+    return scores[:limit]
+
+
+def timed(function, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--skills', type=int, default=300)
+    parser.add_argument('--skills-per-user', type=int, default=8)
+    parser.add_argument('--profile-skills', type=int, default=6)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.users, args.skills, args.skills_per_user)
+    start = time.perf_counter()
+    matrix = SkillMatrix()
+    matrix.replace(rows, current_versions())
+    print(f"Matriz cargada: {len(rows)} niveles en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    levels_by_user = {}
+    for skill_id, user_id, level, _ in rows:
+        levels_by_user.setdefault(user_id, {})[skill_id] = level
+
+    rng = random.Random(7)
+    requirements = [
+        (skill_id, rng.randint(5, 10), rng.choice((0.5, 1.0, 2.0)))
+        for skill_id in rng.sample(range(1, args.skills + 1), args.profile_skills)
+    ]
+
+    numpy_ms = timed(lambda: matrix.match(requirements, limit=args.limit), args.repeat)
+    python_ms = timed(lambda: python_match(levels_by_user, requirements, args.limit), args.repeat)
+    print(f"NumPy:  {numpy_ms:.1f} ms (mediana de {args.repeat})")
+    print(f"Python: {python_ms:.1f} ms (mediana de {args.repeat})")
+
+
+if __name__ == '__main__':
+    main()
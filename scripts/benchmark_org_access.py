@@ -0,0 +1,123 @@
+"""
+Benchmark del filtrado de organizaciones por rol: consultas anteriores
+(OR de propietario/administradores y JOIN a miembros con DISTINCT) frente a
+la tabla OrganizationAccess.
+
+Crea los datos dentro de una transacción que se revierte al terminar, por lo
+que no modifica la base de datos.
+Ejecutar con: python scripts/benchmark_org_access.py --memberships 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Agregar el directorio raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
+
+import django
+django.setup()
+
+from django.db import transaction
+from apps.organizations.models import Organization, OrganizationAccess, Team
+from apps.users.models import User
+
+
+def legacy_queryset(user):
+    if user.role == 'empresa':
+        return Organization.objects.filter(owner=user) | Organization.objects.filter(administrators=user)
+    return Organization.objects.filter(teams__members=user).distinct()
+
+
+def access_queryset(user):
+    relations = ['owner', 'administrator'] if user.role == 'empresa' else ['member']
+    return Organization.objects.filter(id__in=OrganizationAccess.organization_ids(user, relations))
+
+
+def populate(memberships, organizations, teams_per_organization, prefix):
+    users_count = max(memberships // 5, 1)
+    User.objects.bulk_create(
+        [User(username=f'{prefix}u{i}', email=f'{prefix}u{i}@bench.local', role='aprendiz', password='!')
+         for i in range(users_count)],
+        batch_size=1000
+    )
+    User.objects.bulk_create(
+        [User(username=f'{prefix}e{i}', email=f'{prefix}e{i}@bench.local', role='empresa', password='!')
+         for i in range(organizations * 3)],
+        batch_size=1000
+    )
+    learners = list(User.objects.filter(username__startswith=f'{prefix}u').values_list('id', flat=True))
+    companies = list(User.objects.filter(username__startswith=f'{prefix}e').values_list('id', flat=True))
+
+    Organization.objects.bulk_create(
+        [Organization(name=f'{prefix}org{i}', email=f'{prefix}org{i}@bench.local', owner_id=companies[i * 3])
+         for i in range(organizations)],
+        batch_size=1000
+    )
+    orgs = list(Organization.objects.filter(name__startswith=f'{prefix}org').values_list('id', flat=True))
+    Organization.administrators.through.objects.bulk_create(
+        [Organization.administrators.through(organization_id=org_id, user_id=companies[i * 3 + offset])
+         for i, org_id in enumerate(orgs) for offset in (1, 2)],
+        batch_size=1000
+    )
+
+    Team.objects.bulk_create(
+        [Team(name=f'team{t}', organization_id=org_id) for org_id in orgs for t in range(teams_per_organization)],
+        batch_size=1000
+    )
+    teams = list(Team.objects.filter(organization_id__in=orgs).values_list('id', flat=True))
+    per_team = max(memberships // len(teams), 1)
+    Team.members.through.objects.bulk_create(
+        [Team.members.through(team_id=team_id, user_id=user_id)
+         for team_id in teams for user_id in random.sample(learners, min(per_team, len(learners)))],
+        batch_size=5000
+    )
+    OrganizationAccess.rebuild(organization_ids=orgs)
+    return learners, companies
+
+
+def timed(build, users):
+    durations = []
+    for user in users:
+        started = time.perf_counter()
+        list(build(user).values_list('id', flat=True))
+        durations.append((time.perf_counter() - started) * 1000)
+    durations.sort()
+    return statistics.median(durations), durations[int(len(durations) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--memberships', type=int, default=100000)
+    parser.add_argument('--organizations', type=int, default=200)
+    parser.add_argument('--teams-per-organization', type=int, default=10)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(42)
+    with transaction.atomic():
+        started = time.perf_counter()
+        learners, companies = populate(
+            args.memberships, args.organizations, args.teams_per_organization, prefix='bench'
+        )
+        print(f"Datos creados en {time.perf_counter() - started:.1f}s "
+              f"({Team.members.through.objects.count()} pertenencias, {OrganizationAccess.objects.count()} accesos)")
+
+        sample_ids = random.sample(learners, min(args.samples, len(learners)))
+        sample_ids += random.sample(companies, min(args.samples, len(companies)))
+        users = list(User.objects.filter(id__in=sample_ids))
+        for name, build in (('Consultas anteriores', legacy_queryset), ('OrganizationAccess', access_queryset)):
+            median, p95 = timed(build, users)
+            print(f"{name:<22} mediana {median:.2f} ms  p95 {p95:.2f} ms")
+
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()